@@ -5,26 +5,30 @@ from dotenv import load_dotenv
 import os
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import json
+import queue
 import traceback
 import tempfile
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import io
 
 # Import RAG pipeline
 from rag_pipeline.clean_chunk import clean_text, chunk_text
 from rag_pipeline.embed_store import build_faiss_index
 from rag_pipeline.rag_query import ask_rag_improved
 from rag_pipeline.extract_metadata import extract_metadata_with_llm
+from rag_pipeline import extraction
+from rag_pipeline import ocr_cache
+from rag_pipeline.step_log import log_step, _log_context
+from rag_pipeline.lab_tables import extract_lab_results, build_structured_data, format_lab_results
 import supabase_helper as sb
-
-# Import OCR
-import cv2
-import numpy as np
-from PIL import Image
-import pdfplumber
+import job_queue
+import pipeline_state
 
 
 app = Flask(__name__)
@@ -47,123 +51,127 @@ CORS(app, resources={
 })
 
 
-def log_step(step: str, status: str = "info", details: str = None):
-    """Consistent logging"""
-    symbols = {
-        "start": "🔄",
-        "success": "✅",
-        "error": "❌",
-        "warning": "⚠️",
-        "info": "ℹ️"
-    }
-    symbol = symbols.get(status, "•")
+# ============================================
+# PROGRESS EVENTS
+# ============================================
+
+# Comment line sent on idle streams so proxies keep the connection open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_progress(work, *args, forward_progress: bool = False, **kwargs) -> Response:
+    """
+    Run work(*args, **kwargs) -> (body, status) and stream its progress as SSE
+    
+    The work runs in its own thread; every log_step it (or a pipeline thread
+    it starts) makes becomes a "step" event, or a "stage" event for the
+    boundaries in step_log.STAGE_EVENTS. With forward_progress, work also gets a
+    progress callback whose events (see run_process_files) are streamed as-is.
+    The last event is "result" with the body and status the JSON endpoint
+    would have returned. A client that disconnects does not stop the work.
+    """
+    events = queue.Queue()
+    if forward_progress:
+        kwargs["progress"] = lambda name, data: events.put((name, data))
     
-    message = f"{symbol} {step}"
-    if details:
-        message += f": {details}"
-    print(message, flush=True)
+    def run():
+        _log_context.sink = lambda name, data: events.put((name, data))
+        try:
+            body, status = work(*args, **kwargs)
+        except Exception as e:
+            log_step("FATAL ERROR", "error", str(e))
+            traceback.print_exc()
+            body, status = {"success": False, "error": str(e)}, 500
+        finally:
+            _log_context.sink = None
+        events.put(("result", {"status": status, "body": body}))
+        events.put(None)
+    
+    threading.Thread(target=run, name="progress-stream", daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            yield _sse(*item)
+    
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 
 # ============================================
 # IN-MEMORY OCR FUNCTIONS
 # ============================================
 
-def extract_text_from_bytes(file_bytes: bytes, file_extension: str) -> str:
-    """Extract text from file bytes (NO file I/O)"""
+# Bump whenever extraction output changes so cached text is not reused
+EXTRACTOR_VERSION = "7"
+
+# OCR the top of page one first and match the patient before full OCR
+OCR_HEADER_FIRST = os.getenv("OCR_HEADER_FIRST", "true").lower() in ("1", "true", "yes")
+# Header text shorter than this is not worth a metadata call
+HEADER_MIN_CHARS = 30
+# Run full OCR on every header-only (mismatched) report at the next sync;
+# otherwise only when the profile's name no longer mismatches or the
+# request asks for it ({"full_ocr": true})
+OCR_HEADER_ONLY_RECHECK = os.getenv("OCR_HEADER_ONLY_RECHECK", "false").lower() in ("1", "true", "yes")
+
+
+def extract_text_from_bytes(file_bytes: bytes, file_extension: str, use_cache: bool = True,
+                            report: dict = None) -> str:
+    """
+    Extract text from file bytes, reusing cached text for byte-identical files
+    
+    Runs rag_pipeline.extraction.extract_text with EXTRACTION_POLICY. Page
+    count, pixels per page and wall-clock time are bounded by the
+    OCR_MAX_PAGES / OCR_MAX_PAGE_MEGAPIXELS / OCR_DOC_TIMEOUT budgets. Going
+    over a budget returns whatever text was extracted so far.
+    
+    Args:
+        report: Optional dict filled with the budget outcome
+            ({"truncated", "reasons", "pages_total", "pages_processed", ...})
+    """
+    # The policy changes the output, so it is part of the cache scope
+    key = ocr_cache.cache_key(file_bytes, file_extension,
+                              f"{EXTRACTOR_VERSION}:{extraction.EXTRACTION_POLICY}")
+    
+    use_cache = use_cache and ocr_cache.OCR_CACHE_ENABLED
+    
+    if use_cache:
+        cached = ocr_cache.get_cached_text(key)
+        if cached is not None:
+            log_step("OCR cache", "success", f"Hit {key[:12]} ({len(cached)} chars)")
+            if report is not None:
+                report.update({"truncated": False, "reasons": [], "cached": True})
+            return cached
+        log_step("OCR cache", "info", f"Miss {key[:12]}")
+    
     log_step("OCR", "start", f"Processing {file_extension}")
+    outcome = {}
+    text = extraction.extract_text(file_bytes, file_extension, report=outcome)
     
-    try:
-        # PDF files
-        if file_extension.lower() == '.pdf':
-            # Try pdfplumber first
-            try:
-                bytes_io = io.BytesIO(file_bytes)
-                
-                with pdfplumber.open(bytes_io) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n\n"
-                    
-                    if text.strip() and len(text.strip()) > 50:
-                        log_step("PDF text", "success", f"{len(text)} chars")
-                        return text.strip()
-                    else:
-                        log_step("PDF", "warning", "Insufficient text - might be scanned")
-                        
-            except Exception as e:
-                log_step("pdfplumber", "warning", f"Failed: {e}")
-            
-            # For scanned PDFs
-            try:
-                from pdf2image import convert_from_bytes
-                import pytesseract
-                
-                images = convert_from_bytes(file_bytes, dpi=300)
-                log_step("PDF images", "success", f"{len(images)} pages")
-                
-                all_text = []
-                for i, img in enumerate(images, 1):
-                    img_array = np.array(img)
-                    
-                    if len(img_array.shape) == 3:
-                        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-                    else:
-                        gray = img_array
-                    
-                    page_text = pytesseract.image_to_string(
-                        gray,
-                        lang='eng',
-                        config='--oem 3 --psm 6'
-                    )
-                    
-                    if page_text.strip():
-                        all_text.append(page_text.strip())
-                
-                combined = "\n\n".join(all_text)
-                
-                if combined.strip():
-                    log_step("PDF OCR", "success", f"{len(combined)} chars")
-                    return combined
-                    
-            except Exception as e:
-                log_step("PDF OCR", "error", str(e))
-        
-        # Image files
-        elif file_extension.lower() in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif']:
-            try:
-                import pytesseract
-                
-                bytes_io = io.BytesIO(file_bytes)
-                img = Image.open(bytes_io)
-                img_array = np.array(img)
-                
-                if len(img_array.shape) == 3:
-                    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-                else:
-                    gray = img_array
-                
-                text = pytesseract.image_to_string(
-                    gray,
-                    lang='eng',
-                    config='--oem 3 --psm 6'
-                )
-                
-                if text.strip():
-                    log_step("Image OCR", "success", f"{len(text)} chars")
-                    return text.strip()
-                    
-            except Exception as e:
-                log_step("Image OCR", "error", str(e))
-        
-        log_step("OCR", "error", "No text extracted")
-        return ""
-        
-    except Exception as e:
-        log_step("OCR", "error", str(e))
-        traceback.print_exc()
-        return ""
+    if outcome["reasons"]:
+        log_step("OCR budget", "warning" if outcome["truncated"] else "info",
+                f"{', '.join(outcome['reasons'])} - {outcome['pages_processed']}"
+                f"/{outcome['pages_total']} pages in {outcome['seconds']:.1f}s")
+    if report is not None:
+        report.update(outcome)
+    
+    # Partial text depends on the budget (and on timing), so it is never cached
+    if use_cache and text and not outcome["truncated"]:
+        ocr_cache.put_cached_text(key, text)
+    
+    return text
 
 
 def calculate_name_similarity(name1: str, name2: str) -> float:
@@ -276,307 +284,911 @@ def get_profile_info(profile_id: str) -> dict:
 
 
 # ============================================
-# PROCESS FILES
+# PER-FILE HELPERS
 # ============================================
 
-@app.route("/api/process-files", methods=["POST"])
-def process_files():
-    """Process user files with name matching"""
-    print("\n" + "="*80, flush=True)
-    log_step("PROCESS FILES", "start")
-    print("="*80, flush=True)
+PLACEHOLDER_NAMES = ['unknown', 'patient', 'name', 'sex', 'age', 'none']
+
+
+def is_placeholder_name(name: str) -> bool:
+    """True when metadata has no usable patient name"""
+    return not name or name.lower() in PLACEHOLDER_NAMES
+
+
+# Name similarity for a match, and for a partial match still included
+NAME_MATCH_SIMILARITY = 0.7
+NAME_PARTIAL_SIMILARITY = 0.4
+
+
+def header_match_changed(record: dict, user_display_name: str) -> bool:
+    """Whether a header-only record's patient no longer mismatches the profile name"""
+    patient_name = record.get('patient_name')
+    if is_placeholder_name(patient_name):
+        return False
+    return calculate_name_similarity(patient_name, user_display_name) >= NAME_PARTIAL_SIMILARITY
+
+
+def verify_report_name(report_patient_name: str, text: str, file_name: str,
+                       user_display_name: str) -> tuple:
+    """
+    Match the report's patient against the profile's display name
+    
+    Returns:
+        (patient_name, name_match_status, name_match_confidence)
+    """
+    name_match_status = 'pending'
+    name_match_confidence = 0.0
+    
+    # Try to extract patient name from report text if metadata extraction failed
+    if is_placeholder_name(report_patient_name):
+        log_step("Name extraction", "warning", "Metadata extraction failed, trying text patterns...")
+        
+        # Look for patterns like "MR. VEDANT DHOKE" or "Patient: Vedant Dhoke"
+        import re
+        name_patterns = [
+            r"(?:MR\.|MRS\.|MS\.|DR\.)\s+([A-Z]+(?:\s+[A-Z]+)+)",
+            r"Patient\s*Name\s*:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
+            r"Name\s*:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
+        ]
+        
+        for pattern in name_patterns:
+            match = re.search(pattern, text[:500], re.IGNORECASE)
+            if match:
+                report_patient_name = match.group(1).strip()
+                log_step("Name extraction", "success", f"Found from text: {report_patient_name}")
+                break
     
+    # Now do the verification
+    if not is_placeholder_name(report_patient_name):
+        similarity = calculate_name_similarity(report_patient_name, user_display_name)
+        name_match_confidence = similarity
+        
+        if similarity >= NAME_MATCH_SIMILARITY:
+            name_match_status = 'matched'
+            log_step("Name verification", "success", f"MATCH: {similarity:.2f} - '{report_patient_name}' vs '{user_display_name}'")
+        elif similarity >= NAME_PARTIAL_SIMILARITY:
+            # PARTIAL MATCH: Still include in summary but with lower confidence
+            name_match_status = 'matched'  # Include partial matches
+            log_step("Name verification", "warning", 
+                    f"PARTIAL MATCH: {similarity:.2f} - '{report_patient_name}' vs '{user_display_name}' (including in summary)")
+        else:
+            name_match_status = 'mismatched'
+            log_step("Name verification", "warning", 
+                    f"MISMATCH: {similarity:.2f} - Report '{report_patient_name}' vs User '{user_display_name}'")
+    else:
+        # NO NAME FOUND: Check if display_name appears in the file name
+        log_step("Name verification", "warning", "No patient name found in text")
+        
+        file_name_lower = file_name.lower()
+        user_name_parts = user_display_name.lower().split()
+        
+        # If user's name (or any part) is in the filename, assume it's theirs
+        name_in_filename = any(part in file_name_lower for part in user_name_parts if len(part) > 2)
+        
+        if name_in_filename:
+            name_match_status = 'matched'
+            name_match_confidence = 0.6
+            log_step("Name verification", "success", f"FILENAME MATCH: User name '{user_display_name}' found in filename (including in summary)")
+        else:
+            log_step("Name verification", "info", "Patient name unclear and not in filename - marked as pending")
+    
+    return report_patient_name, name_match_status, name_match_confidence
+
+
+def extract_header_metadata(file_bytes: bytes, file_ext: str, file_name: str) -> tuple:
+    """
+    Phase one of processing: metadata from the top of page one only
+    
+    Returns:
+        (metadata or None when the header had too little text, header_text)
+    """
+    header_report = {}
     try:
-        data = request.get_json()
-        
-        profile_id = resolve_profile_id(data)
-        if not profile_id:
-            return jsonify({
-                "success": False,
-                "error": "profile_id is required"
-            }), 400
+        with _stage_slots["ocr"]:
+            log_step("Header OCR", "start")
+            header_text = extraction.extract_header_text(file_bytes, file_ext, report=header_report)
+    except Exception as e:
+        log_step("Header OCR", "warning", f"Failed: {e}")
+        return None, ""
+    
+    if len(header_text.strip()) < HEADER_MIN_CHARS:
+        log_step("Header OCR", "warning", f"Only {len(header_text.strip())} chars - using full OCR")
+        return None, header_text
+    
+    log_step("Header OCR", "success",
+            f"{len(header_text)} chars from {header_report.get('source')} "
+            f"in {header_report.get('seconds', 0):.2f}s")
+    
+    with _stage_slots["llm"]:
+        log_step("Header metadata", "start")
+        return extract_metadata_with_llm(header_text, file_name), header_text
+
+
+def report_kwargs(metadata: dict) -> dict:
+    """Metadata fields stored with a processed report"""
+    return {
+        'report_date': metadata.get('report_date'),
+        'age': metadata.get('age'),
+        'gender': metadata.get('gender'),
+        'report_type': metadata.get('report_type'),
+        'doctor_name': metadata.get('doctor_name'),
+        'hospital_name': metadata.get('hospital_name'),
+    }
 
-        folder_type = data.get("folder_type", "reports")
-        
-        log_step("Config", "info", f"Profile: {profile_id}, Folder: {folder_type}")
-        
-        # Get profile info
-        log_step("Fetching profile info", "start")
-        user_info = get_profile_info(profile_id)
-        
-        if not user_info:
-            return jsonify({
-                "success": False,
-                "error": "Profile not found",
-                "message": "Selected profile does not exist"
-            }), 404
 
-        if not user_info.get('display_name'):
-            log_step("Profile info", "warning", "No display_name found")
-            return jsonify({
-                "success": False,
-                "error": "Profile display name not found",
-                "message": "Please set your display name in your profile first"
-            }), 400
-        
-        user_display_name = user_info.get('display_name')
-        log_step("Profile info", "success", f"User: {user_display_name}")
+def save_report(profile_id: str, file_path: str, file_name: str, folder_type: str,
+                extracted_text: str, metadata: dict, patient_name: str,
+                name_match_status: str, name_match_confidence: float,
+                structured_data: dict = None, source: dict = None,
+                processing_status: str = 'completed') -> str:
+    """Upsert one processed report (source: sb.storage_fingerprint of the file)"""
+    return sb.save_extracted_data(
+        profile_id=profile_id,
+        file_path=file_path,
+        file_name=file_name,
+        folder_type=folder_type,
+        extracted_text=extracted_text,
+        patient_name=patient_name,
+        name_match_status=name_match_status,
+        name_match_confidence=name_match_confidence,
+        structured_data=structured_data,
+        source=source,
+        processing_status=processing_status,
+        **report_kwargs(metadata)
+    )
+
+
+# ============================================
+# BATCHED REPORT WRITES
+# ============================================
+
+def new_report_batch(batch_size: int = None) -> dict:
+    """Collects one processing run's reports for sb.bulk_upsert_reports"""
+    return {
+        "batch_size": max(1, batch_size or sb.REPORT_UPSERT_BATCH_SIZE),
+        "records": [],
+        "outcomes": {},
+        "lock": threading.Lock(),
+    }
+
+
+def flush_reports(batch: dict):
+    """Write every queued report; outcomes are kept by file_path"""
+    with batch["lock"]:
+        records, batch["records"] = batch["records"], []
+    if not records:
+        return
+    
+    started = time.perf_counter()
+    with _stage_slots["save"]:
+        log_step("Saving", "start", f"{len(records)} reports")
+        outcomes = sb.bulk_upsert_reports(records, batch["batch_size"])
+    seconds_each = (time.perf_counter() - started) / len(records)
+    
+    # Report each file on its own (this may run on another file's thread)
+    caller = (getattr(_log_context, "prefix", None), getattr(_log_context, "file_name", None))
+    _log_context.prefix = None
+    try:
+        for outcome in outcomes:
+            file_name = outcome["file_path"].rsplit("/", 1)[-1]
+            _log_context.file_name = file_name
+            if outcome["error"]:
+                log_step("Save failed", "error", f"{file_name}: {outcome['error']}")
+            else:
+                log_step("Saved", "success", f"{file_name} (ID: {outcome['id']})")
+                pipeline_state.mark_saved(outcome["file_path"], seconds=seconds_each)
+    finally:
+        _log_context.prefix, _log_context.file_name = caller
+    
+    with batch["lock"]:
+        batch["outcomes"].update((o["file_path"], o) for o in outcomes)
+
+
+def store_report(ctx: dict, file_path: str, file_name: str, extracted_text: str,
+                 metadata: dict, patient_name: str, name_match_status: str,
+                 name_match_confidence: float, structured_data: dict = None,
+                 source: dict = None, processing_status: str = 'completed') -> str:
+    """
+    Save a report now, or queue it when ctx carries a "report_batch"
+    
+    source (sb.storage_fingerprint) is stored so a replaced file is noticed;
+    processing_status is sb.HEADER_ONLY_STATUS for header-pass reports.
+    
+    Returns:
+        Record ID, or None when queued (see apply_save_outcomes)
+    """
+    batch = ctx.get("report_batch")
+    
+    if batch is None:
+        with _stage_slots["save"]:
+            log_step("Saving", "start")
+            record_id = save_report(
+                ctx["profile_id"], file_path, file_name, ctx["folder_type"], extracted_text,
+                metadata, patient_name, name_match_status, name_match_confidence,
+                structured_data=structured_data, source=source,
+                processing_status=processing_status
+            )
+        log_step("Saved", "success", f"ID: {record_id}")
+        return record_id
+    
+    record = sb.build_report_record(
+        ctx["profile_id"], file_path, file_name, ctx["folder_type"], extracted_text,
+        patient_name=patient_name,
+        name_match_status=name_match_status,
+        name_match_confidence=name_match_confidence,
+        structured_data=structured_data,
+        source=source,
+        processing_status=processing_status,
+        **report_kwargs(metadata)
+    )
+    with batch["lock"]:
+        batch["records"].append(record)
+        full = len(batch["records"]) >= batch["batch_size"]
+    log_step("Save queued", "success")
+    
+    if full:
+        flush_reports(batch)
+    return None
+
+
+def apply_save_outcomes(results: list, batch: dict, ctx: dict, progress=None):
+    """Fill in record IDs of queued reports; a failed write fails its file"""
+    for idx, result in enumerate(results):
+        if result.get("status") != "success" or result.get("record_id") is not None:
+            continue
         
-        # Get files from storage
-        log_step("Fetching files", "start")
-        files = sb.list_user_files(profile_id, folder_type)
+        file_path = f"{ctx['profile_id']}/{ctx['folder_type']}/{result['file_name']}"
+        outcome = batch["outcomes"].get(file_path)
+        if outcome is None:
+            continue
         
-        if not files:
-            log_step("Files", "warning", "No files in storage")
+        if outcome["error"]:
+            result["status"] = "failed"
+            result["error"] = f"Save failed: {outcome['error']}"
+        else:
+            result["record_id"] = outcome["id"]
+        _notify(progress, "file_finished", {"position": idx, "result": result})
+
+
+# ============================================
+# PER-FILE PIPELINE
+# ============================================
+
+# Files processed at once by /api/process-files
+PIPELINE_FILE_CONCURRENCY = int(os.getenv("PIPELINE_FILE_CONCURRENCY", "4"))
+
+# Per-stage limits, shared by every request in this process. OCR of PDF
+# pages is further spread over the OCR process pool (parallel_ocr).
+STAGE_LIMITS = {
+    "fetch": int(os.getenv("PIPELINE_FETCH_CONCURRENCY", "4")),
+    "ocr": int(os.getenv("PIPELINE_OCR_CONCURRENCY", "2")),
+    "llm": int(os.getenv("PIPELINE_LLM_CONCURRENCY", "3")),
+    "save": int(os.getenv("PIPELINE_SAVE_CONCURRENCY", "2")),
+}
+_stage_slots = {stage: threading.BoundedSemaphore(max(1, limit)) for stage, limit in STAGE_LIMITS.items()}
+
+
+def _extract_stage(file_bytes: bytes, file_ext: str, file_name: str,
+                   user_display_name: str, header_first: bool = True) -> dict:
+    """
+    Header pass, then full OCR unless the header shows someone else's report
+    
+    Args:
+        header_first: False goes straight to full OCR (e.g. finishing a
+            report an earlier run saved from the header alone)
+    
+    Returns:
+        Checkpoint data: {"phase": "header", "text", "metadata", "patient_name",
+        "name_match_status", "name_match_confidence"} when the header settled it,
+        else {"phase": "full", "text", "extraction", "structured_data",
+        "header_metadata"}
+    """
+    # Phase one: top of page one only, enough for name matching
+    header_metadata = None
+    if OCR_HEADER_FIRST and header_first:
+        header_metadata, header_text = extract_header_metadata(file_bytes, file_ext, file_name)
+        
+        if header_metadata:
+            header_name, header_status, header_confidence = verify_report_name(
+                header_metadata.get('patient_name'), header_text, file_name, user_display_name
+            )
             
-            # Clean up orphaned records
+            # Someone else's report: flag it without paying for full OCR
+            if header_status == 'mismatched':
+                log_step("Header check", "warning", "Mismatched patient - skipping full OCR")
+                return {
+                    "phase": "header",
+                    "text": header_text,
+                    "metadata": header_metadata,
+                    "patient_name": header_name,
+                    "name_match_status": header_status,
+                    "name_match_confidence": header_confidence
+                }
+    
+    # Phase two: full document
+    with _stage_slots["ocr"]:
+        log_step("OCR", "start")
+        
+        extraction_report = {}
+        extracted_text = extract_text_from_bytes(file_bytes, file_ext, report=extraction_report)
+        
+        if not extracted_text or len(extracted_text.strip()) < 50:
+            reasons = extraction_report.get("reasons")
+            raise Exception(f"Insufficient text extracted: {len(extracted_text.strip())} chars"
+                            + (f" ({', '.join(reasons)})" if reasons else ""))
+        
+        log_step("Extracted", "warning" if extraction_report.get("truncated") else "success",
+                f"{len(extracted_text)} chars"
+                + (" (partial: " + ", ".join(extraction_report["reasons"]) + ")"
+                   if extraction_report.get("truncated") else ""))
+        
+        # Structured lab rows from the PDF text layer (no OCR involved)
+        structured_data = None
+        if file_ext.lower() == '.pdf':
             try:
-                query = sb.supabase.table('medical_reports_processed').delete().eq('profile_id', profile_id)
-                if folder_type:
-                    query = query.eq('folder_type', folder_type)
-                result = query.execute()
-                
-                deleted = len(result.data) if result.data else 0
-                log_step("Cleanup", "success", f"Deleted {deleted} orphaned records")
+                lab_results = extract_lab_results(file_bytes=file_bytes)
+                if lab_results:
+                    structured_data = build_structured_data(lab_results)
+                    log_step("Lab tables", "success", f"{len(lab_results)} rows")
             except Exception as e:
-                log_step("Cleanup", "error", str(e))
+                log_step("Lab tables", "warning", f"Failed: {e}")
+    
+    return {
+        "phase": "full",
+        "text": extracted_text,
+        "extraction": {
+            "truncated": extraction_report.get("truncated", False),
+            "reasons": extraction_report.get("reasons", [])
+        },
+        "structured_data": structured_data,
+        "header_metadata": header_metadata
+    }
+
+
+def _metadata_stage(state: dict, file_name: str, user_display_name: str) -> dict:
+    """Metadata and name match for a fully extracted report (adds to state)"""
+    header_metadata = state.get("header_metadata")
+    
+    # The header pass already read the same header
+    if header_metadata and not is_placeholder_name(header_metadata.get('patient_name')):
+        metadata = header_metadata
+        log_step("Metadata", "info", "Reusing header pass")
+    else:
+        with _stage_slots["llm"]:
+            log_step("Metadata", "start")
+            metadata = extract_metadata_with_llm(state["text"], file_name)
+    
+    log_step("Metadata", "success", 
+            f"Patient: {metadata.get('patient_name')}, Age: {metadata.get('age')}, "
+            f"Type: {metadata.get('report_type')}")
+    
+    patient_name, name_match_status, name_match_confidence = verify_report_name(
+        metadata.get('patient_name'), state["text"], file_name, user_display_name
+    )
+    
+    return {
+        **state,
+        "metadata": metadata,
+        "patient_name": patient_name,
+        "name_match_status": name_match_status,
+        "name_match_confidence": name_match_confidence
+    }
+
+
+def process_file(file_info: dict, ctx: dict) -> dict:
+    """
+    Fetch, OCR, extract metadata, match and save one storage file
+    
+    Each stage holds a slot from _stage_slots, so network-bound stages of
+    one file overlap with OCR of another without oversubscribing either.
+    Completed stages are checkpointed (pipeline_state), so a retry after a
+    crash resumes from the last one instead of OCR-ing again.
+    
+    Args:
+        file_info: Storage listing entry
+        ctx: {"profile_id", "folder_type", "user_display_name"}, plus an
+            optional "report_batch" (new_report_batch) to queue the save,
+            "checkpoints_since" (ISO timestamp; older checkpoints are ignored)
+            and "full_ocr_paths" (paths whose header-only record needs the
+            full OCR, so the header pass is skipped)
+    
+    Returns:
+        Result dict for the /api/process-files response
+    """
+    profile_id = ctx["profile_id"]
+    folder_type = ctx["folder_type"]
+    user_display_name = ctx["user_display_name"]
+    file_name = file_info.get('name')
+    file_path = f"{profile_id}/{folder_type}/{file_name}"
+    file_ext = os.path.splitext(file_name)[1]
+    # Recorded with the report so a later scan can tell if the file was replaced
+    source = sb.storage_fingerprint(file_info)
+    full_ocr = file_path in ctx.get("full_ocr_paths", ())
+    
+    log_step("Processing", "start", file_name)
+    
+    try:
+        checkpoint = pipeline_state.load_checkpoint(file_path, source,
+                                                    since=ctx.get("checkpoints_since"))
+        # A saved checkpoint whose record is gone (we are here again) starts over
+        if checkpoint and checkpoint["stage"] == pipeline_state.SAVED:
+            checkpoint = None
+        # So does a header-only result when the full OCR is due
+        if checkpoint and full_ocr and checkpoint["data"].get("phase") == "header":
+            checkpoint = None
+        stage = resumed_from = checkpoint["stage"] if checkpoint else None
+        state = checkpoint["data"] if checkpoint else {}
+        if stage:
+            log_step("Resuming", "info", f"After {stage} (attempt {checkpoint['attempts'] + 1})")
+        
+        if not pipeline_state.reached(stage, pipeline_state.TEXT_EXTRACTED):
+            # Downloads stay in memory, so a resumed file is fetched again
+            started = time.perf_counter()
+            with _stage_slots["fetch"]:
+                log_step("Fetch", "start", "Loading from Supabase")
+                file_bytes = sb.get_file_bytes(file_path)
+            log_step("Fetched", "success", f"{len(file_bytes)} bytes")
+            pipeline_state.save_checkpoint(file_path, source, pipeline_state.FETCHED,
+                                           seconds=time.perf_counter() - started)
             
-            return jsonify({
-                "success": False,
-                "error": "No files found for this profile"
-            }), 404
-        
-        log_step("Files found", "success", f"{len(files)} files")
-        
-        # Get existing processed reports
-        log_step("Checking processed", "start")
-        existing_records = sb.get_processed_reports(profile_id, folder_type)
-        
-        # Build sets for comparison
-        storage_paths = set(f"{profile_id}/{folder_type}/{f.get('name')}" for f in files)
-        existing_paths = set(r['file_path'] for r in existing_records)
-        
-        # Delete orphaned records
-        orphaned = [r for r in existing_records if r['file_path'] not in storage_paths]
-        deleted_count = 0
-        
-        if orphaned:
-            log_step("Removing orphaned", "start")
-            for record in orphaned:
-                try:
-                    sb.supabase.table('medical_reports_processed').delete().eq('id', record['id']).execute()
-                    log_step("Deleted", "success", record['file_name'])
-                    deleted_count += 1
-                except Exception as e:
-                    log_step("Delete failed", "error", str(e))
-        
-        # Process new files
-        log_step("Processing new files", "start")
-        
-        results = []
-        successful = 0
-        failed = 0
-        skipped = 0
-        matched_reports = 0
-        mismatched_reports = 0
-        
-        for idx, file_info in enumerate(files, 1):
-            file_name = file_info.get('name')
-            file_path = f"{profile_id}/{folder_type}/{file_name}"
+            started = time.perf_counter()
+            state = _extract_stage(file_bytes, file_ext, file_name, user_display_name,
+                                   header_first=not full_ocr)
+            del file_bytes
             
-            print(f"\n{'─'*80}", flush=True)
-            print(f"FILE {idx}/{len(files)}: {file_name}", flush=True)
-            print(f"{'─'*80}", flush=True)
+            # The header pass settles metadata for other patients' reports
+            stage = (pipeline_state.METADATA_EXTRACTED if state["phase"] == "header"
+                     else pipeline_state.TEXT_EXTRACTED)
+            pipeline_state.save_checkpoint(file_path, source, stage, data=state,
+                                           seconds=time.perf_counter() - started)
+        
+        if not pipeline_state.reached(stage, pipeline_state.METADATA_EXTRACTED):
+            started = time.perf_counter()
+            state = _metadata_stage(state, file_name, user_display_name)
+            pipeline_state.save_checkpoint(file_path, source, pipeline_state.METADATA_EXTRACTED,
+                                           data=state, seconds=time.perf_counter() - started)
+        
+        # Save to database (or queue for the run's bulk upsert)
+        started = time.perf_counter()
+        structured_data = state.get("structured_data")
+        header_only = state["phase"] == "header"
+        record_id = store_report(
+            ctx, file_path, file_name, state["text"],
+            state["metadata"], state["patient_name"], state["name_match_status"],
+            state["name_match_confidence"], structured_data=structured_data, source=source,
+            processing_status=sb.HEADER_ONLY_STATUS if header_only else 'completed'
+        )
+        if record_id is not None:
+            pipeline_state.mark_saved(file_path, seconds=time.perf_counter() - started)
+        
+        extraction_info = state.get("extraction") or {}
+        return {
+            "file_name": file_name,
+            "status": "success",
+            "record_id": record_id,
+            "folder_type": folder_type,
+            "patient_name": state["patient_name"],
+            "report_date": state["metadata"].get('report_date'),
+            "report_type": state["metadata"].get('report_type'),
+            "text_length": len(state["text"]),
+            "name_match_status": state["name_match_status"],
+            "name_match_confidence": state["name_match_confidence"],
+            "lab_result_count": len(structured_data['lab_results']) if structured_data else 0,
+            "ocr_phase": state["phase"],
+            "extraction_truncated": True if header_only else extraction_info.get("truncated", False),
+            "extraction_reasons": ["header_only"] if header_only else extraction_info.get("reasons", []),
+            "resumed_from": resumed_from
+        }
+        
+    except Exception as e:
+        log_step("Failed", "error", f"{file_name}: {str(e)}")
+        traceback.print_exc()
+        try:
+            pipeline_state.record_failure(file_path, str(e))
+        except Exception:
+            pass
+        
+        return {
+            "file_name": file_name,
+            "status": "failed",
+            "error": str(e)
+        }
+
+
+def _process_file_logged(idx: int, total: int, file_info: dict, ctx: dict, sink=None) -> dict:
+    """process_file with log lines tagged by file, for interleaved output"""
+    caller_sink = getattr(_log_context, "sink", None)
+    _log_context.prefix = f"{idx}/{total or '?'} {file_info.get('name')}"
+    _log_context.file_name = file_info.get('name')
+    # Pipeline threads report to the caller's event stream, if any
+    _log_context.sink = sink
+    try:
+        return process_file(file_info, ctx)
+    finally:
+        _log_context.prefix = None
+        _log_context.file_name = None
+        _log_context.sink = caller_sink
+
+
+def _notify(progress, event: str, data: dict):
+    """Call a progress callback; a failing callback never fails the pipeline"""
+    if progress is None:
+        return
+    try:
+        progress(event, data)
+    except Exception as e:
+        log_step("Progress callback", "warning", f"{event}: {e}")
+
+
+def run_file_pipeline(files, ctx: dict, existing_paths: set = None,
+                      concurrency: int = None, progress=None) -> list:
+    """
+    Process storage files concurrently
+    
+    Args:
+        files: Storage listing entries; a list, or any iterable (such as a
+            paginated listing) whose files start processing as they arrive
+        ctx: See process_file
+        existing_paths: Paths already processed and unchanged (reported as
+            skipped); checked when each file arrives
+        concurrency: Files in flight (default: PIPELINE_FILE_CONCURRENCY)
+        progress: Optional callback(event, data), called with "file_started"
+            {"position", "file_name"} and "file_finished" {"position", "result"}
+            (from pipeline threads)
+    
+    Returns:
+        One result per file, in the order of `files`
+    """
+    existing_paths = existing_paths if existing_paths is not None else set()
+    concurrency = max(1, concurrency or PIPELINE_FILE_CONCURRENCY)
+    total = len(files) if hasattr(files, "__len__") else None
+    results = []
+    processed = 0
+    
+    sink = getattr(_log_context, "sink", None)
+    
+    def run_one(idx, file_info):
+        _notify(progress, "file_started", {"position": idx, "file_name": file_info.get('name')})
+        result = _process_file_logged(idx + 1, total, file_info, ctx, sink=sink)
+        _notify(progress, "file_finished", {"position": idx, "result": result})
+        return result
+    
+    pool = None
+    futures = {}
+    try:
+        for idx, file_info in enumerate(files):
+            file_name = file_info.get('name')
+            file_path = f"{ctx['profile_id']}/{ctx['folder_type']}/{file_name}"
+            results.append(None)
             
             # Skip if already processed
             if file_path in existing_paths:
-                log_step("Status", "info", "Already processed (skipping)")
-                results.append({
+                log_step("Status", "info", f"{file_name}: already processed (skipping)")
+                results[idx] = {
                     "file_name": file_name,
                     "status": "skipped",
                     "message": "Already processed"
-                })
-                skipped += 1
+                }
+                _notify(progress, "file_finished", {"position": idx, "result": results[idx]})
                 continue
             
-            log_step("Processing", "start", file_name)
+            processed += 1
+            if concurrency == 1:
+                results[idx] = run_one(idx, file_info)
+                continue
             
-            try:
-                # Get file bytes
-                log_step("Fetch", "start", "Loading from Supabase")
-                file_bytes = sb.get_file_bytes(file_path)
-                log_step("Fetched", "success", f"{len(file_bytes)} bytes")
-                
-                # Extract text
-                file_ext = os.path.splitext(file_name)[1]
-                log_step("OCR", "start")
-                
-                extracted_text = extract_text_from_bytes(file_bytes, file_ext)
-                
-                if not extracted_text or len(extracted_text.strip()) < 50:
-                    raise Exception(f"Insufficient text extracted: {len(extracted_text.strip())} chars")
-                
-                log_step("Extracted", "success", f"{len(extracted_text)} chars")
-                
-                # Extract metadata
-                log_step("Metadata", "start")
-                metadata = extract_metadata_with_llm(extracted_text, file_name)
-                
-                report_patient_name = metadata.get('patient_name')
-                age = metadata.get('age')
-                gender = metadata.get('gender')
-                report_date = metadata.get('report_date')
-                report_type = metadata.get('report_type')
-                doctor_name = metadata.get('doctor_name')
-                hospital_name = metadata.get('hospital_name')
-                
-                log_step("Metadata", "success", 
-                        f"Patient: {report_patient_name}, Age: {age}, Type: {report_type}")
-                
-                # IMPROVED Name verification with better fallback
-                name_match_status = 'pending'
-                name_match_confidence = 0.0
-                
-                # Try to extract patient name from report text if metadata extraction failed
-                if not report_patient_name or report_patient_name.lower() in ['unknown', 'patient', 'name', 'sex', 'age', 'none']:
-                    log_step("Name extraction", "warning", "Metadata extraction failed, trying text patterns...")
-                    
-                    # Look for patterns like "MR. VEDANT DHOKE" or "Patient: Vedant Dhoke"
-                    import re
-                    name_patterns = [
-                        r"(?:MR\.|MRS\.|MS\.|DR\.)\s+([A-Z]+(?:\s+[A-Z]+)+)",
-                        r"Patient\s*Name\s*:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
-                        r"Name\s*:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
-                    ]
-                    
-                    for pattern in name_patterns:
-                        match = re.search(pattern, extracted_text[:500], re.IGNORECASE)
-                        if match:
-                            report_patient_name = match.group(1).strip()
-                            log_step("Name extraction", "success", f"Found from text: {report_patient_name}")
-                            break
-                
-                # Now do the verification
-                if report_patient_name and report_patient_name.lower() not in ['unknown', 'patient', 'name', 'sex', 'age', 'none']:
-                    similarity = calculate_name_similarity(report_patient_name, user_display_name)
-                    name_match_confidence = similarity
-                    
-                    if similarity >= 0.7:
-                        name_match_status = 'matched'
-                        matched_reports += 1
-                        log_step("Name verification", "success", f"MATCH: {similarity:.2f} - '{report_patient_name}' vs '{user_display_name}'")
-                    elif similarity >= 0.4:
-                        # PARTIAL MATCH: Still include in summary but with lower confidence
-                        name_match_status = 'matched'  # Include partial matches
-                        matched_reports += 1
-                        log_step("Name verification", "warning", 
-                                f"PARTIAL MATCH: {similarity:.2f} - '{report_patient_name}' vs '{user_display_name}' (including in summary)")
-                    else:
-                        name_match_status = 'mismatched'
-                        mismatched_reports += 1
-                        log_step("Name verification", "warning", 
-                                f"MISMATCH: {similarity:.2f} - Report '{report_patient_name}' vs User '{user_display_name}'")
-                else:
-                    # NO NAME FOUND: Check if display_name appears in the file name
-                    log_step("Name verification", "warning", "No patient name found in text")
-                    
-                    file_name_lower = file_name.lower()
-                    user_name_parts = user_display_name.lower().split()
-                    
-                    # If user's name (or any part) is in the filename, assume it's theirs
-                    name_in_filename = any(part in file_name_lower for part in user_name_parts if len(part) > 2)
-                    
-                    if name_in_filename:
-                        name_match_status = 'matched'
-                        name_match_confidence = 0.6
-                        matched_reports += 1
-                        log_step("Name verification", "success", f"FILENAME MATCH: User name '{user_display_name}' found in filename (including in summary)")
-                    else:
-                        log_step("Name verification", "info", "Patient name unclear and not in filename - marked as pending")
-                
-                # Save to database
-                log_step("Saving", "start")
-                record_id = sb.save_extracted_data(
-                    profile_id=profile_id,
-                    file_path=file_path,
-                    file_name=file_name,
-                    folder_type=folder_type,
-                    extracted_text=extracted_text,
-                    patient_name=report_patient_name,
-                    report_date=report_date,
-                    age=age,
-                    gender=gender,
-                    report_type=report_type,
-                    doctor_name=doctor_name,
-                    hospital_name=hospital_name,
-                    name_match_status=name_match_status,
-                    name_match_confidence=name_match_confidence
-                )
-                
-                log_step("Saved", "success", f"ID: {record_id}")
-                
-                results.append({
-                    "file_name": file_name,
-                    "status": "success",
-                    "record_id": record_id,
-                    "folder_type": folder_type,
-                    "patient_name": report_patient_name,
-                    "report_date": report_date,
-                    "report_type": report_type,
-                    "text_length": len(extracted_text),
-                    "name_match_status": name_match_status,
-                    "name_match_confidence": name_match_confidence
-                })
-                successful += 1
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="process-file")
+            futures[pool.submit(run_one, idx, file_info)] = idx
+        
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    finally:
+        # On a listing error, files already started still finish
+        if pool is not None:
+            pool.shutdown(wait=True)
+    
+    log_step("Pipeline", "info",
+            f"{processed} processed, {len(results) - processed} skipped, {concurrency} at a time")
+    
+    return results
+
+
+# ============================================
+# PROCESS FILES
+# ============================================
+
+# Run /api/process-files as a background job unless the request says otherwise
+PROCESS_FILES_ASYNC = os.getenv("PROCESS_FILES_ASYNC", "false").lower() in ("1", "true", "yes")
+
+
+def run_process_files(profile_id: str, folder_type: str = "reports", progress=None,
+                      reprocess_since: str = None, full_ocr: bool = False,
+                      redone_files: list = None) -> tuple:
+    """
+    Sync one profile folder: process new and replaced files, drop orphaned records
+    
+    Files start processing as soon as their listing page arrives. Shared by
+    the synchronous endpoint and the job worker.
+    
+    Args:
+        profile_id: Profile whose folder to process
+        folder_type: Storage folder
+        progress: Optional callback(event, data); "files_listed" {"files": [names],
+            "offset": position of the first} is sent per listing page, before
+            those files start, then see run_file_pipeline
+        reprocess_since: ISO timestamp for backfills; already processed files
+            are processed again unless they were saved at or after it, and
+            checkpoints from before it are not resumed from
+        redone_files: With reprocess_since, file names the caller knows were
+            already redone (saved checkpoints are pruned after
+            PIPELINE_CHECKPOINT_TTL_HOURS, so a long backfill keeps its own list)
+        full_ocr: Also run full OCR on reports saved from the header pass
+            alone (someone else's report); without it, and unless
+            OCR_HEADER_ONLY_RECHECK is set, they are only redone when their
+            patient no longer mismatches the profile's display name
+    
+    Returns:
+        (response body dict, HTTP status code)
+    """
+    log_step("Config", "info", f"Profile: {profile_id}, Folder: {folder_type}")
+    
+    # Get profile info
+    log_step("Fetching profile info", "start")
+    user_info = get_profile_info(profile_id)
+    
+    if not user_info:
+        return {
+            "success": False,
+            "error": "Profile not found",
+            "message": "Selected profile does not exist"
+        }, 404
+
+    if not user_info.get('display_name'):
+        log_step("Profile info", "warning", "No display_name found")
+        return {
+            "success": False,
+            "error": "Profile display name not found",
+            "message": "Please set your display name in your profile first"
+        }, 400
+    
+    user_display_name = user_info.get('display_name')
+    log_step("Profile info", "success", f"User: {user_display_name}")
+    
+    # Drop checkpoints of files abandoned long ago
+    pipeline_state.prune_checkpoints()
+    
+    # Get existing processed reports
+    log_step("Checking processed", "start")
+    existing_records = sb.get_processed_reports(profile_id, folder_type, columns=sb.RECONCILE_COLUMNS,
+                                                statuses=sb.RECONCILE_STATUSES)
+    records_by_path = {r['file_path']: r for r in existing_records}
+    
+    # Processed files are skipped unless the listing shows they were replaced
+    # (size / etag / updated_at), or only their header was read and full OCR
+    # is due; those are dropped from the set as their page arrives
+    existing_paths = set(records_by_path)
+    changed_paths = set()
+    header_only_paths = set()
+    if reprocess_since:
+        # Backfill: only files already redone by this backfill count as processed
+        existing_paths = pipeline_state.saved_paths(f"{profile_id}/{folder_type}/", reprocess_since)
+        existing_paths.update(f"{profile_id}/{folder_type}/{name}" for name in redone_files or ())
+        log_step("Reprocessing", "info",
+                f"{len(records_by_path)} processed files, {len(existing_paths)} already redone")
+    
+    # Reports are upserted REPORT_UPSERT_BATCH_SIZE at a time, not one per file
+    report_batch = new_report_batch()
+    ctx = {
+        "profile_id": profile_id,
+        "folder_type": folder_type,
+        "user_display_name": user_display_name,
+        "report_batch": report_batch,
+        "checkpoints_since": reprocess_since,
+        "full_ocr_paths": header_only_paths
+    }
+    
+    files = []
+    listing = {"error": None}
+    
+    def listed_files():
+        """Storage pages as they arrive; the pipeline starts on page one while later pages list"""
+        try:
+            for page in sb.iter_user_file_pages(profile_id, folder_type):
+                to_fetch = []
+                for file_info in page:
+                    path = f"{profile_id}/{folder_type}/{file_info.get('name')}"
+                    record = records_by_path.get(path)
+                    if record and sb.source_changed(record, sb.storage_fingerprint(file_info)):
+                        changed_paths.add(path)
+                        existing_paths.discard(path)
+                    elif (record and record.get('processing_status') == sb.HEADER_ONLY_STATUS
+                          and (full_ocr or OCR_HEADER_ONLY_RECHECK
+                               or header_match_changed(record, user_display_name))):
+                        header_only_paths.add(path)
+                        existing_paths.discard(path)
+                    if path not in existing_paths:
+                        to_fetch.append(path)
                 
-            except Exception as e:
-                log_step("Failed", "error", f"{file_name}: {str(e)}")
-                traceback.print_exc()
+                # Sign the page's download URLs in one Storage call instead of one per file
+                if to_fetch:
+                    try:
+                        sb.create_signed_urls(to_fetch)
+                    except Exception as e:
+                        log_step("Signed URLs", "warning", f"Bulk signing failed, signing per file: {e}")
                 
-                results.append({
-                    "file_name": file_name,
-                    "status": "failed",
-                    "error": str(e)
+                log_step("Files page", "info", f"{len(page)} files, {len(to_fetch)} to process")
+                _notify(progress, "files_listed", {
+                    "files": [f.get('name') for f in page],
+                    "offset": len(files)
                 })
-                failed += 1
+                files.extend(page)
+                yield from page
+            
+            # Listing is done; files from the last pages may still be processing
+            if files:
+                log_step("Files found", "success", f"{len(files)} files")
+        except Exception as e:
+            listing["error"] = str(e)
+            log_step("Listing", "error", f"Stopped after {len(files)} files: {e}")
+    
+    # Get files from storage and process new ones as they are listed
+    log_step("Fetching files", "start")
+    results = run_file_pipeline(listed_files(), ctx, existing_paths=existing_paths, progress=progress)
+    flush_reports(report_batch)
+    apply_save_outcomes(results, report_batch, ctx, progress)
+    
+    if listing["error"] and not files:
+        return {
+            "success": False,
+            "error": f"Could not list files: {listing['error']}"
+        }, 502
+    
+    if not files:
+        log_step("Files", "warning", "No files in storage")
         
-        # Clear cache
-        if deleted_count > 0 or successful > 0:
-            log_step("Clearing cache", "start")
-            try:
-                cache_cleared = sb.clear_user_cache(profile_id)
-                log_step("Cache cleared", "success", f"{cache_cleared} entries")
-            except Exception as e:
-                log_step("Cache clear failed", "error", str(e))
+        # Clean up orphaned records
+        try:
+            query = sb.supabase.table('medical_reports_processed').delete().eq('profile_id', profile_id)
+            if folder_type:
+                query = query.eq('folder_type', folder_type)
+            result = query.execute()
+            
+            deleted = len(result.data) if result.data else 0
+            log_step("Cleanup", "success", f"Deleted {deleted} orphaned records")
+        except Exception as e:
+            log_step("Cleanup", "error", str(e))
         
-        # Summary
-        print(f"\n{'='*80}", flush=True)
-        log_step("COMPLETE", "success")
-        print(f"{'='*80}", flush=True)
-        print(f"  User: {user_display_name}", flush=True)
-        print(f"  Total: {len(files)}", flush=True)
-        print(f"  ✅ Processed: {successful}", flush=True)
-        print(f"  ⏭️  Skipped: {skipped}", flush=True)
-        print(f"  🗑️  Deleted: {deleted_count}", flush=True)
-        print(f"  ❌ Failed: {failed}", flush=True)
-        print(f"  ✅ Matched: {matched_reports}", flush=True)
-        print(f"  ⚠️  Mismatched: {mismatched_reports}", flush=True)
-        print(f"{'='*80}\n", flush=True)
+        return {
+            "success": False,
+            "error": "No files found for this profile"
+        }, 404
+    
+    if changed_paths:
+        log_step("Changed files", "info", f"{len(changed_paths)} replaced since last processed")
+    if header_only_paths:
+        log_step("Header-only files", "info", f"{len(header_only_paths)} finished with full OCR")
+    
+    # Delete orphaned records (one request per batch of IDs), only against a
+    # complete listing
+    deleted_count = 0
+    if listing["error"]:
+        log_step("Orphan cleanup", "warning", "Skipped - storage listing incomplete")
+    else:
+        reconciliation = sb.reconcile_orphaned_reports(
+            profile_id, folder_type, storage_files=files, existing_records=existing_records
+        )
+        deleted_count = reconciliation["deleted"]
         
-        return jsonify({
-            "success": True,
-            "message": f"Processed {successful} files, skipped {skipped}",
-            "profile_id": profile_id,
-            "processed_count": successful,
-            "skipped_count": skipped,
-            "deleted_count": deleted_count,
-            "failed_count": failed,
-            "total_files": len(files),
-            "matched_reports": matched_reports,
-            "mismatched_reports": mismatched_reports,
-            "results": results,
-            "user_display_name": user_display_name
-        }), 200
+        if reconciliation["orphaned"]:
+            log_step("Removed orphaned", "warning" if reconciliation["errors"] else "success",
+                    f"{deleted_count}/{len(reconciliation['orphaned'])} records")
+            for error in reconciliation["errors"]:
+                log_step("Delete failed", "error", f"{len(error['ids'])} records: {error['error']}")
+    
+    successful = sum(1 for r in results if r["status"] == "success")
+    failed = sum(1 for r in results if r["status"] == "failed")
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    matched_reports = sum(1 for r in results if r.get("name_match_status") == "matched")
+    mismatched_reports = sum(1 for r in results if r.get("name_match_status") == "mismatched")
+    
+    # Clear cache
+    if deleted_count > 0 or successful > 0:
+        log_step("Clearing cache", "start")
+        try:
+            cache_cleared = sb.clear_user_cache(profile_id)
+            log_step("Cache cleared", "success", f"{cache_cleared} entries")
+        except Exception as e:
+            log_step("Cache clear failed", "error", str(e))
+    
+    # Summary
+    print(f"\n{'='*80}", flush=True)
+    log_step("COMPLETE", "success")
+    print(f"{'='*80}", flush=True)
+    print(f"  User: {user_display_name}", flush=True)
+    print(f"  Total: {len(files)}", flush=True)
+    print(f"  ✅ Processed: {successful}", flush=True)
+    print(f"  ⏭️  Skipped: {skipped}", flush=True)
+    print(f"  🗑️  Deleted: {deleted_count}", flush=True)
+    print(f"  🔁 Changed: {len(changed_paths)}", flush=True)
+    print(f"  ❌ Failed: {failed}", flush=True)
+    print(f"  ✅ Matched: {matched_reports}", flush=True)
+    print(f"  ⚠️  Mismatched: {mismatched_reports}", flush=True)
+    print(f"{'='*80}\n", flush=True)
+    
+    return {
+        "success": True,
+        "message": f"Processed {successful} files, skipped {skipped}",
+        "profile_id": profile_id,
+        "processed_count": successful,
+        "skipped_count": skipped,
+        "deleted_count": deleted_count,
+        "changed_count": len(changed_paths),
+        "failed_count": failed,
+        "total_files": len(files),
+        "listing_complete": listing["error"] is None,
+        "listing_error": listing["error"],
+        "matched_reports": matched_reports,
+        "mismatched_reports": mismatched_reports,
+        "results": results,
+        "user_display_name": user_display_name
+    }, 200
+
+
+@app.route("/api/process-files", methods=["POST"])
+def process_files():
+    """
+    Process user files with name matching
+    
+    With {"async": true} (or PROCESS_FILES_ASYNC) the request is queued for
+    job_worker.py and answered with 202 and a job id; a job already queued or
+    running for the same profile/folder is returned instead of a new one.
+    When no worker has been seen for JOB_WORKER_TIMEOUT_SECONDS the request
+    is processed synchronously instead of waiting in the queue forever.
+    {"full_ocr": true} also finishes reports saved from the header pass alone.
+    """
+    print("\n" + "="*80, flush=True)
+    log_step("PROCESS FILES", "start")
+    print("="*80, flush=True)
+    
+    try:
+        data = request.get_json()
+        
+        profile_id = resolve_profile_id(data)
+        if not profile_id:
+            return jsonify({
+                "success": False,
+                "error": "profile_id is required"
+            }), 400
+
+        folder_type = data.get("folder_type", "reports")
+        full_ocr = bool(data.get("full_ocr", False))
+        
+        run_async = data.get("async", PROCESS_FILES_ASYNC)
+        if run_async and not job_queue.live_workers():
+            log_step("Job", "warning",
+                    f"No job worker seen in {job_queue.JOB_WORKER_TIMEOUT_SECONDS}s - processing now")
+            run_async = False
+        
+        if run_async:
+            job, created = job_queue.enqueue_job(
+                "process_files", profile_id, folder_type,
+                payload={"profile_id": profile_id, "folder_type": folder_type, "full_ocr": full_ocr}
+            )
+            log_step("Job", "success" if created else "info",
+                    f"{job['id']} {'queued' if created else 'already ' + job['status']}")
+            
+            return jsonify({
+                "success": True,
+                "job_id": job["id"],
+                "status": job["status"],
+                "deduplicated": not created,
+                "status_url": f"/api/jobs/{job['id']}",
+                "files_url": f"/api/jobs/{job['id']}/files"
+            }), 202
+        
+        body, status = run_process_files(profile_id, folder_type, full_ocr=full_ocr)
+        return jsonify(body), status
         
     except Exception as e:
         log_step("FATAL ERROR", "error", str(e))
@@ -589,19 +1201,50 @@ def process_files():
         }), 500
 
 
+def _as_bool(value, default: bool) -> bool:
+    """JSON booleans or query-string flags ("true", "0", ...)"""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+@app.route("/api/process-files/stream", methods=["GET", "POST"])
+def process_files_stream():
+    """
+    /api/process-files as a server-sent event stream
+    
+    Accepts the JSON body, or query parameters for EventSource clients.
+    Streams "files_listed", "file_started" and "file_finished" events, per-file
+    "stage" events (fetched, ocr_done, metadata_done, saved, failed), and a
+    final "result".
+    """
+    data = request.get_json(silent=True) or request.args.to_dict()
+    
+    profile_id = resolve_profile_id(data)
+    if not profile_id:
+        return jsonify({
+            "success": False,
+            "error": "profile_id is required"
+        }), 400
+    
+    log_step("PROCESS FILES (STREAM)", "start", profile_id)
+    return stream_progress(run_process_files, profile_id, data.get("folder_type", "reports"),
+                           forward_progress=True)
+
+
 # ============================================
-# GENERATE SUMMARY (SMART FILTERING + WARNINGS)
+# RECONCILE
 # ============================================
 
-@app.route("/api/generate-summary", methods=["POST"])
-def generate_summary():
-    """Generate summary for matched reports + show warnings for mismatched"""
-    print("\n" + "="*80, flush=True)
-    log_step("GENERATE SUMMARY (SMART FILTERING)", "start")
-    print("="*80, flush=True)
-    
-    temp_dir = tempfile.mkdtemp(prefix="rag_")
+@app.route("/api/reconcile", methods=["POST"])
+def reconcile_reports():
+    """
+    Diff processed records against storage; delete orphans unless dry_run
     
+    dry_run defaults to true, so the call only reports what would change.
+    """
     try:
         data = request.get_json()
         
@@ -611,9 +1254,104 @@ def generate_summary():
                 "success": False,
                 "error": "profile_id is required"
             }), 400
+        
+        folder_type = data.get("folder_type", "reports")
+        dry_run = _as_bool(data.get("dry_run"), True)
+        
+        log_step("Reconcile", "start", f"Profile: {profile_id}, Folder: {folder_type}, dry_run={dry_run}")
+        diff = sb.reconcile_orphaned_reports(profile_id, folder_type, dry_run=dry_run)
+        
+        if diff["deleted"] > 0:
+            sb.clear_user_cache(profile_id)
+        
+        return jsonify({
+            "success": not diff["errors"],
+            "profile_id": profile_id,
+            "folder_type": folder_type,
+            "dry_run": dry_run,
+            "orphaned": [
+                {"id": r['id'], "file_name": r.get('file_name'), "file_path": r['file_path']}
+                for r in diff["orphaned"]
+            ],
+            "new_files": diff["new_paths"],
+            "changed_files": diff["changed_paths"],
+            "kept_count": diff["kept"],
+            "deleted_count": diff["deleted"],
+            "errors": diff["errors"]
+        }), 200
+        
+    except Exception as e:
+        log_step("Reconcile", "error", str(e))
+        traceback.print_exc()
+        
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ============================================
+# JOB STATUS
+# ============================================
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job_status(job_id):
+    """Status of a queued process-files job (result included once finished)"""
+    job = job_queue.get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    
+    return jsonify({
+        "success": True,
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "profile_id": job["profile_id"],
+        "folder_type": job["folder_type"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"],
+        "files": job_queue.file_status_counts(job_id),
+        "result": job["result"]
+    }), 200
+
+
+@app.route("/api/jobs/<job_id>/files", methods=["GET"])
+def get_job_file_status(job_id):
+    """Per-file status of a process-files job"""
+    job = job_queue.get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    
+    files = job_queue.get_job_files(job_id)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": job["status"],
+        "count": len(files),
+        "files": files
+    }), 200
+
+
+# ============================================
+# GENERATE SUMMARY (SMART FILTERING + WARNINGS)
+# ============================================
 
-        use_cache = data.get("use_cache", True)
-        force_regenerate = data.get("force_regenerate", False)
+def run_generate_summary(profile_id: str, use_cache: bool = True,
+                         force_regenerate: bool = False) -> tuple:
+    """
+    Summarise a profile's matched reports, with warnings for mismatched ones
+    
+    Shared by /api/generate-summary and its event stream.
+    
+    Returns:
+        (response body dict, HTTP status code)
+    """
+    temp_dir = tempfile.mkdtemp(prefix="rag_")
+    
+    try:
         folder_type = 'reports'
         
         log_step("Config", "info", f"Profile: {profile_id}, Folder: {folder_type}")
@@ -624,18 +1362,18 @@ def generate_summary():
         user_info = get_profile_info(profile_id)
         
         if not user_info:
-            return jsonify({
+            return {
                 "success": False,
                 "error": "Profile not found",
                 "message": "Selected profile does not exist"
-            }), 404
+            }, 404
 
         if not user_info.get('display_name'):
-            return jsonify({
+            return {
                 "success": False,
                 "error": "Profile display name not found",
                 "message": "Please set your display name in your profile first"
-            }), 400
+            }, 400
         
         user_display_name = user_info.get('display_name')
         log_step("Profile info", "success", f"User: {user_display_name}")
@@ -646,11 +1384,11 @@ def generate_summary():
         
         if not all_reports:
             log_step("Reports", "error", "No reports found")
-            return jsonify({
+            return {
                 "success": False,
                 "error": "No medical reports found",
                 "message": "Please upload and process medical reports first"
-            }), 404
+            }, 404
         
         log_step("Reports found", "success", f"{len(all_reports)} total reports")
         
@@ -699,7 +1437,7 @@ def generate_summary():
             warning_msg += "3. **Filename matching**: Include your name in the filename (e.g., `vedant_blood_test.pdf`)\n\n"
             warning_msg += "4. **Manual verification**: The system couldn't automatically match these reports to you\n"
             
-            return jsonify({
+            return {
                 "success": False,
                 "error": "Name of the Reports does not match the name assocated with this Profile",
                 "message": warning_msg,
@@ -721,7 +1459,7 @@ def generate_summary():
                     }
                     for r in pending_reports
                 ]
-            }), 404
+            }, 404
         
         # Use ONLY matched reports for summary
         reports = matched_reports
@@ -747,7 +1485,7 @@ def generate_summary():
                 
                 if not summary_text.startswith('❌') and len(summary_text) > 100:
                     log_step("Cache", "success", "Using cached summary (with warnings)")
-                    return jsonify({
+                    return {
                         "success": True,
                         "summary": summary_text,
                         "report_count": len(reports),
@@ -757,7 +1495,7 @@ def generate_summary():
                         "generated_at": cached.get('generated_at'),
                         "model": "gpt-4.1-nano",
                         "user_display_name": user_display_name
-                    }), 200
+                    }, 200
             
             log_step("Cache", "info", "Cache miss - generating new summary")
         
@@ -775,6 +1513,14 @@ def generate_summary():
             cleaned = clean_text(extracted)
             chunks = chunk_text(cleaned, max_words=500, overlap_words=100)
             
+            # Compact structured lab rows, when the report had parseable tables
+            lab_results = (report.get('structured_data_json') or {}).get('lab_results') or []
+            if lab_results:
+                chunks.append(
+                    f"Lab results ({report.get('file_name')}, {report.get('report_date') or 'date unknown'}):\n"
+                    + format_lab_results(lab_results)
+                )
+            
             print(f"  Report {idx}/{len(reports)}: {report.get('file_name')}", flush=True)
             print(f"    Patient: {report.get('patient_name')} ✅", flush=True)
             print(f"    {len(extracted)} chars → {len(cleaned)} cleaned → {len(chunks)} chunks", flush=True)
@@ -785,10 +1531,10 @@ def generate_summary():
         
         if not all_chunks:
             log_step("Chunks", "error", "No valid chunks created")
-            return jsonify({
+            return {
                 "success": False,
                 "error": "Could not create chunks from reports"
-            }), 500
+            }, 500
         
         # Build FAISS index
         log_step("Building index", "start")
@@ -799,10 +1545,10 @@ def generate_summary():
         except Exception as e:
             log_step("Index", "error", str(e))
             traceback.print_exc()
-            return jsonify({
+            return {
                 "success": False,
                 "error": f"Failed to build search index: {str(e)}"
-            }), 500
+            }, 500
         
         # Generate summary
         log_step("Generating summary", "start")
@@ -825,10 +1571,10 @@ def generate_summary():
             
             if summary.startswith("❌"):
                 log_step("Summary", "error", summary)
-                return jsonify({
+                return {
                     "success": False,
                     "error": summary
-                }), 500
+                }, 500
             
             log_step("Summary", "success", f"{len(summary)} chars")
             
@@ -841,10 +1587,10 @@ def generate_summary():
         except Exception as e:
             log_step("Summary", "error", str(e))
             traceback.print_exc()
-            return jsonify({
+            return {
                 "success": False,
                 "error": f"Failed to generate summary: {str(e)}"
-            }), 500
+            }, 500
         
         # Cache summary (with warnings included)
         log_step("Caching", "start")
@@ -871,7 +1617,7 @@ def generate_summary():
         print(f"  Model: gpt-4.1-nano", flush=True)
         print(f"{'='*80}\n", flush=True)
         
-        return jsonify({
+        return {
             "success": True,
             "summary": summary,
             "profile_id": profile_id,
@@ -881,17 +1627,17 @@ def generate_summary():
             "user_display_name": user_display_name,
             "cached": False,
             "model": "gpt-4.1-nano"
-        }), 200
+        }, 200
         
     except Exception as e:
         log_step("FATAL ERROR", "error", str(e))
         traceback.print_exc()
         
-        return jsonify({
+        return {
             "success": False,
             "error": str(e),
             "traceback": traceback.format_exc()
-        }), 500
+        }, 500
     
     finally:
         try:
@@ -902,6 +1648,56 @@ def generate_summary():
             log_step("Cleanup", "warning", f"Failed to clean temp dir: {e}")
 
 
+@app.route("/api/generate-summary", methods=["POST"])
+def generate_summary():
+    """Generate summary for matched reports + show warnings for mismatched"""
+    print("\n" + "="*80, flush=True)
+    log_step("GENERATE SUMMARY (SMART FILTERING)", "start")
+    print("="*80, flush=True)
+    
+    data = request.get_json()
+    
+    profile_id = resolve_profile_id(data)
+    if not profile_id:
+        return jsonify({
+            "success": False,
+            "error": "profile_id is required"
+        }), 400
+    
+    body, status = run_generate_summary(
+        profile_id,
+        use_cache=data.get("use_cache", True),
+        force_regenerate=data.get("force_regenerate", False)
+    )
+    return jsonify(body), status
+
+
+@app.route("/api/generate-summary/stream", methods=["GET", "POST"])
+def generate_summary_stream():
+    """
+    /api/generate-summary as a server-sent event stream
+    
+    Streams "stage" events (reports_loaded, cache_hit, chunked, indexed,
+    summary_generated, summary_cached, complete) and a final "result".
+    """
+    data = request.get_json(silent=True) or request.args.to_dict()
+    
+    profile_id = resolve_profile_id(data)
+    if not profile_id:
+        return jsonify({
+            "success": False,
+            "error": "profile_id is required"
+        }), 400
+    
+    log_step("GENERATE SUMMARY (STREAM)", "start", profile_id)
+    return stream_progress(
+        run_generate_summary,
+        profile_id,
+        use_cache=_as_bool(data.get("use_cache"), True),
+        force_regenerate=_as_bool(data.get("force_regenerate"), False)
+    )
+
+
 def build_mismatch_warning(mismatched_reports: list, user_display_name: str) -> str:
     """Build a user-friendly warning about mismatched reports"""
     
@@ -972,6 +1768,13 @@ def health_check():
             "openai": openai_ok,
             "model": "gpt-4.1-nano",
             "mode": "smart_filtering_with_warnings",
+            "ocr_cache": ocr_cache.cache_stats(),
+            "extraction": {
+                "policy": extraction.EXTRACTION_POLICY,
+                "engines": extraction.engine_info()
+            },
+            "pipeline_stages": pipeline_state.stage_stats(),
+            "storage_downloads": sb.download_stats(),
             "timestamp": datetime.now().isoformat()
         }), 200
         
@@ -1086,7 +1889,9 @@ def clear_user_data(profile_id):
     
     try:
         deleted = sb.clear_user_data(profile_id)
-        log_step("Data cleared", "success", f"{deleted} records")
+        # Checkpoints hold extracted text of unfinished files
+        checkpoints = pipeline_state.clear_profile(profile_id)
+        log_step("Data cleared", "success", f"{deleted} records, {checkpoints} checkpoints")
         
         return jsonify({
             "success": True,
@@ -1182,7 +1987,12 @@ if __name__ == "__main__":
     print("\n📡 Endpoints:", flush=True)
     print("  GET    /api/health", flush=True)
     print("  POST   /api/process-files", flush=True)
+    print("  GET    /api/process-files/stream", flush=True)
+    print("  POST   /api/reconcile", flush=True)
+    print("  GET    /api/jobs/<job_id>", flush=True)
+    print("  GET    /api/jobs/<job_id>/files", flush=True)
     print("  POST   /api/generate-summary", flush=True)
+    print("  GET    /api/generate-summary/stream", flush=True)
     print("  GET    /api/reports/<profile_id>", flush=True)
     print("  DELETE /api/clear-cache/<profile_id>", flush=True)
     print("  DELETE /api/clear/<profile_id>", flush=True)
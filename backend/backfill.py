@@ -0,0 +1,355 @@
+# backend/backfill.py
+
+"""
+Reprocess every profile's reports after an extractor or prompt change
+
+Profiles are sharded across a process pool; each worker runs the same
+pipeline as /api/process-files (run_process_files) in-process. Progress is
+written to a state file after every profile, so an interrupted backfill
+picks up where it stopped with --resume:
+
+    python backfill.py --processes 4 --files-per-minute 120
+    python backfill.py --resume
+    python backfill.py --profiles id1,id2 --new-only
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+BACKFILL_PROCESSES = int(os.getenv("BACKFILL_PROCESSES", "2"))
+# Files started per minute across all processes (0 = unlimited)
+BACKFILL_FILES_PER_MINUTE = float(os.getenv("BACKFILL_FILES_PER_MINUTE", "0"))
+BACKFILL_STATE_PATH = os.getenv(
+    "BACKFILL_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs", "backfill_state.json")
+)
+# Failed files listed per profile in the state file
+BACKFILL_MAX_FAILURES_KEPT = 20
+
+USAGE_FIELDS = ("calls", "failed_calls", "prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ============================================
+# STATE FILE
+# ============================================
+
+def load_state(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: dict):
+    """Write atomically, so a crash mid-write keeps the previous state"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def new_state(folder_type: str, reprocess: bool) -> dict:
+    started = _now()
+    return {
+        "started_at": started,
+        # Files saved after this are not redone when the backfill resumes
+        "reprocess_since": started if reprocess else None,
+        "folder_type": folder_type,
+        "elapsed_seconds": 0.0,
+        "profiles": {}
+    }
+
+
+# ============================================
+# WORKER PROCESS
+# ============================================
+
+_rate_lock = threading.Lock()
+_rate = {"interval": 0.0, "next": 0.0}
+
+
+def _init_worker(files_per_minute: float, quiet: bool):
+    """Process pool initializer: per-process share of the rate limit"""
+    _rate["interval"] = 60.0 / files_per_minute if files_per_minute > 0 else 0.0
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+
+def _wait_for_slot():
+    """Block the calling pipeline thread until the next file may start"""
+    if not _rate["interval"]:
+        return
+    with _rate_lock:
+        now = time.monotonic()
+        start_at = max(now, _rate["next"])
+        _rate["next"] = start_at + _rate["interval"]
+    if start_at > now:
+        time.sleep(start_at - now)
+
+
+def _usage_delta(before: dict, after: dict) -> dict:
+    return {field: after.get(field, 0) - before.get(field, 0) for field in USAGE_FIELDS}
+
+
+def process_profile(profile_id: str, folder_type: str, reprocess_since: str = None,
+                    redone_files: list = None) -> dict:
+    """
+    Run the processing pipeline for one profile (in a worker process)
+
+    Args:
+        redone_files: Files an earlier attempt of this backfill already redone
+
+    Returns:
+        Profile summary for the state file: status ("done" or "failed"),
+        file counts, seconds, LLM usage, failed files and, when reprocessing,
+        the files redone so far ("redone_files")
+    """
+    # Imported here so the parent process never loads the API's clients
+    from app_api import run_process_files
+    from rag_pipeline.extract_metadata import llm_usage
+
+    def progress(event: str, data: dict):
+        if event == "file_started":
+            _wait_for_slot()
+
+    usage_before = llm_usage()
+    started = time.time()
+    summary = {"profile_id": profile_id, "pid": os.getpid(), "finished_at": None}
+
+    try:
+        body, status = run_process_files(profile_id, folder_type, progress=progress,
+                                         reprocess_since=reprocess_since,
+                                         redone_files=redone_files)
+        failures = [
+            {"file_name": r.get("file_name"), "error": r.get("error") or r.get("message")}
+            for r in body.get("results", []) if r.get("status") == "failed"
+        ]
+        summary.update({
+            # A missing folder is nothing to backfill, not a failure
+            "status": "done" if status in (200, 404) else "failed",
+            "http_status": status,
+            "error": body.get("error") if status != 200 else body.get("listing_error"),
+            "processed": body.get("processed_count", 0),
+            "skipped": body.get("skipped_count", 0),
+            "failed": body.get("failed_count", 0),
+            "total_files": body.get("total_files", 0),
+            "failures": failures[:BACKFILL_MAX_FAILURES_KEPT],
+        })
+        if reprocess_since:
+            # Kept here, not only as pipeline checkpoints: those are pruned
+            # after PIPELINE_CHECKPOINT_TTL_HOURS and a resume may come later.
+            # Skipped files are the ones already redone by this backfill.
+            summary["redone_files"] = sorted(
+                set(redone_files or ())
+                | {r["file_name"] for r in body.get("results", [])
+                   if r.get("status") in ("success", "skipped")}
+            )
+        # Files left behind (incomplete listing, failed files) are retried on
+        # resume; files already redone by this backfill are skipped then
+        if status == 200 and not body.get("listing_complete", True):
+            summary["status"] = "failed"
+        elif summary["failed"]:
+            summary["status"] = "failed"
+            summary["error"] = f"{summary['failed']} file(s) failed"
+    except Exception as e:
+        traceback.print_exc()
+        summary.update({"status": "failed", "error": str(e), "processed": 0, "skipped": 0,
+                        "failed": 0, "total_files": 0, "failures": []})
+
+    summary["seconds"] = round(time.time() - started, 2)
+    summary["llm"] = _usage_delta(usage_before, llm_usage())
+    summary["finished_at"] = _now()
+    return summary
+
+
+# ============================================
+# PARENT PROCESS
+# ============================================
+
+def merge_attempt(previous: dict, summary: dict) -> dict:
+    """Carry an earlier attempt's work into a retried profile's summary"""
+    if not previous:
+        summary["attempts"] = 1
+        return summary
+
+    summary["attempts"] = previous.get("attempts", 1) + 1
+    # A worker that died returns no file list; keep the earlier one
+    if "redone_files" in previous or "redone_files" in summary:
+        summary["redone_files"] = sorted(
+            set(previous.get("redone_files", ())) | set(summary.get("redone_files", ()))
+        )
+    # Files redone by the earlier attempt show up as skipped in the retry
+    summary["processed"] = summary.get("processed", 0) + previous.get("processed", 0)
+    summary["skipped"] = max(0, summary.get("skipped", 0) - previous.get("processed", 0))
+    summary["seconds"] = round(summary.get("seconds", 0) + previous.get("seconds", 0), 2)
+    summary["llm"] = {
+        field: (summary.get("llm") or {}).get(field, 0) + (previous.get("llm") or {}).get(field, 0)
+        for field in USAGE_FIELDS
+    }
+    return summary
+
+
+def enumerate_profiles(args) -> list:
+    """Profile IDs from --profiles / --profiles-file, or every profile in the database"""
+    if args.profiles:
+        return [p.strip() for p in args.profiles.split(",") if p.strip()]
+    if args.profiles_file:
+        with open(args.profiles_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    import supabase_helper as sb
+    return list(sb.iter_profile_ids())
+
+
+def throughput_report(state: dict) -> dict:
+    """Totals over every profile in the state file (all runs of this backfill)"""
+    profiles = list(state["profiles"].values())
+    minutes = state["elapsed_seconds"] / 60 if state["elapsed_seconds"] else 0
+    llm = {field: sum((p.get("llm") or {}).get(field, 0) for p in profiles) for field in USAGE_FIELDS}
+    processed = sum(p.get("processed", 0) for p in profiles)
+
+    return {
+        "profiles_done": sum(1 for p in profiles if p["status"] == "done"),
+        "profiles_failed": sum(1 for p in profiles if p["status"] == "failed"),
+        "files_processed": processed,
+        "files_skipped": sum(p.get("skipped", 0) for p in profiles),
+        "files_failed": sum(p.get("failed", 0) for p in profiles),
+        "elapsed_seconds": round(state["elapsed_seconds"], 1),
+        "files_per_minute": round(processed / minutes, 1) if minutes else 0.0,
+        "llm": llm,
+        "tokens_per_file": round(llm["total_tokens"] / processed, 1) if processed else 0.0,
+    }
+
+
+def print_report(state: dict):
+    report = throughput_report(state)
+    llm = report["llm"]
+
+    print(f"\n{'='*80}", flush=True)
+    print("📊 BACKFILL REPORT", flush=True)
+    print(f"{'='*80}", flush=True)
+    print(f"  Profiles: ✅ {report['profiles_done']} done, ❌ {report['profiles_failed']} failed", flush=True)
+    print(f"  Files: ✅ {report['files_processed']} processed, ⏭️  {report['files_skipped']} skipped, "
+          f"❌ {report['files_failed']} failed", flush=True)
+    print(f"  Elapsed: {report['elapsed_seconds']}s ({report['files_per_minute']} files/min)", flush=True)
+    print(f"  LLM: {llm['calls']} calls ({llm['failed_calls']} failed), {llm['total_tokens']} tokens "
+          f"({llm['prompt_tokens']} prompt / {llm['completion_tokens']} completion, "
+          f"{report['tokens_per_file']} per file)", flush=True)
+
+    failed_profiles = [p for p in state["profiles"].values() if p["status"] == "failed"]
+    for p in failed_profiles:
+        print(f"  ❌ Profile {p['profile_id']}: {p.get('error')}", flush=True)
+    for p in state["profiles"].values():
+        for failure in p.get("failures", []):
+            print(f"  ❌ {p['profile_id']}/{failure['file_name']}: {failure['error']}", flush=True)
+    print(f"{'='*80}\n", flush=True)
+
+
+def run_backfill(args) -> dict:
+    """Process every pending profile and keep the state file current"""
+    if args.resume:
+        state = load_state(args.state)
+        print(f"🔁 Resuming backfill started {state['started_at']}", flush=True)
+    else:
+        state = new_state(args.folder_type, reprocess=not args.new_only)
+
+    profiles = enumerate_profiles(args)
+    pending = [p for p in profiles if state["profiles"].get(p, {}).get("status") != "done"]
+    print(f"👥 {len(profiles)} profiles, {len(profiles) - len(pending)} already done, "
+          f"{len(pending)} to process with {args.processes} process(es)", flush=True)
+    save_state(args.state, state)
+    if not pending:
+        return state
+
+    processes = max(1, min(args.processes, len(pending)))
+    per_process_rate = args.files_per_minute / processes if args.files_per_minute > 0 else 0
+
+    # spawn: workers must not inherit the parent's threads and open connections
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(per_process_rate, args.quiet))
+    futures = {
+        pool.submit(process_profile, profile_id, state["folder_type"], state["reprocess_since"],
+                    state["profiles"].get(profile_id, {}).get("redone_files")): profile_id
+        for profile_id in pending
+    }
+
+    started = time.time()
+    elapsed_before = state["elapsed_seconds"]
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            profile_id = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                # The worker process died (e.g. out of memory)
+                summary = {"profile_id": profile_id, "status": "failed", "error": str(e),
+                           "processed": 0, "skipped": 0, "failed": 0, "failures": [],
+                           "finished_at": _now()}
+
+            state["profiles"][profile_id] = merge_attempt(state["profiles"].get(profile_id), summary)
+            state["elapsed_seconds"] = elapsed_before + time.time() - started
+            save_state(args.state, state)
+
+            icon = "✅" if summary["status"] == "done" else "❌"
+            print(f"{icon} [{done}/{len(pending)}] {profile_id}: {summary.get('processed', 0)} processed, "
+                  f"{summary.get('failed', 0)} failed in {summary.get('seconds', 0)}s"
+                  + (f" ({summary['error']})" if summary.get("error") else ""), flush=True)
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted - finished profiles are saved, rerun with --resume", flush=True)
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        state["elapsed_seconds"] = elapsed_before + time.time() - started
+        save_state(args.state, state)
+
+    return state
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Reprocess stored reports for many profiles")
+    parser.add_argument("--folder-type", default="reports", help="Storage folder to process")
+    parser.add_argument("--profiles", help="Comma-separated profile IDs (default: every profile)")
+    parser.add_argument("--profiles-file", help="File with one profile ID per line")
+    parser.add_argument("--processes", type=int, default=BACKFILL_PROCESSES,
+                        help="Profiles processed in parallel")
+    parser.add_argument("--files-per-minute", type=float, default=BACKFILL_FILES_PER_MINUTE,
+                        help="Files started per minute across all processes (0 = unlimited)")
+    parser.add_argument("--new-only", action="store_true",
+                        help="Only process new and replaced files instead of redoing every file")
+    parser.add_argument("--state", default=BACKFILL_STATE_PATH, help="Checkpoint file")
+    parser.add_argument("--resume", action="store_true", help="Continue the backfill in --state")
+    parser.add_argument("--restart", action="store_true", help="Discard the backfill in --state")
+    parser.add_argument("--quiet", action="store_true", help="Silence per-file logs from workers")
+    args = parser.parse_args(argv)
+
+    if args.resume and not os.path.exists(args.state):
+        parser.error(f"no backfill to resume at {args.state}")
+    if os.path.exists(args.state) and not (args.resume or args.restart):
+        parser.error(f"{args.state} holds an earlier backfill; pass --resume or --restart")
+
+    try:
+        state = run_backfill(args)
+    except KeyboardInterrupt:
+        state = load_state(args.state)
+        print_report(state)
+        sys.exit(130)
+
+    print_report(state)
+    if any(p["status"] == "failed" for p in state["profiles"].values()):
+        print(f"⚠️ Some profiles failed; rerun with --resume to retry them ({args.state})", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+# backend/benchmarks/ocr_benchmark.py
+
+"""
+OCR throughput and accuracy benchmark
+
+Generates synthetic lab reports (see synthetic_reports.py), runs them through
+the extraction paths and writes a JSON result file that can be diffed between
+runs.
+
+Each configuration runs in its own spawned process so peak RSS is measured
+per configuration and lazily loaded models do not leak between runs.
+The "bytes" configuration is the API path: extraction.extract_text with
+the "fast" policy.
+
+Usage (from backend/):
+    python -m benchmarks.ocr_benchmark
+    python -m benchmarks.ocr_benchmark --engines cascade,tesseract --preprocess adaptive,full
+    python -m benchmarks.ocr_benchmark --deskew on,off
+    python -m benchmarks.ocr_benchmark --compare benchmarks/results/previous.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import multiprocessing
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+# extract_text_universal engine settings: mode name -> (ocr_mode, engines)
+ENGINE_SETTINGS = {
+    "cascade": ("cascade", None),
+    "best": ("best", None),
+    "tesseract": ("best", ["tesseract"]),
+    "paddle": ("best", ["paddle"]),
+    "easyocr": ("best", ["easyocr"]),
+}
+PREPROCESS_SETTINGS = ["adaptive", "full", "none"]
+DESKEW_SETTINGS = ["on", "off"]
+
+
+# ============================================
+# METRICS
+# ============================================
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split()).lower()
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance with a two-row DP table"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def character_error_rate(hypothesis: str, reference: str) -> float:
+    """Levenshtein distance over reference length, on whitespace-normalized text"""
+    ref = _normalize(reference)
+    hyp = _normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    return round(levenshtein(hyp, ref) / len(ref), 4)
+
+
+def _peak_rss_mb(who) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ============================================
+# RUNNERS (executed inside a spawned worker)
+# ============================================
+
+def _run_config(config: dict, manifest_path: str) -> dict:
+    sys.path.insert(0, BACKEND_DIR)
+    # Read at import time by the OCR modules, which this fresh process has not loaded yet
+    os.environ["OCR_DESKEW"] = "true" if config.get("deskew", "on") == "on" else "false"
+
+    with open(manifest_path, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    load_started = time.perf_counter()
+    if config["extractor"] == "bytes":
+        from rag_pipeline.extraction import extract_text
+
+        def run(case, data):
+            return extract_text(data, case["ext"], policy="fast")
+    else:
+        from rag_pipeline import extractor_OCR
+
+        ocr_mode, engines = ENGINE_SETTINGS[config["engine"]]
+        warm = [e for e in (engines or ["paddle", "easyocr"]) if e in ("paddle", "easyocr")]
+        if warm:
+            extractor_OCR.warm_up_ocr_engines(warm)
+
+        def run(case, data):
+            return extractor_OCR.extract_text_universal(
+                case["path"],
+                use_preprocessing=config["preprocess"] != "none",
+                preprocess_mode=None if config["preprocess"] == "none" else config["preprocess"],
+                ocr_mode=ocr_mode,
+                engines=engines
+            )
+    load_seconds = time.perf_counter() - load_started
+
+    results = []
+    for case in cases:
+        with open(case["path"], "rb") as f:
+            data = f.read()
+
+        started = time.perf_counter()
+        try:
+            text = run(case, data)
+            error = None
+        except Exception as e:
+            text, error = "", str(e)
+        seconds = time.perf_counter() - started
+
+        results.append({
+            "case": case["name"],
+            "kind": case["kind"],
+            "pages": case["pages"],
+            "seconds": round(seconds, 3),
+            "pages_per_sec": round(case["pages"] / seconds, 3) if seconds > 0 else None,
+            "chars": len(text or ""),
+            "cer": character_error_rate(text, case["ground_truth"]),
+            "error": error
+        })
+
+    return {
+        "load_seconds": round(load_seconds, 3),
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "cases": results
+    }
+
+
+# ============================================
+# DRIVER
+# ============================================
+
+def _config_name(config: dict) -> str:
+    if config["extractor"] == "bytes":
+        name = "bytes"
+    else:
+        name = f"universal/{config['engine']}/{config['preprocess']}"
+    return name if config.get("deskew", "on") == "on" else f"{name}/no-deskew"
+
+
+def _summarize(cases: list) -> dict:
+    ok = [c for c in cases if not c["error"]]
+    pages = sum(c["pages"] for c in ok)
+    seconds = sum(c["seconds"] for c in ok)
+    by_kind = {}
+    for c in ok:
+        by_kind.setdefault(c["kind"], []).append(c["cer"])
+
+    return {
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages / seconds, 3) if seconds else None,
+        "mean_cer": round(sum(c["cer"] for c in ok) / len(ok), 4) if ok else None,
+        "cer_by_kind": {k: round(sum(v) / len(v), 4) for k, v in sorted(by_kind.items())},
+        "errors": len(cases) - len(ok)
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True,
+            stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def _previous_rss(previous: dict, config_name: str) -> float:
+    for run in previous.get("runs", []):
+        if run["config"] == config_name:
+            return run.get("peak_rss_mb") or 0.0
+    return 0.0
+
+
+def _print_comparison(current: dict, previous: dict):
+    before = {r["config"]: r["summary"] for r in previous.get("runs", []) if r.get("summary")}
+
+    print(f"\n{'='*80}")
+    print(f"COMPARISON vs {previous.get('git_commit') or 'previous run'}")
+    print(f"{'='*80}")
+    for run in current["runs"]:
+        old = before.get(run["config"])
+        new = run.get("summary")
+        if not old or not new:
+            continue
+        d_speed = (new["pages_per_sec"] or 0) - (old["pages_per_sec"] or 0)
+        d_cer = (new["mean_cer"] or 0) - (old["mean_cer"] or 0)
+        d_rss = run["peak_rss_mb"] - _previous_rss(previous, run["config"])
+        print(f"  {run['config']:<32} pages/s {d_speed:+.3f}   CER {d_cer:+.4f}   RSS {d_rss:+.1f} MB")
+
+
+def _print_deskew_effect(runs: list):
+    """Side-by-side timings for configurations run with and without deskew"""
+    by_name = {r["config"]: r for r in runs if r.get("summary")}
+    pairs = [(name, by_name[f"{name}/no-deskew"]) for name in by_name if f"{name}/no-deskew" in by_name]
+    if not pairs:
+        return
+
+    print(f"\n{'='*80}")
+    print("DESKEW ON vs OFF")
+    print(f"{'='*80}")
+    for name, off in pairs:
+        on = by_name[name]["summary"]
+        off = off["summary"]
+        print(f"  {name:<32} {on['seconds']:.2f}s vs {off['seconds']:.2f}s   "
+              f"CER {on['mean_cer']} vs {off['mean_cer']}")
+        for kind in on["cer_by_kind"]:
+            if kind in off["cer_by_kind"]:
+                print(f"    {kind:<30} CER {on['cer_by_kind'][kind]} vs {off['cer_by_kind'][kind]}")
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="OCR throughput and accuracy benchmark")
+    parser.add_argument("--count", type=int, default=2, help="Reports generated per kind")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--engines", default="cascade,best",
+                        help=f"extract_text_universal engine settings ({','.join(ENGINE_SETTINGS)})")
+    parser.add_argument("--preprocess", default="adaptive,full",
+                        help=f"Preprocessing settings ({','.join(PREPROCESS_SETTINGS)})")
+    parser.add_argument("--deskew", default="on",
+                        help=f"Orientation/skew correction settings ({','.join(DESKEW_SETTINGS)})")
+    parser.add_argument("--skip-bytes", action="store_true",
+                        help="Do not benchmark the API (fast policy) path")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/ocr-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result file to diff against")
+    args = parser.parse_args(argv)
+
+    from benchmarks.synthetic_reports import build_cases
+
+    deskew_settings = [d.strip() for d in args.deskew.split(",") if d.strip()]
+    for deskew in deskew_settings:
+        if deskew not in DESKEW_SETTINGS:
+            parser.error(f"Unknown deskew setting: {deskew}")
+
+    configs = []
+    for deskew in deskew_settings:
+        if not args.skip_bytes:
+            configs.append({"extractor": "bytes", "deskew": deskew})
+        for engine in [e.strip() for e in args.engines.split(",") if e.strip()]:
+            if engine not in ENGINE_SETTINGS:
+                parser.error(f"Unknown engine setting: {engine}")
+            for preprocess in [p.strip() for p in args.preprocess.split(",") if p.strip()]:
+                if preprocess not in PREPROCESS_SETTINGS:
+                    parser.error(f"Unknown preprocess setting: {preprocess}")
+                configs.append({"extractor": "universal", "engine": engine,
+                                "preprocess": preprocess, "deskew": deskew})
+
+    print(f"🧪 Generating {args.count} synthetic report(s) per kind...", flush=True)
+    cases = build_cases(count=args.count, seed=args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="ocr_bench_") as tmp:
+        manifest = []
+        for case in cases:
+            path = os.path.join(tmp, case["name"] + case["ext"])
+            with open(path, "wb") as f:
+                f.write(case["bytes"])
+            manifest.append({k: v for k, v in case.items() if k != "bytes"} | {"path": path})
+
+        manifest_path = os.path.join(tmp, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        runs = []
+        ctx = multiprocessing.get_context("spawn")
+        for config in configs:
+            name = _config_name(config)
+            print(f"\n▶ {name}", flush=True)
+
+            with ctx.Pool(1) as pool:
+                try:
+                    outcome = pool.apply(_run_config, (config, manifest_path))
+                except Exception as e:
+                    print(f"  ❌ {e}", flush=True)
+                    runs.append({"config": name, **config, "error": str(e)})
+                    continue
+
+            summary = _summarize(outcome["cases"])
+            runs.append({"config": name, **config, **outcome, "summary": summary})
+            print(f"  {summary['pages_per_sec']} pages/s, CER {summary['mean_cer']}, "
+                  f"peak RSS {outcome['peak_rss_mb']} MB", flush=True)
+
+    result = {
+        "run_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "seed": args.seed,
+        "count": args.count,
+        "runs": runs
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"ocr-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n✅ Results written to {output}")
+
+    _print_deskew_effect(runs)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            _print_comparison(result, json.load(f))
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
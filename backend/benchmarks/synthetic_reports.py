@@ -0,0 +1,213 @@
+# backend/benchmarks/synthetic_reports.py
+
+"""
+Synthetic lab reports with known ground truth for OCR benchmarking
+
+Three kinds are generated, all from the same seeded report text:
+- text_pdf:  born-digital PDF with a real text layer
+- scan_pdf:  rasterized pages with sensor noise and a slight skew
+- photo_jpg: phone-style photo (perspective, uneven light, blur, JPEG)
+- rotated_jpg: the same photo taken sideways or upside down
+"""
+
+import io
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+FIRST_NAMES = ["Rajesh", "Priya", "Vedant", "Anita", "Suresh", "Meera", "Arjun", "Kavita"]
+LAST_NAMES = ["Sharma", "Patel", "Dhoke", "Iyer", "Reddy", "Gupta", "Nair", "Kulkarni"]
+HOSPITALS = ["City Hospital", "Sunrise Diagnostics", "Metro Pathology Lab", "Apollo Clinic"]
+
+# (test, unit, low, high, decimals)
+LAB_TESTS = [
+    ("Hemoglobin", "g/dL", 12.0, 17.0, 1),
+    ("Total WBC Count", "cells/cumm", 4000, 11000, 0),
+    ("Platelet Count", "lakhs/cumm", 1.5, 4.5, 2),
+    ("Fasting Blood Glucose", "mg/dL", 70, 100, 0),
+    ("HbA1c", "%", 4.0, 5.6, 1),
+    ("Total Cholesterol", "mg/dL", 125, 200, 0),
+    ("HDL Cholesterol", "mg/dL", 40, 60, 0),
+    ("LDL Cholesterol", "mg/dL", 50, 130, 0),
+    ("Triglycerides", "mg/dL", 50, 150, 0),
+    ("Serum Creatinine", "mg/dL", 0.6, 1.3, 2),
+    ("Blood Urea", "mg/dL", 15, 40, 0),
+    ("Total Bilirubin", "mg/dL", 0.3, 1.2, 2),
+    ("SGPT (ALT)", "U/L", 7, 56, 0),
+    ("TSH", "uIU/mL", 0.4, 4.0, 2),
+    ("Vitamin D (25-OH)", "ng/mL", 30, 100, 1),
+    ("Vitamin B12", "pg/mL", 200, 900, 0),
+]
+
+PAGE_DPI = 200
+PAGE_SIZE = (int(8.27 * PAGE_DPI), int(11.69 * PAGE_DPI))  # A4
+LINES_PER_PAGE = 28
+
+
+def generate_report_lines(rng: random.Random, test_count: int = 12) -> list:
+    """Report text, one string per printed line"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        rng.choice(HOSPITALS),
+        "LABORATORY TEST REPORT",
+        f"Patient Name: {name}",
+        f"Age: {rng.randint(18, 85)} Years   Sex: {rng.choice(['Male', 'Female'])}",
+        f"Report Date: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2022, 2026)}",
+        f"Referred By: Dr. {rng.choice(LAST_NAMES)}",
+        "",
+        "Test Name   Result   Unit   Reference Range",
+    ]
+
+    for test, unit, low, high, decimals in rng.sample(LAB_TESTS, test_count):
+        span = high - low
+        value = rng.uniform(low - span * 0.3, high + span * 0.3)
+        fmt = f"{{:.{decimals}f}}"
+        lines.append(f"{test}   {fmt.format(value)}   {unit}   {fmt.format(low)} - {fmt.format(high)}")
+
+    lines += ["", "Interpretation: Values outside the reference range are flagged for review.",
+              "End of Report"]
+    return lines
+
+
+def split_pages(lines: list) -> list:
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_text_pdf(pages: list) -> bytes:
+    """Minimal born-digital PDF (Helvetica text layer, one content stream per page)"""
+    page_count = len(pages)
+    font_obj = 3 + page_count * 2
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{3 + i * 2} 0 R" for i in range(page_count)), page_count
+        )).encode("latin-1"),
+    ]
+
+    for i, lines in enumerate(pages):
+        content = ["BT", "/F1 11 Tf", "15 TL", "50 790 Td"]
+        content += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        content.append("ET")
+        stream = "\n".join(content).encode("latin-1", errors="replace")
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_obj} 0 R >> >> /Contents {4 + i * 2} 0 R >>"
+        ).encode("latin-1"))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def _font(size: int):
+    for name in ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def render_page_image(lines: list) -> Image.Image:
+    """Clean grayscale page at PAGE_DPI"""
+    img = Image.new("L", PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(img)
+    font = _font(int(PAGE_DPI * 11 / 72))
+    line_height = int(PAGE_DPI * 15 / 72)
+    x, y = int(PAGE_DPI * 0.7), int(PAGE_DPI * 0.7)
+
+    for line in lines:
+        draw.text((x, y), line, fill=0, font=font)
+        y += line_height
+    return img
+
+
+def degrade_scan(img: Image.Image, rng: random.Random) -> Image.Image:
+    """Scanner-style degradation: small skew plus gaussian sensor noise"""
+    skewed = img.rotate(rng.uniform(-2.0, 2.0), resample=Image.BICUBIC, expand=False, fillcolor=255)
+    arr = np.asarray(skewed, dtype=np.float32)
+    noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 12, arr.shape)
+    return Image.fromarray(np.clip(arr + noise, 0, 255).astype(np.uint8))
+
+
+def degrade_photo(img: Image.Image, rng: random.Random) -> Image.Image:
+    """Phone-photo degradation: perspective, uneven lighting, blur"""
+    w, h = img.size
+    d = int(w * 0.04)
+    quad = (
+        rng.randint(0, d), rng.randint(0, d),
+        rng.randint(0, d), h - rng.randint(0, d),
+        w - rng.randint(0, d), h - rng.randint(0, d),
+        w - rng.randint(0, d), rng.randint(0, d),
+    )
+    warped = img.transform((w, h), Image.QUAD, quad, resample=Image.BICUBIC, fillcolor=200)
+
+    arr = np.asarray(warped, dtype=np.float32)
+    gradient = np.linspace(0.75, 1.0, w, dtype=np.float32)[None, :]
+    lit = np.clip(arr * gradient + 10, 0, 255).astype(np.uint8)
+
+    return Image.fromarray(lit).filter(ImageFilter.GaussianBlur(radius=1.2))
+
+
+def build_cases(count: int = 2, seed: int = 7) -> list:
+    """
+    Generate benchmark cases
+
+    Returns:
+        [{"name", "kind", "ext", "bytes", "pages", "ground_truth"}, ...]
+    """
+    rng = random.Random(seed)
+    cases = []
+
+    for n in range(count):
+        lines = generate_report_lines(rng, test_count=12 + n % 4)
+        pages = split_pages(lines)
+        truth = "\n".join(lines)
+
+        cases.append({
+            "name": f"text_pdf_{n}", "kind": "text_pdf", "ext": ".pdf",
+            "bytes": render_text_pdf(pages), "pages": len(pages), "ground_truth": truth,
+        })
+
+        scans = [degrade_scan(render_page_image(p), rng) for p in pages]
+        buf = io.BytesIO()
+        scans[0].save(buf, "PDF", save_all=True, append_images=scans[1:], resolution=PAGE_DPI)
+        cases.append({
+            "name": f"scan_pdf_{n}", "kind": "scan_pdf", "ext": ".pdf",
+            "bytes": buf.getvalue(), "pages": len(pages), "ground_truth": truth,
+        })
+
+        photo = degrade_photo(render_page_image(pages[0]), rng)
+        buf = io.BytesIO()
+        photo.convert("RGB").save(buf, "JPEG", quality=80)
+        cases.append({
+            "name": f"photo_jpg_{n}", "kind": "photo_jpg", "ext": ".jpg",
+            "bytes": buf.getvalue(), "pages": 1, "ground_truth": "\n".join(pages[0]),
+        })
+
+        rotated = photo.rotate(rng.choice([90, 180, 270]), expand=True)
+        buf = io.BytesIO()
+        rotated.convert("RGB").save(buf, "JPEG", quality=80)
+        cases.append({
+            "name": f"rotated_jpg_{n}", "kind": "rotated_jpg", "ext": ".jpg",
+            "bytes": buf.getvalue(), "pages": 1, "ground_truth": "\n".join(pages[0]),
+        })
+
+    return cases
@@ -0,0 +1,62 @@
+# backend/conftest.py
+
+"""
+Shared fixtures: point module-level stores at a per-test tmp_path
+
+Modules are imported inside the fixtures, so a test file only pulls in
+the dependencies of the modules it actually uses.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def job_db(monkeypatch, tmp_path):
+    """Empty job queue database (job_queue.JOB_DB_PATH)"""
+    import job_queue
+
+    path = str(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(job_queue, "JOB_DB_PATH", path)
+    return path
+
+
+@pytest.fixture
+def pipeline_db(monkeypatch, tmp_path):
+    """Empty checkpoint database (pipeline_state.PIPELINE_STATE_PATH)"""
+    import pipeline_state
+
+    path = str(tmp_path / "state.sqlite3")
+    monkeypatch.setattr(pipeline_state, "PIPELINE_STATE_PATH", path)
+    return path
+
+
+@pytest.fixture
+def ocr_cache_dir(monkeypatch, tmp_path):
+    """Enabled, empty OCR cache with 1 MB of room and zeroed counters"""
+    from rag_pipeline import ocr_cache
+
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_MAX_BYTES", 1024 * 1024)
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(ocr_cache, "_size_bytes", None)
+    monkeypatch.setattr(ocr_cache, "_stats", {"hits": 0, "misses": 0, "writes": 0, "evictions": 0})
+    return tmp_path
+
+
+@pytest.fixture
+def download_counters(monkeypatch):
+    """Zeroed supabase_helper download counters and no HTTP client yet"""
+    import supabase_helper as sb
+
+    counters = {
+        "downloads": 0,
+        "bytes": 0,
+        "seconds": 0.0,
+        "signed_url_requests": 0,
+        "signed_urls_created": 0,
+        "signed_url_cache_hits": 0,
+    }
+    monkeypatch.setattr(sb, "_download_stats", counters)
+    monkeypatch.setattr(sb, "_http_client", None)
+    monkeypatch.setattr(sb, "_http_kind", None)
+    return counters
@@ -0,0 +1,18 @@
+# backend/gunicorn.conf.py
+
+import os
+
+# Set OCR_WARMUP=true to load PaddleOCR/EasyOCR once in the master before
+# workers fork, so every worker shares the models copy-on-write.
+# Leave it off and workers that never OCR an image never load them.
+OCR_WARMUP = os.getenv("OCR_WARMUP", "false").lower() in ("1", "true", "yes")
+
+
+def on_starting(server):
+    if not OCR_WARMUP:
+        return
+
+    from rag_pipeline.extractor_OCR import warm_up_ocr_engines
+
+    print("🔥 Warming up OCR engines before fork...", flush=True)
+    warm_up_ocr_engines()
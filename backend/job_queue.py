@@ -0,0 +1,279 @@
+# backend/job_queue.py
+
+"""
+Durable local job queue (SQLite)
+
+The API enqueues report-processing jobs here and returns immediately;
+job_worker.py processes drain the queue. Only one queued or running job
+exists per dedupe key (profile + folder), so repeated clicks attach to the
+job already in progress instead of starting a parallel scan.
+"""
+
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timezone, timedelta
+
+JOB_DB_PATH = os.getenv(
+    "JOB_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs", "jobs.sqlite3")
+)
+# A running job whose worker has not reported for this long is requeued
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A worker not seen for this long is presumed down (the API then stops queueing)
+JOB_WORKER_TIMEOUT_SECONDS = int(os.getenv("JOB_WORKER_TIMEOUT_SECONDS", "120"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    profile_id TEXT,
+    folder_type TEXT,
+    dedupe_key TEXT,
+    status TEXT NOT NULL,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    heartbeat_at TEXT,
+    finished_at TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_dedupe
+    ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    detail TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, file_name)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    seen_at TEXT NOT NULL
+);
+"""
+
+_local = threading.local()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection (sqlite3 connections are not shared across threads)"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == JOB_DB_PATH:
+        return conn
+
+    os.makedirs(os.path.dirname(os.path.abspath(JOB_DB_PATH)), exist_ok=True)
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.executescript(_SCHEMA)
+    _local.conn = conn
+    _local.path = JOB_DB_PATH
+    return conn
+
+
+def _job_dict(row) -> dict:
+    if row is None:
+        return None
+    job = dict(row)
+    for field in ("payload", "result"):
+        job[field] = json.loads(job[field]) if job[field] else None
+    return job
+
+
+def dedupe_key(kind: str, profile_id: str, folder_type: str = None) -> str:
+    return f"{kind}:{profile_id}:{folder_type or ''}"
+
+
+def enqueue_job(kind: str, profile_id: str, folder_type: str = None,
+                payload: dict = None) -> tuple:
+    """
+    Queue a job unless an equivalent one is already queued or running
+
+    Returns:
+        (job dict, created): created is False when an active job was reused
+    """
+    conn = _connect()
+    key = dedupe_key(kind, profile_id, folder_type)
+    job_id = uuid.uuid4().hex
+
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, profile_id, folder_type, dedupe_key, status, payload, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, profile_id, folder_type, key, json.dumps(payload or {}), _now())
+        )
+        return get_job(job_id), True
+    except sqlite3.IntegrityError:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')", (key,)
+        ).fetchone()
+        if row is None:
+            # The active job finished between our insert and select; try once more
+            return enqueue_job(kind, profile_id, folder_type, payload)
+        return _job_dict(row), False
+
+
+def claim_next_job(worker: str, kinds: list = None) -> dict:
+    """Atomically move the oldest queued job to running; None when the queue is empty"""
+    conn = _connect()
+    now = _now()
+    kind_filter = ""
+    params = []
+    if kinds:
+        kind_filter = f" AND kind IN ({', '.join('?' for _ in kinds)})"
+        params = list(kinds)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            f"SELECT id FROM jobs WHERE status = 'queued'{kind_filter} ORDER BY created_at LIMIT 1",
+            params
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+            "started_at = ?, heartbeat_at = ? WHERE id = ?",
+            (worker, now, now, row["id"])
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return get_job(row["id"])
+
+
+def heartbeat(job_id: str):
+    _connect().execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (_now(), job_id))
+
+
+def worker_alive(worker: str):
+    """Record that a worker is up (polling the queue or running a job)"""
+    _connect().execute(
+        "INSERT INTO workers (worker, seen_at) VALUES (?, ?) "
+        "ON CONFLICT (worker) DO UPDATE SET seen_at = excluded.seen_at",
+        (worker, _now())
+    )
+
+
+def live_workers(timeout_seconds: int = None) -> int:
+    """Workers seen within timeout_seconds (default: JOB_WORKER_TIMEOUT_SECONDS)"""
+    cutoff = (datetime.now(timezone.utc)
+              - timedelta(seconds=timeout_seconds or JOB_WORKER_TIMEOUT_SECONDS)).isoformat()
+    return _connect().execute(
+        "SELECT COUNT(*) FROM workers WHERE seen_at >= ?", (cutoff,)
+    ).fetchone()[0]
+
+
+def complete_job(job_id: str, result: dict = None):
+    _connect().execute(
+        "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ?, heartbeat_at = ? WHERE id = ?",
+        (json.dumps(result or {}), _now(), _now(), job_id)
+    )
+
+
+def fail_job(job_id: str, error: str, result: dict = None):
+    _connect().execute(
+        "UPDATE jobs SET status = 'failed', error = ?, result = ?, finished_at = ?, heartbeat_at = ? "
+        "WHERE id = ?",
+        (error, json.dumps(result) if result is not None else None, _now(), _now(), job_id)
+    )
+
+
+def requeue_stale_jobs(stale_seconds: int = None) -> int:
+    """
+    Recover jobs whose worker died
+
+    Running jobs without a heartbeat for stale_seconds go back to the queue,
+    or fail once they have used up JOB_MAX_ATTEMPTS.
+
+    Returns:
+        Number of jobs requeued or failed
+    """
+    conn = _connect()
+    cutoff = (datetime.now(timezone.utc)
+              - timedelta(seconds=stale_seconds or JOB_STALE_SECONDS)).isoformat()
+
+    failed = conn.execute(
+        "UPDATE jobs SET status = 'failed', error = 'worker stopped responding', finished_at = ? "
+        "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+        (_now(), cutoff, JOB_MAX_ATTEMPTS)
+    ).rowcount
+    requeued = conn.execute(
+        "UPDATE jobs SET status = 'queued', worker = NULL "
+        "WHERE status = 'running' AND heartbeat_at < ?",
+        (cutoff,)
+    ).rowcount
+    return failed + requeued
+
+
+def get_job(job_id: str) -> dict:
+    row = _connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_dict(row)
+
+
+def list_jobs(profile_id: str = None, status: str = None, limit: int = 20) -> list:
+    query = "SELECT * FROM jobs WHERE 1 = 1"
+    params = []
+    if profile_id:
+        query += " AND profile_id = ?"
+        params.append(profile_id)
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    return [_job_dict(row) for row in _connect().execute(query, params).fetchall()]
+
+
+# ============================================
+# PER-FILE STATUS
+# ============================================
+
+def set_file_status(job_id: str, file_name: str, status: str, detail: dict = None,
+                    position: int = 0):
+    """Record (or update) one file's status within a job"""
+    _connect().execute(
+        "INSERT INTO job_files (job_id, position, file_name, status, detail, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (job_id, file_name) DO UPDATE SET "
+        "status = excluded.status, detail = COALESCE(excluded.detail, job_files.detail), "
+        "updated_at = excluded.updated_at",
+        (job_id, position, file_name, status, json.dumps(detail) if detail is not None else None, _now())
+    )
+
+
+def get_job_files(job_id: str) -> list:
+    rows = _connect().execute(
+        "SELECT file_name, status, detail, updated_at FROM job_files WHERE job_id = ? ORDER BY position",
+        (job_id,)
+    ).fetchall()
+    return [
+        {**dict(row), "detail": json.loads(row["detail"]) if row["detail"] else None}
+        for row in rows
+    ]
+
+
+def file_status_counts(job_id: str) -> dict:
+    rows = _connect().execute(
+        "SELECT status, COUNT(*) AS n FROM job_files WHERE job_id = ? GROUP BY status", (job_id,)
+    ).fetchall()
+    return {row["status"]: row["n"] for row in rows}
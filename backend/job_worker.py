@@ -0,0 +1,124 @@
+# backend/job_worker.py
+
+"""
+Job worker: drains the process-files queue (job_queue.py)
+
+Run one or more next to the API, sharing the same JOB_DB_PATH:
+
+    python job_worker.py              # run until stopped
+    python job_worker.py --once       # drain the queue, then exit
+"""
+
+import os
+import time
+import socket
+import argparse
+import threading
+import traceback
+
+import job_queue
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+
+
+def _heartbeat_loop(job_id: str, worker: str, stop: threading.Event):
+    while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+        try:
+            job_queue.heartbeat(job_id)
+            job_queue.worker_alive(worker)
+        except Exception as e:
+            print(f"⚠️ Heartbeat failed for {job_id}: {e}", flush=True)
+
+
+def _file_progress(job_id: str):
+    """progress callback for run_process_files that records per-file status"""
+    def progress(event: str, data: dict):
+        if event == "files_listed":
+            # One event per listing page, sent before that page's files start
+            for i, file_name in enumerate(data["files"]):
+                job_queue.set_file_status(job_id, file_name, "pending",
+                                          position=data.get("offset", 0) + i)
+        elif event == "file_started":
+            job_queue.set_file_status(job_id, data["file_name"], "running", position=data["position"])
+        elif event == "file_finished":
+            result = data["result"]
+            detail = {k: v for k, v in result.items() if k not in ("file_name", "status")}
+            job_queue.set_file_status(job_id, result["file_name"], result["status"], detail,
+                                      position=data["position"])
+    return progress
+
+
+def run_job(job: dict):
+    """Run one claimed job and record its outcome"""
+    # Imported here so `--help` works without the API's environment
+    from app_api import run_process_files
+
+    job_id = job["id"]
+    payload = job["payload"] or {}
+    print(f"\n🔄 Job {job_id}: {job['kind']} {job['profile_id']}/{job['folder_type']} "
+          f"(attempt {job['attempts']})", flush=True)
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat_loop, args=(job_id, job["worker"], stop), daemon=True)
+    beat.start()
+    started = time.time()
+
+    try:
+        if job["kind"] != "process_files":
+            raise ValueError(f"Unknown job kind: {job['kind']}")
+
+        body, status = run_process_files(
+            payload.get("profile_id", job["profile_id"]),
+            payload.get("folder_type", job["folder_type"]),
+            progress=_file_progress(job_id),
+            full_ocr=payload.get("full_ocr", False)
+        )
+        body["http_status"] = status
+
+        if status == 200:
+            job_queue.complete_job(job_id, body)
+            print(f"✅ Job {job_id} done in {time.time() - started:.1f}s: {body.get('message')}", flush=True)
+        else:
+            job_queue.fail_job(job_id, body.get("error") or f"HTTP {status}", body)
+            print(f"❌ Job {job_id} failed: {body.get('error')}", flush=True)
+
+    except Exception as e:
+        traceback.print_exc()
+        job_queue.fail_job(job_id, str(e))
+        print(f"❌ Job {job_id} failed: {e}", flush=True)
+
+    finally:
+        stop.set()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Process queued report-processing jobs")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL,
+                        help="Seconds between polls of an empty queue")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args(argv)
+
+    print(f"👷 Job worker {args.worker_id} (queue: {job_queue.JOB_DB_PATH})", flush=True)
+
+    while True:
+        # The API only queues jobs while some worker has been seen recently
+        job_queue.worker_alive(args.worker_id)
+        recovered = job_queue.requeue_stale_jobs()
+        if recovered:
+            print(f"⚠️ Recovered {recovered} stale job(s)", flush=True)
+
+        job = job_queue.claim_next_job(args.worker_id)
+        if job:
+            run_job(job)
+            continue
+
+        if args.once:
+            print("✅ Queue empty", flush=True)
+            return
+        time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# backend/pipeline_state.py
+
+"""
+Per-file processing checkpoints (SQLite)
+
+process_file records each completed stage with its intermediate result, so
+a run that dies halfway resumes every file from its last completed stage
+instead of OCR-ing it again. Checkpoints are keyed by storage path and tied
+to the object's fingerprint (size/etag/updated_at); a replaced file starts
+over. Stage durations are kept for capacity planning.
+
+Downloaded files are never written here (they stay in memory, see
+supabase_helper); a file resumed from "fetched" is fetched again. Extracted
+text is kept only until the report is saved, and clear_profile drops a
+profile's rows.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone, timedelta
+
+PIPELINE_STATE_PATH = os.getenv(
+    "PIPELINE_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs", "pipeline_state.sqlite3")
+)
+# Unfinished checkpoints older than this are dropped
+PIPELINE_CHECKPOINT_TTL_HOURS = float(os.getenv("PIPELINE_CHECKPOINT_TTL_HOURS", "72"))
+# Stage timings kept for stage_stats
+PIPELINE_TIMING_RETENTION_DAYS = float(os.getenv("PIPELINE_TIMING_RETENTION_DAYS", "30"))
+
+FETCHED = "fetched"
+TEXT_EXTRACTED = "text_extracted"
+METADATA_EXTRACTED = "metadata_extracted"
+SAVED = "saved"
+STAGES = (FETCHED, TEXT_EXTRACTED, METADATA_EXTRACTED, SAVED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_checkpoints (
+    file_path TEXT PRIMARY KEY,
+    source_key TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT,
+    durations TEXT NOT NULL DEFAULT '{}',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stage_timings_stage ON stage_timings (stage, recorded_at);
+"""
+
+_local = threading.local()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection (sqlite3 connections are not shared across threads)"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == PIPELINE_STATE_PATH:
+        return conn
+
+    os.makedirs(os.path.dirname(os.path.abspath(PIPELINE_STATE_PATH)), exist_ok=True)
+    conn = sqlite3.connect(PIPELINE_STATE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    # Deleted checkpoint text is overwritten, not left in free pages
+    conn.execute("PRAGMA secure_delete=ON")
+    conn.executescript(_SCHEMA)
+    _drop_file_bytes(conn)
+    _local.conn = conn
+    _local.path = PIPELINE_STATE_PATH
+    return conn
+
+
+def _drop_file_bytes(conn: sqlite3.Connection):
+    """Remove downloaded files that older versions kept in the fetched checkpoint"""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(file_checkpoints)")}
+    if "file_bytes" not in columns:
+        return
+    conn.execute("UPDATE file_checkpoints SET file_bytes = NULL")
+    try:
+        conn.execute("ALTER TABLE file_checkpoints DROP COLUMN file_bytes")
+    except sqlite3.OperationalError:
+        # SQLite before 3.35 cannot drop columns; the values are gone already
+        pass
+
+
+def source_key(fingerprint: dict) -> str:
+    """Stable string for a storage fingerprint (see supabase_helper.storage_fingerprint)"""
+    return json.dumps(fingerprint or {}, sort_keys=True, default=str)
+
+
+def reached(stage: str, target: str) -> bool:
+    """Whether a checkpoint at `stage` has completed `target`"""
+    if stage not in STAGES:
+        return False
+    return STAGES.index(stage) >= STAGES.index(target)
+
+
+def load_checkpoint(file_path: str, fingerprint: dict, since: str = None) -> dict:
+    """
+    Last completed stage for a file
+
+    Args:
+        since: ISO timestamp; older checkpoints are ignored (a backfill after
+            an extractor change must not resume from the old extractor's output)
+
+    Returns:
+        {"stage", "data", "durations", "attempts", "last_error"},
+        or None when there is no checkpoint, it predates `since`, or the file
+        was replaced since
+    """
+    row = _connect().execute(
+        "SELECT * FROM file_checkpoints WHERE file_path = ?", (file_path,)
+    ).fetchone()
+    if row is None or row["source_key"] != source_key(fingerprint):
+        return None
+    if since and row["updated_at"] < since:
+        return None
+
+    return {
+        "stage": row["stage"],
+        "data": json.loads(row["data"]) if row["data"] else {},
+        "durations": json.loads(row["durations"]),
+        "attempts": row["attempts"],
+        "last_error": row["last_error"],
+    }
+
+
+def save_checkpoint(file_path: str, fingerprint: dict, stage: str, data: dict = None,
+                    seconds: float = None):
+    """
+    Record a completed stage
+
+    data replaces the stored intermediate result (None keeps it).
+    """
+    conn = _connect()
+    key = source_key(fingerprint)
+    row = conn.execute(
+        "SELECT source_key, data, durations FROM file_checkpoints WHERE file_path = ?", (file_path,)
+    ).fetchone()
+
+    durations = {}
+    stored_data = None
+    if row is not None and row["source_key"] == key:
+        durations = json.loads(row["durations"])
+        stored_data = row["data"]
+    if seconds is not None:
+        durations[stage] = round(seconds, 3)
+
+    conn.execute(
+        "INSERT INTO file_checkpoints "
+        "(file_path, source_key, stage, data, durations, attempts, last_error, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, 0, NULL, ?) "
+        "ON CONFLICT (file_path) DO UPDATE SET source_key = excluded.source_key, "
+        "stage = excluded.stage, data = excluded.data, "
+        "durations = excluded.durations, last_error = NULL, updated_at = excluded.updated_at",
+        (file_path, key, stage,
+         json.dumps(data, default=str) if data is not None else stored_data,
+         json.dumps(durations), _now())
+    )
+
+    if seconds is not None:
+        conn.execute(
+            "INSERT INTO stage_timings (stage, seconds, recorded_at) VALUES (?, ?, ?)",
+            (stage, seconds, _now())
+        )
+
+
+def mark_saved(file_path: str, seconds: float = None):
+    """Final stage: the report is in the database, so drop the intermediates"""
+    conn = _connect()
+    row = conn.execute(
+        "SELECT durations FROM file_checkpoints WHERE file_path = ?", (file_path,)
+    ).fetchone()
+    if row is None:
+        return
+
+    durations = json.loads(row["durations"])
+    if seconds is not None:
+        durations[SAVED] = round(seconds, 3)
+        conn.execute(
+            "INSERT INTO stage_timings (stage, seconds, recorded_at) VALUES (?, ?, ?)",
+            (SAVED, seconds, _now())
+        )
+
+    conn.execute(
+        "UPDATE file_checkpoints SET stage = ?, data = NULL, durations = ?, "
+        "last_error = NULL, updated_at = ? WHERE file_path = ?",
+        (SAVED, json.dumps(durations), _now(), file_path)
+    )
+
+
+def saved_paths(prefix: str, since: str) -> set:
+    """Paths under `prefix` (e.g. "<profile>/<folder>/") saved at or after `since`"""
+    rows = _connect().execute(
+        "SELECT file_path FROM file_checkpoints WHERE stage = ? AND updated_at >= ? "
+        "AND substr(file_path, 1, ?) = ?",
+        (SAVED, since, len(prefix), prefix)
+    ).fetchall()
+    return {row["file_path"] for row in rows}
+
+
+def record_failure(file_path: str, error: str):
+    """Note a failed attempt; the last completed stage is kept for the retry"""
+    _connect().execute(
+        "UPDATE file_checkpoints SET attempts = attempts + 1, last_error = ?, updated_at = ? "
+        "WHERE file_path = ?",
+        (error, _now(), file_path)
+    )
+
+
+def clear_profile(profile_id: str) -> int:
+    """Drop every checkpoint of a profile's files; returns rows removed"""
+    prefix = f"{profile_id}/"
+    return _connect().execute(
+        "DELETE FROM file_checkpoints WHERE substr(file_path, 1, ?) = ?", (len(prefix), prefix)
+    ).rowcount
+
+
+def prune_checkpoints(ttl_hours: float = None) -> int:
+    """Drop stale unfinished checkpoints and old timings; returns checkpoints removed"""
+    conn = _connect()
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(hours=ttl_hours or PIPELINE_CHECKPOINT_TTL_HOURS)).isoformat()
+    removed = conn.execute(
+        "DELETE FROM file_checkpoints WHERE updated_at < ?", (cutoff,)
+    ).rowcount
+    conn.execute(
+        "DELETE FROM stage_timings WHERE recorded_at < ?",
+        ((now - timedelta(days=PIPELINE_TIMING_RETENTION_DAYS)).isoformat(),)
+    )
+    return removed
+
+
+def stage_stats(hours: float = 24) -> dict:
+    """
+    Stage duration summary for capacity planning
+
+    Returns:
+        {stage: {"count", "avg_seconds", "max_seconds", "total_seconds"}}
+        over the last `hours`
+    """
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    rows = _connect().execute(
+        "SELECT stage, COUNT(*) AS n, AVG(seconds) AS avg_s, MAX(seconds) AS max_s, "
+        "SUM(seconds) AS total_s FROM stage_timings WHERE recorded_at >= ? GROUP BY stage",
+        (since,)
+    ).fetchall()
+    stats = {
+        row["stage"]: {
+            "count": row["n"],
+            "avg_seconds": round(row["avg_s"], 3),
+            "max_seconds": round(row["max_s"], 3),
+            "total_seconds": round(row["total_s"], 3),
+        }
+        for row in rows
+    }
+    return {stage: stats[stage] for stage in STAGES if stage in stats}
+
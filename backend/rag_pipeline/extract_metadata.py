@@ -4,6 +4,7 @@ import os
 import requests
 import json
 import re
+import threading
 from datetime import datetime
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -12,6 +13,25 @@ OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
 # Using GPT-4.1-nano for metadata extraction
 MODEL_NAME = "gpt-4.1-nano"
 
+# Token usage of this process's metadata calls (see llm_usage)
+_usage_lock = threading.Lock()
+_usage = {"calls": 0, "failed_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+
+def _record_usage(usage: dict = None, failed: bool = False):
+    with _usage_lock:
+        _usage["calls"] += 1
+        if failed:
+            _usage["failed_calls"] += 1
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            _usage[field] += (usage or {}).get(field) or 0
+
+
+def llm_usage() -> dict:
+    """Metadata LLM calls and tokens used by this process so far"""
+    with _usage_lock:
+        return dict(_usage)
+
 
 def extract_metadata_with_llm(text: str, file_name: str = None, retry_count: int = 0) -> dict:
     """
@@ -106,6 +126,7 @@ Return JSON with: patient_name, age, gender, report_date, report_type, doctor_na
         response.raise_for_status()
         
         result = response.json()
+        _record_usage(result.get("usage"))
         content = result["choices"][0]["message"]["content"]
         
         # Parse JSON response
@@ -135,10 +156,12 @@ Return JSON with: patient_name, age, gender, report_date, report_type, doctor_na
         return cleaned_metadata
         
     except requests.exceptions.Timeout:
+        _record_usage(failed=True)
         print("   ⚠️  LLM timeout - falling back to regex")
         return extract_metadata_fallback(text)
         
     except requests.exceptions.RequestException as e:
+        _record_usage(failed=True)
         print(f"   ⚠️  LLM API error: {e} - falling back to regex")
         return extract_metadata_fallback(text)
         
@@ -0,0 +1,686 @@
+# backend/rag_pipeline/extraction.py
+
+"""
+Bytes-in, text-out extraction shared by the API and the OCR tools
+
+Engines (PDF text layer, Tesseract, PaddleOCR, EasyOCR) are listed in a
+registry with their capabilities and running latency/memory stats. A named
+policy decides which engines run, in what order, and how pages are fed to
+them:
+
+    fast     Tesseract only, pages spread over the OCR process pool
+    cascade  cheapest engine first, escalate while the score is too low
+    best     every engine, longest output wins
+"""
+
+import io
+import os
+import time
+import threading
+import importlib.util
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from rag_pipeline import extractor_OCR as ocr
+from rag_pipeline.parallel_ocr import ocr_pages
+from rag_pipeline.step_log import log_step
+from rag_pipeline.orientation import OCR_DESKEW, correct_orientation
+from rag_pipeline.pdf_pages import iter_pdf_pages, read_text_layer, count_pdf_pages
+from rag_pipeline.ocr_budget import (
+    new_budget, flag, budget_expired, fit_image, draft_to_budget, budget_report,
+    REASON_PAGE_LIMIT, REASON_TIME_LIMIT, REASON_DOWNSCALED
+)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif', '.webp')
+
+
+# ============================================
+# ENGINE REGISTRY
+# ============================================
+
+ENGINES = {}
+
+
+def register_engine(name: str, label: str, inputs: tuple, run=None, run_batch=None,
+                    available=None, confidence: bool = True, pooled: bool = False,
+                    loads_model: bool = False, cost: int = 1):
+    """
+    Add an engine to the registry
+
+    Args:
+        name: Registry key
+        label: Display name
+        inputs: Input kinds the engine reads ("pdf", "image")
+        run: fn(image) -> (text, confidence) for image engines
+        run_batch: fn([images]) -> [(text, confidence), ...] when the engine
+            gains from seeing several images at once
+        available: fn() -> bool (default: always available)
+        confidence: Engine reports a usable confidence score
+        pooled: Runs in the OCR process pool (parallel_ocr)
+        loads_model: Loads a large model on first use
+        cost: Relative CPU cost; cascades try cheaper engines first
+    """
+    ENGINES[name] = {
+        "label": label,
+        "inputs": tuple(inputs),
+        "run": run,
+        "run_batch": run_batch,
+        "available": available or (lambda: True),
+        "confidence": confidence,
+        "pooled": pooled,
+        "loads_model": loads_model,
+        "cost": cost,
+    }
+
+
+register_engine(
+    "pdf_text", "PDF text layer", inputs=("pdf",),
+    available=lambda: importlib.util.find_spec("pdfplumber") is not None,
+    confidence=False, cost=0
+)
+register_engine(
+    "tesseract", "Tesseract", inputs=("image",), run=ocr._run_tesseract,
+    available=lambda: ocr.TESSERACT_AVAILABLE, pooled=True, cost=1
+)
+register_engine(
+    "paddle", "PaddleOCR", inputs=("image",), run=ocr._run_paddle,
+    run_batch=ocr._run_paddle_batch, available=lambda: ocr.PADDLE_AVAILABLE,
+    loads_model=True, cost=2
+)
+register_engine(
+    "easyocr", "EasyOCR", inputs=("image",), run=ocr._run_easyocr,
+    available=lambda: ocr.EASYOCR_AVAILABLE, loads_model=True, cost=3
+)
+
+
+# ============================================
+# ENGINE STATS
+# ============================================
+
+_stats_lock = threading.Lock()
+_engine_stats = {}
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _record(engine: str, items: int, seconds: float, rss_growth_mb: float = 0.0,
+            failed: bool = False):
+    with _stats_lock:
+        stats = _engine_stats.setdefault(engine, {
+            "calls": 0, "items": 0, "seconds": 0.0, "failures": 0,
+            "mean_item_seconds": None, "max_rss_growth_mb": 0.0
+        })
+        stats["calls"] += 1
+        stats["items"] += items
+        stats["seconds"] += seconds
+        stats["failures"] += int(failed)
+        if items:
+            # Rolling mean so the estimate follows the current load
+            per_item = seconds / items
+            previous = stats["mean_item_seconds"]
+            stats["mean_item_seconds"] = per_item if previous is None else 0.8 * previous + 0.2 * per_item
+        stats["max_rss_growth_mb"] = max(stats["max_rss_growth_mb"], rss_growth_mb)
+
+
+def engine_latency(engine: str) -> float:
+    """Rolling mean seconds per page/image (0.0 before the first call)"""
+    with _stats_lock:
+        return (_engine_stats.get(engine) or {}).get("mean_item_seconds") or 0.0
+
+
+def engine_info() -> dict:
+    """Registry entries with availability, capabilities and stats (for /api/health)"""
+    info = {}
+    with _stats_lock:
+        stats = {name: dict(s) for name, s in _engine_stats.items()}
+
+    for name, engine in ENGINES.items():
+        entry = stats.get(name, {})
+        if entry.get("mean_item_seconds") is not None:
+            entry["mean_item_seconds"] = round(entry["mean_item_seconds"], 3)
+        if "seconds" in entry:
+            entry["seconds"] = round(entry["seconds"], 3)
+            entry["max_rss_growth_mb"] = round(entry["max_rss_growth_mb"], 1)
+
+        info[name] = {
+            "label": engine["label"],
+            "available": bool(engine["available"]()),
+            "inputs": list(engine["inputs"]),
+            "batch": engine["run_batch"] is not None,
+            "confidence": engine["confidence"],
+            "pooled": engine["pooled"],
+            "loads_model": engine["loads_model"],
+            "cost": engine["cost"],
+            "stats": entry,
+        }
+    return info
+
+
+# ============================================
+# SELECTION POLICY
+# ============================================
+
+EXTRACTION_POLICY = os.getenv("EXTRACTION_POLICY", "fast").lower()
+
+POLICIES = {
+    "fast": {
+        "mode": "cascade",
+        "image_engines": ["tesseract"],
+        "pdf_engines": ["tesseract"],
+        "pooled": True,
+        "preprocess": False,
+        "postprocess": False,
+    },
+    "cascade": {
+        "mode": "cascade",
+        "image_engines": ocr.CASCADE_ORDER,
+        "pdf_engines": ocr.PDF_PAGE_ENGINES,
+        "pooled": False,
+        "preprocess": True,
+        "postprocess": True,
+    },
+    "best": {
+        "mode": "best",
+        "image_engines": ocr.CASCADE_ORDER,
+        "pdf_engines": ocr.PDF_PAGE_ENGINES,
+        "pooled": False,
+        "preprocess": True,
+        "postprocess": True,
+    },
+}
+
+
+def get_policy(name: str = None) -> dict:
+    name = (name or EXTRACTION_POLICY).lower()
+    if name not in POLICIES:
+        raise ValueError(f"Unknown extraction policy: {name}")
+    return dict(POLICIES[name], name=name)
+
+
+def select_engines(candidates: list, input_kind: str = "image") -> list:
+    """Available engines from candidates that read input_kind, cheapest first"""
+    selected = [
+        name for name in candidates
+        if name in ENGINES
+        and input_kind in ENGINES[name]["inputs"]
+        and ENGINES[name]["available"]()
+    ]
+    return sorted(selected, key=lambda name: ENGINES[name]["cost"])
+
+
+# ============================================
+# OCR OVER IMAGES
+# ============================================
+
+def _run_engine_batch(engine: str, images: list, verbose: bool = False) -> list:
+    """Run one engine over several images; batched where the engine supports it"""
+    entry = ENGINES[engine]
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    failed = False
+
+    outputs = None
+    if entry["run_batch"] is not None and len(images) > 1:
+        try:
+            if verbose:
+                print(f"    → {entry['label']} (batch of {len(images)})...", flush=True)
+            outputs = [(text.strip(), conf) for text, conf in entry["run_batch"](images)]
+        except Exception as e:
+            failed = True
+            if verbose:
+                print(f"      ✗ {entry['label']} batch failed ({e}) - per image", flush=True)
+
+    if outputs is None:
+        outputs = []
+        for img in images:
+            try:
+                if verbose:
+                    print(f"    → {entry['label']}...", flush=True)
+                text, confidence = entry["run"](img)
+                outputs.append((text.strip(), confidence))
+                if verbose and text.strip():
+                    print(f"      ✓ {len(text.strip())} chars extracted (conf {confidence:.2f})", flush=True)
+            except Exception as e:
+                failed = True
+                outputs.append(("", 0.0))
+                if verbose:
+                    print(f"      ✗ {entry['label']} failed: {e}", flush=True)
+
+    _record(engine, len(images), time.perf_counter() - started,
+            rss_growth_mb=max(0.0, _rss_mb() - rss_before), failed=failed)
+    return outputs
+
+
+def run_engine(engine: str, image, verbose: bool = False) -> tuple:
+    """One registry engine over one image; ("", 0.0) when it is unavailable"""
+    if not select_engines([engine]):
+        return "", 0.0
+    return _run_engine_batch(engine, [image], verbose=verbose)[0]
+
+
+def ocr_images(images: list, mode: str = None, engines: list = None,
+               verbose: bool = False, deadline: float = None) -> list:
+    """
+    OCR several preprocessed images with a cascade or best-of strategy
+
+    Images may come from different pages or documents. Each engine runs once
+    over every image still below the cascade threshold, which lets PaddleOCR
+    batch recognition across all of them.
+
+    Args:
+        images: Preprocessed (grayscale) images
+        mode: "cascade" or "best" (default: OCR_ENGINE_MODE)
+        engines: Engines to consider (default: CASCADE_ORDER), run cheapest first
+        verbose: Print progress
+        deadline: time.monotonic() value after which no further engine starts
+
+    Returns:
+        One dict per image, in order:
+        {
+            "text": str,
+            "engine": str or None,   # engine whose output was kept
+            "score": float,
+            "engines_run": list,
+            "seconds": float,        # OCR time spent on this image
+            "saved_seconds": float,  # estimated time of engines skipped
+            "timed_out": bool        # deadline hit while still below threshold
+        }
+    """
+    mode = (mode or ocr.OCR_ENGINE_MODE).lower()
+    engines = select_engines(engines or ocr.CASCADE_ORDER)
+
+    states = [
+        {"text": "", "engine": None, "score": 0.0, "engines_run": [], "seconds": 0.0,
+         "timed_out": False}
+        for _ in images
+    ]
+    pending = list(range(len(images)))
+
+    for engine in engines:
+        if not pending:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            for i in pending:
+                states[i]["timed_out"] = True
+            break
+
+        started = time.perf_counter()
+        outputs = _run_engine_batch(engine, [images[i] for i in pending], verbose=verbose)
+        per_image = (time.perf_counter() - started) / len(pending)
+
+        still_pending = []
+        for i, (text, confidence) in zip(pending, outputs):
+            state = states[i]
+            state["engines_run"].append(engine)
+            state["seconds"] += per_image
+            score = ocr.score_ocr_result(text, confidence)
+
+            if mode == "best":
+                if len(text) > len(state["text"]):
+                    state.update(text=text, engine=engine, score=score)
+                still_pending.append(i)
+                continue
+
+            if text and (score > state["score"] or not state["text"]):
+                state.update(text=text, engine=engine, score=score)
+
+            if state["score"] < ocr.OCR_CASCADE_THRESHOLD:
+                still_pending.append(i)
+
+        pending = still_pending
+
+    for state in states:
+        skipped = [e for e in engines if e not in state["engines_run"]]
+        state["saved_seconds"] = round(sum(engine_latency(e) for e in skipped), 3)
+        state["seconds"] = round(state["seconds"], 3)
+
+        if verbose and state["engine"]:
+            print(f"  ✅ {ENGINES[state['engine']]['label']} kept (score {state['score']:.2f}, "
+                  f"{state['seconds']:.2f}s, ~{state['saved_seconds']:.2f}s saved)", flush=True)
+
+    return states
+
+
+# ============================================
+# DOCUMENT EXTRACTION
+# ============================================
+
+def image_to_gray(img) -> np.ndarray:
+    """Convert a PIL image to a grayscale array"""
+    img_array = np.array(img)
+
+    if img_array.ndim == 3:
+        code = cv2.COLOR_RGBA2GRAY if img_array.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        return cv2.cvtColor(img_array, code)
+    return img_array
+
+
+# cv2.imdecode flags by reduction factor; JPEG is decoded at reduced size
+# by libjpeg itself, other formats are decoded and then shrunk
+_REDUCED_GRAYSCALE = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def decode_image_gray(file_bytes: bytes, budget: dict) -> np.ndarray:
+    """
+    Decode an image straight to a grayscale array within the pixel budget
+
+    The downloaded buffer is wrapped, not copied, and decoded once by
+    cv2.imdecode; only the header is read through PIL to pick the smallest
+    reduction factor that fits budget["max_pixels"]. Formats OpenCV cannot
+    read fall back to PIL.
+    """
+    with Image.open(io.BytesIO(file_bytes)) as header:
+        width, height = header.size
+
+    factor = 1
+    while factor < 8 and (width // factor) * (height // factor) > budget["max_pixels"]:
+        factor *= 2
+
+    gray = cv2.imdecode(np.frombuffer(file_bytes, dtype=np.uint8), _REDUCED_GRAYSCALE[factor])
+    if gray is None:
+        img = draft_to_budget(Image.open(io.BytesIO(file_bytes)), budget)
+        return image_to_gray(fit_image(img, budget))
+
+    if gray.shape[0] * gray.shape[1] > budget["max_pixels"]:
+        scale = (budget["max_pixels"] / (gray.shape[0] * gray.shape[1])) ** 0.5
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if gray.size < width * height:
+        budget["downscaled_pages"].append(1)
+        flag(budget, REASON_DOWNSCALED)
+    return gray
+
+
+def _prepare(gray: np.ndarray, policy: dict, preprocess_mode: str, verbose: bool) -> tuple:
+    """Preprocess per policy; returns (image, preprocessing report)"""
+    prep = {}
+    if policy["preprocess"]:
+        gray = ocr.preprocess_image(gray, verbose=verbose, mode=preprocess_mode, report=prep)
+    return gray, prep
+
+
+def _pdf_text(file_bytes: bytes, policy: dict, engines: list, budget: dict,
+              preprocess_mode: str, page_stats: list, verbose: bool) -> str:
+    # Keep the text layer where a page has one; OCR only the rest
+    page_texts = {}
+    scanned_pages = None
+    page_info = {}
+    started = time.perf_counter()
+    try:
+        page_texts, scanned_pages = read_text_layer(
+            file_bytes=file_bytes,
+            max_pages=budget["max_pages"],
+            page_info=page_info
+        )
+        _record("pdf_text", len(page_info.get("sizes", {})), time.perf_counter() - started)
+        budget["pages_processed"] = len(page_texts)
+        log_step("PDF text layer", "success",
+             f"{len(page_texts)} pages with text, {len(scanned_pages)} need OCR")
+    except Exception as e:
+        _record("pdf_text", 0, time.perf_counter() - started, failed=True)
+        log_step("PDF text layer", "warning", f"Failed: {e}")
+
+    page_count = page_info.get("page_count")
+    if page_count is None:
+        try:
+            page_count = count_pdf_pages(file_bytes=file_bytes)
+        except Exception as e:
+            log_step("PDF page count", "warning", f"Failed: {e}")
+    budget["pages_total"] = page_count
+    if page_count and page_count > budget["max_pages"]:
+        flag(budget, REASON_PAGE_LIMIT)
+    if scanned_pages is None and page_count:
+        scanned_pages = list(range(1, min(page_count, budget["max_pages"]) + 1))
+
+    # Scanned pages - render a page window at a time and OCR as we go
+    if scanned_pages and not budget_expired(budget):
+        rendered = iter_pdf_pages(
+            file_bytes=file_bytes,
+            grayscale=True,
+            page_numbers=scanned_pages,
+            max_pixels=budget["max_pixels"],
+            page_sizes=page_info.get("sizes")
+        )
+        try:
+            if policy["pooled"]:
+                ocr_report = {}
+                started = time.perf_counter()
+                page_results = ocr_pages(
+                    ((n, image_to_gray(img)) for n, img in rendered),
+                    deadline=budget["deadline"], report=ocr_report
+                )
+                _record("tesseract", len(page_results), sum(r["seconds"] for r in page_results))
+                if ocr_report.get("timed_out"):
+                    flag(budget, REASON_TIME_LIMIT)
+                ocr_results = [(r["page"], r["text"]) for r in page_results]
+            else:
+                ocr_results = _ocr_rendered_pages(rendered, policy, engines, budget,
+                                                  preprocess_mode, page_stats, verbose)
+
+            budget["pages_processed"] += len(ocr_results)
+            ocr_chars = 0
+            for page_number, text in ocr_results:
+                if text:
+                    page_texts[page_number] = ocr.postprocess_text(text) if policy["postprocess"] else text
+                    ocr_chars += len(text)
+            log_step("PDF OCR", "success", f"{len(ocr_results)} pages, {ocr_chars} chars")
+
+        except Exception as e:
+            log_step("PDF OCR", "error", str(e))
+
+    return "\n\n".join(page_texts[n] for n in sorted(page_texts)).strip()
+
+
+def _ocr_rendered_pages(rendered, policy: dict, engines: list, budget: dict,
+                        preprocess_mode: str, page_stats: list, verbose: bool) -> list:
+    """Preprocess and OCR rendered pages in batches of OCR_PAGE_BATCH"""
+    results = []
+    batch = []
+
+    def flush_batch():
+        outcomes = ocr_images([p[1] for p in batch], mode=policy["mode"], engines=engines,
+                              verbose=verbose, deadline=budget["deadline"])
+        for (page_number, _, prep), outcome in zip(batch, outcomes):
+            if outcome["timed_out"]:
+                flag(budget, REASON_TIME_LIMIT)
+            if page_stats is not None:
+                page_stats.append(ocr._page_stat(page_number, outcome, prep))
+            results.append((page_number, outcome["text"]))
+        batch.clear()
+
+    for page_number, img in rendered:
+        if budget_expired(budget):
+            break
+        if verbose:
+            print(f"\n  📄 Processing page {page_number}...", flush=True)
+
+        gray = image_to_gray(img)
+        del img
+        processed, prep = _prepare(gray, policy, preprocess_mode, verbose)
+        batch.append((page_number, processed, prep))
+        if len(batch) >= ocr.OCR_PAGE_BATCH:
+            flush_batch()
+
+    if batch:
+        flush_batch()
+    return results
+
+
+def _image_text(file_bytes: bytes, policy: dict, engines: list, budget: dict,
+                preprocess_mode: str, page_stats: list, verbose: bool) -> str:
+    budget["pages_total"] = 1
+
+    gray = decode_image_gray(file_bytes, budget)
+    if verbose:
+        print(f"   Image size: {gray.shape[1]}x{gray.shape[0]}", flush=True)
+
+    if policy["pooled"]:
+        ocr_report = {}
+        page_results = ocr_pages([(1, gray)], parallel=False, deadline=budget["deadline"],
+                                 report=ocr_report)
+        _record("tesseract", len(page_results), sum(r["seconds"] for r in page_results))
+        if ocr_report.get("timed_out"):
+            flag(budget, REASON_TIME_LIMIT)
+        text = page_results[0]["text"] if page_results else ""
+    else:
+        processed, prep = _prepare(gray, policy, preprocess_mode, verbose)
+        outcome = ocr_images([processed], mode=policy["mode"], engines=engines,
+                             verbose=verbose, deadline=budget["deadline"])[0]
+        if page_stats is not None:
+            page_stats.append(ocr._page_stat(1, outcome, prep))
+        if outcome["timed_out"]:
+            flag(budget, REASON_TIME_LIMIT)
+        text = outcome["text"]
+        if text and policy["postprocess"]:
+            text = ocr.postprocess_text(text)
+
+    if text:
+        budget["pages_processed"] = 1
+        log_step("Image OCR", "success", f"{len(text)} chars")
+    return text.strip()
+
+
+def extract_text(file_bytes: bytes, file_extension: str, policy: str = None,
+                 engines: list = None, preprocess: bool = None, preprocess_mode: str = None,
+                 budget: dict = None, report: dict = None, page_stats: list = None,
+                 verbose: bool = False) -> str:
+    """
+    Extract text from a PDF or image held in memory
+
+    Args:
+        file_bytes: File content
+        file_extension: ".pdf" or an image extension
+        policy: "fast", "cascade" or "best" (default: EXTRACTION_POLICY)
+        engines: Override the policy's OCR engines
+        preprocess: Override the policy's preprocessing switch
+        preprocess_mode: "adaptive" or "full" (default: PREPROCESS_MODE)
+        budget: From ocr_budget.new_budget (default: a fresh default budget)
+        report: Optional dict filled with the budget outcome and policy name
+        page_stats: Optional list; one dict per OCR'd page is appended
+            (not filled by the pooled fast path)
+        verbose: Print per-step progress
+
+    Returns:
+        Extracted text ("" when nothing could be read)
+    """
+    policy = get_policy(policy)
+    ext = (file_extension or "").lower()
+    engines = select_engines(engines or policy["pdf_engines" if ext == ".pdf" else "image_engines"])
+    if preprocess is not None:
+        policy["preprocess"] = preprocess
+    # The process pool only runs Tesseract on raw grayscale pages
+    policy["pooled"] = (policy["pooled"] and not policy["preprocess"]
+                        and len(engines) == 1 and ENGINES[engines[0]]["pooled"])
+    budget = budget or new_budget()
+
+    log_step("Extraction", "info", f"{ext} with {policy['name']} policy")
+
+    text = ""
+    try:
+        if ext == ".pdf":
+            text = _pdf_text(file_bytes, policy, engines, budget,
+                             preprocess_mode, page_stats, verbose)
+        elif ext in IMAGE_EXTENSIONS:
+            text = _image_text(file_bytes, policy, engines, budget,
+                               preprocess_mode, page_stats, verbose)
+        else:
+            log_step("Extraction", "error", f"Unsupported file type: {ext}")
+    except Exception as e:
+        log_step("Extraction", "error", str(e))
+
+    if not text:
+        log_step("Extraction", "error", "No text extracted")
+
+    if report is not None:
+        report.update(budget_report(budget))
+        report["policy"] = policy["name"]
+    return text
+
+
+# ============================================
+# HEADER REGION (phase one)
+# ============================================
+
+# Share of page one, from the top, OCR'd by the header pass
+HEADER_REGION_FRACTION = float(os.getenv("HEADER_REGION_FRACTION", "0.3"))
+# Metadata extraction only reads the start of the text anyway
+HEADER_MAX_CHARS = 1500
+
+
+def extract_header_text(file_bytes: bytes, file_extension: str, fraction: float = None,
+                        report: dict = None) -> str:
+    """
+    Quick text from the top of page one (patient, date, report type)
+
+    Page one's text layer is used when it has one. Otherwise only page one
+    is rendered (or the image decoded), rotated upright, and the top
+    `fraction` of it OCR'd with Tesseract.
+
+    Args:
+        fraction: Share of the page height to OCR (default: HEADER_REGION_FRACTION)
+        report: Optional dict filled with {"source": "text_layer" | "ocr" | None,
+            "seconds": float}
+
+    Returns:
+        Header text ("" when nothing could be read)
+    """
+    started = time.perf_counter()
+    fraction = fraction or HEADER_REGION_FRACTION
+    ext = (file_extension or "").lower()
+    budget = new_budget()
+    source = None
+    text = ""
+    gray = None
+
+    if ext == ".pdf":
+        page_info = {}
+        try:
+            page_texts, _ = read_text_layer(file_bytes=file_bytes, max_pages=1, page_info=page_info)
+            _record("pdf_text", 1, time.perf_counter() - started)
+        except Exception as e:
+            page_texts = {}
+            log_step("Header text layer", "warning", f"Failed: {e}")
+
+        if page_texts.get(1):
+            text, source = page_texts[1][:HEADER_MAX_CHARS], "text_layer"
+        else:
+            for _, img in iter_pdf_pages(file_bytes=file_bytes, grayscale=True, page_numbers=[1],
+                                         max_pixels=budget["max_pixels"],
+                                         page_sizes=page_info.get("sizes")):
+                gray = image_to_gray(img)
+    elif ext in IMAGE_EXTENSIONS:
+        gray = decode_image_gray(file_bytes, budget)
+
+    if gray is not None and select_engines(["tesseract"]):
+        # Rotate the whole page first so "top" means the top of the text
+        if OCR_DESKEW:
+            gray = correct_orientation(gray)
+        header = gray[:max(1, int(gray.shape[0] * fraction))]
+
+        ocr_started = time.perf_counter()
+        try:
+            text, _ = ENGINES["tesseract"]["run"](header)
+            _record("tesseract", 1, time.perf_counter() - ocr_started)
+        except Exception as e:
+            _record("tesseract", 1, time.perf_counter() - ocr_started, failed=True)
+            log_step("Header OCR", "warning", f"Failed: {e}")
+        text, source = text.strip()[:HEADER_MAX_CHARS], "ocr"
+
+    if report is not None:
+        report.update({"source": source, "seconds": round(time.perf_counter() - started, 3)})
+    return text
@@ -2,10 +2,14 @@
 
 import os
 import re
+import time
+import threading
+import importlib.util
 import cv2
 import numpy as np
 from PIL import Image
-import pdfplumber
+
+from rag_pipeline.orientation import OCR_DESKEW, correct_orientation
 
 # OCR libraries
 try:
@@ -15,159 +19,429 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     print("⚠️ Tesseract not available")
 
-try:
-    from paddleocr import PaddleOCR
-    PADDLE_AVAILABLE = True
-    paddle_ocr = PaddleOCR(
-        use_angle_cls=True,
-        lang='en',
-        use_gpu=False,
-        det_db_thresh=0.3,
-        det_db_box_thresh=0.5,
-        det_db_unclip_ratio=2.0,
-        rec_batch_num=6,
-        show_log=False
-    )
-    print("✅ PaddleOCR initialized")
-except:
-    PADDLE_AVAILABLE = False
-    paddle_ocr = None
-    print("⚠️ PaddleOCR not available")
+# PaddleOCR and EasyOCR load large models; they are only constructed on
+# first use (or by warm_up_ocr_engines), never at import time.
+PADDLE_AVAILABLE = importlib.util.find_spec("paddleocr") is not None
+EASYOCR_AVAILABLE = importlib.util.find_spec("easyocr") is not None
+paddle_ocr = None
+easyocr_reader = None
+PADDLE_REC_BATCH_NUM = int(os.getenv("PADDLE_REC_BATCH_NUM", "6"))
+# Per-line angle classifier; redundant once pages are rotated upright up front
+PADDLE_USE_ANGLE_CLS = os.getenv(
+    "PADDLE_USE_ANGLE_CLS", "false" if OCR_DESKEW else "true"
+).lower() in ("1", "true", "yes")
+_engine_init_lock = threading.Lock()
 
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-    easyocr_reader = easyocr.Reader(['en'], gpu=False)
-    print("✅ EasyOCR initialized")
-except:
-    EASYOCR_AVAILABLE = False
-    easyocr_reader = None
-    print("⚠️ EasyOCR not available")
-
-
-def preprocess_image(img_array: np.ndarray, verbose: bool = False) -> np.ndarray:
-    """Optimized preprocessing for medical documents"""
+
+def get_paddle_ocr():
+    """Return the shared PaddleOCR instance, building it on first call"""
+    global paddle_ocr, PADDLE_AVAILABLE
+    
+    if paddle_ocr is None and PADDLE_AVAILABLE:
+        with _engine_init_lock:
+            if paddle_ocr is None and PADDLE_AVAILABLE:
+                try:
+                    from paddleocr import PaddleOCR
+                    # PaddleOCR 3.x arguments (requirements.txt pins 3.3.2)
+                    paddle_ocr = PaddleOCR(
+                        lang='en',
+                        device='cpu',
+                        use_doc_orientation_classify=False,
+                        use_doc_unwarping=False,
+                        use_textline_orientation=PADDLE_USE_ANGLE_CLS,
+                        text_det_thresh=0.3,
+                        text_det_box_thresh=0.5,
+                        text_det_unclip_ratio=2.0,
+                        text_recognition_batch_size=PADDLE_REC_BATCH_NUM
+                    )
+                    print("✅ PaddleOCR initialized")
+                except Exception as e:
+                    PADDLE_AVAILABLE = False
+                    print(f"⚠️ PaddleOCR not available: {e}")
+    
+    return paddle_ocr
+
+
+def get_easyocr_reader():
+    """Return the shared EasyOCR reader, building it on first call"""
+    global easyocr_reader, EASYOCR_AVAILABLE
+    
+    if easyocr_reader is None and EASYOCR_AVAILABLE:
+        with _engine_init_lock:
+            if easyocr_reader is None and EASYOCR_AVAILABLE:
+                try:
+                    import easyocr
+                    easyocr_reader = easyocr.Reader(['en'], gpu=False)
+                    print("✅ EasyOCR initialized")
+                except Exception as e:
+                    EASYOCR_AVAILABLE = False
+                    print(f"⚠️ EasyOCR not available: {e}")
+    
+    return easyocr_reader
+
+
+def warm_up_ocr_engines(engines: list = None) -> dict:
+    """
+    Load OCR models ahead of time
+    
+    Meant for the gunicorn master (see gunicorn.conf.py) so forked workers
+    share the loaded models copy-on-write instead of each loading their own.
+    
+    Args:
+        engines: Subset of ["paddle", "easyocr"] (default: both)
+    
+    Returns:
+        {engine: loaded (bool)}
+    """
+    engines = engines or ["paddle", "easyocr"]
+    loaders = {"paddle": get_paddle_ocr, "easyocr": get_easyocr_reader}
+    
+    loaded = {}
+    for engine in engines:
+        started = time.perf_counter()
+        loaded[engine] = loaders[engine]() is not None
+        print(f"   {engine}: {'loaded' if loaded[engine] else 'unavailable'} "
+              f"in {time.perf_counter() - started:.1f}s", flush=True)
+    return loaded
+
+
+# "adaptive": measure the page first and run only the steps it needs
+# "full": always denoise + CLAHE + adaptive threshold (previous behaviour)
+PREPROCESS_MODE = os.getenv("PREPROCESS_MODE", "adaptive").lower()
+
+# Noise sigma (grey levels) above which the page is denoised
+PREPROCESS_NOISE_SIGMA = float(os.getenv("PREPROCESS_NOISE_SIGMA", "3.0"))
+# p95 - p5 grey-level spread below which contrast is enhanced
+PREPROCESS_MIN_CONTRAST = float(os.getenv("PREPROCESS_MIN_CONTRAST", "120"))
+# Share of near-black/near-white pixels above which the page counts as already clean
+PREPROCESS_CLEAN_FRACTION = 0.9
+# Shorter side (px) below which the image is upscaled before OCR
+PREPROCESS_MIN_SHORT_SIDE = 1000
+
+ANALYSIS_MAX_SIDE = 800
+NOISE_SAMPLE_SIZE = 512
+
+
+def analyze_image(gray: np.ndarray) -> dict:
+    """
+    Cheap page statistics used to plan preprocessing
+    
+    Contrast and cleanliness are measured on a copy downsampled to at most
+    ANALYSIS_MAX_SIDE px; noise is measured on a full-resolution centre crop
+    (downsampling would average the noise away).
+    
+    Returns:
+        {"noise_sigma": float, "contrast": float, "clean_fraction": float,
+         "short_side": int}
+    """
+    h, w = gray.shape[:2]
+    
+    scale = ANALYSIS_MAX_SIDE / max(h, w)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+    
+    p5, p95 = np.percentile(small, (5, 95))
+    clean_fraction = float(np.count_nonzero((small < 40) | (small > 215))) / small.size
+    
+    # Immerkaer's fast noise estimate on a centre crop
+    cy, cx = h // 2, w // 2
+    half = NOISE_SAMPLE_SIZE // 2
+    crop = gray[max(0, cy - half):cy + half, max(0, cx - half):cx + half].astype(np.float32)
+    noise_sigma = 0.0
+    if crop.shape[0] > 2 and crop.shape[1] > 2:
+        kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = cv2.filter2D(crop, -1, kernel)[1:-1, 1:-1]
+        noise_sigma = float(np.sqrt(np.pi / 2) * np.abs(response).sum()
+                            / (6 * response.shape[0] * response.shape[1]))
+    
+    return {
+        "noise_sigma": round(noise_sigma, 2),
+        "contrast": float(p95 - p5),
+        "clean_fraction": round(clean_fraction, 3),
+        "short_side": int(min(h, w))
+    }
+
+
+def plan_preprocessing(stats: dict) -> list:
+    """Pick preprocessing steps from analyze_image output"""
+    steps = []
+    
+    if stats["short_side"] < PREPROCESS_MIN_SHORT_SIDE:
+        steps.append("upscale")
+    
+    if stats["clean_fraction"] >= PREPROCESS_CLEAN_FRACTION and stats["noise_sigma"] < PREPROCESS_NOISE_SIGMA:
+        # Born-digital or clean scan: the OCR engines binarize it fine themselves
+        return steps
+    
+    if stats["noise_sigma"] >= PREPROCESS_NOISE_SIGMA:
+        steps.append("denoise")
+    if stats["contrast"] < PREPROCESS_MIN_CONTRAST:
+        steps.append("clahe")
+    steps.append("threshold")
+    return steps
+
+
+def preprocess_image(img_array: np.ndarray, verbose: bool = False, mode: str = None,
+                     report: dict = None, deskew: bool = None) -> np.ndarray:
+    """
+    Optimized preprocessing for medical documents
+    
+    Args:
+        img_array: RGB/BGR or grayscale image
+        verbose: Print progress
+        mode: "adaptive" or "full" (default: PREPROCESS_MODE)
+        report: Optional dict filled with the measured stats, steps and timing
+        deskew: Rotate the page upright and level first (default: OCR_DESKEW)
+    """
     if verbose:
         print("  🔧 Preprocessing image...", flush=True)
     
     if img_array is None or img_array.size == 0:
         return img_array
     
+    started = time.perf_counter()
+    mode = (mode or PREPROCESS_MODE).lower()
+    
     # Convert to grayscale
     if len(img_array.shape) == 3:
         gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
     else:
         gray = img_array
     
+    if deskew is None:
+        deskew = OCR_DESKEW
+    
+    orientation = None
+    if deskew:
+        orientation = {}
+        gray = correct_orientation(gray, report=orientation)
+    
+    if mode == "full":
+        stats = None
+        steps = ["denoise", "clahe", "threshold"]
+    else:
+        stats = analyze_image(gray)
+        steps = plan_preprocessing(stats)
+    
+    processed = gray
+    
+    if "upscale" in steps:
+        processed = cv2.resize(processed, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    
     # Denoise
-    denoised = cv2.fastNlMeansDenoising(gray, h=10)
+    if "denoise" in steps:
+        strength = 10 if stats is None else min(15, max(5, stats["noise_sigma"] * 2))
+        processed = cv2.fastNlMeansDenoising(processed, h=strength)
     
     # Enhance contrast
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(denoised)
+    if "clahe" in steps:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        processed = clahe.apply(processed)
     
     # Adaptive threshold
-    binary = cv2.adaptiveThreshold(
-        enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY, 11, 2
-    )
+    if "threshold" in steps:
+        processed = cv2.adaptiveThreshold(
+            processed, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY, 11, 2
+        )
+    
+    elapsed = time.perf_counter() - started
+    
+    if report is not None:
+        report.update({"mode": mode, "stats": stats, "steps": steps, "orientation": orientation,
+                       "seconds": round(elapsed, 3)})
     
     if verbose:
-        print("    ✅ Preprocessing complete", flush=True)
+        if orientation:
+            print(f"    rotation={orientation['rotation']}°, skew={orientation['skew']:+.1f}° "
+                  f"({orientation['seconds']:.3f}s)", flush=True)
+        if stats:
+            print(f"    noise σ={stats['noise_sigma']}, contrast={stats['contrast']:.0f}, "
+                  f"clean={stats['clean_fraction']:.2f}, short side={stats['short_side']}px", flush=True)
+        print(f"    ✅ Preprocessing complete: {', '.join(steps) or 'no steps'} ({elapsed:.2f}s)", flush=True)
     
-    return binary
+    return processed
+
+
+def _run_paddle(img_array: np.ndarray) -> tuple:
+    """PaddleOCR pass; returns (text, mean line confidence)"""
+    return _run_paddle_batch([img_array])[0]
+
+
+def _run_tesseract(img_array: np.ndarray) -> tuple:
+    """Tesseract pass; returns (text, mean word confidence)"""
+    pil_img = Image.fromarray(img_array)
+    
+    # PSM 6 (uniform block of text); image_to_data gives text and confidences in one pass
+    data = pytesseract.image_to_data(
+        pil_img,
+        lang='eng',
+        config='--oem 3 --psm 6',
+        output_type=pytesseract.Output.DICT
+    )
+    
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        word = (word or '').strip()
+        if not word:
+            continue
+        line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(line_key, []).append(word)
+        conf = float(data['conf'][i])
+        if conf >= 0:
+            confidences.append(conf / 100.0)
+    
+    text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+    mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+    return text, mean_conf
+
+
+def _run_easyocr(img_array: np.ndarray) -> tuple:
+    """EasyOCR pass; returns (text, mean detection confidence)"""
+    reader = get_easyocr_reader()
+    if reader is None:
+        return "", 0.0
+    
+    result = reader.readtext(img_array)
+    
+    kept = [item for item in result if item[2] > 0.3]
+    mean_conf = sum(float(item[2]) for item in kept) / len(kept) if kept else 0.0
+    return "\n".join(item[1] for item in kept), mean_conf
+
+
+def _paddle_lines(result) -> tuple:
+    """(text, mean line confidence) from one PaddleOCR 3.x predict() result"""
+    lines = [
+        (text.strip(), float(confidence))
+        for text, confidence in zip(result.get("rec_texts") or [], result.get("rec_scores") or [])
+        if confidence >= 0.3 and text and text.strip()
+    ]
+    if not lines:
+        return "", 0.0
+    return "\n".join(t for t, _ in lines), sum(c for _, c in lines) / len(lines)
+
+
+def _run_paddle_batch(images: list) -> list:
+    """
+    PaddleOCR over many images in one predict() call
+    
+    The pipeline detects text per image, then recognises the text lines of
+    the whole batch together, text_recognition_batch_size at a time, so the
+    recogniser fills its batches even when each page only has a few lines.
+    
+    Returns:
+        [(text, mean line confidence), ...] aligned with images
+    """
+    ocr = get_paddle_ocr()
+    if ocr is None:
+        return [("", 0.0)] * len(images)
+    
+    # The detector expects 3-channel input
+    batch = [img if img.ndim == 3 else cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) for img in images]
+    results = list(ocr.predict(batch))
+    if len(results) != len(images):
+        raise RuntimeError(f"PaddleOCR returned {len(results)} results for {len(images)} images")
+    
+    return [_paddle_lines(result) for result in results]
+
+
+def _extract_with(engine: str, img_array: np.ndarray, verbose: bool = False) -> str:
+    """Run one engine from the rag_pipeline.extraction registry; failures give ''"""
+    from rag_pipeline import extraction
+    return extraction.run_engine(engine, img_array, verbose=verbose)[0]
 
 
 def extract_with_paddle(img_array: np.ndarray, verbose: bool = False) -> str:
     """Extract text using PaddleOCR"""
-    if not PADDLE_AVAILABLE:
-        return ""
-    
-    try:
-        if verbose:
-            print("    → PaddleOCR...", flush=True)
-        
-        result = paddle_ocr.ocr(img_array, cls=True)
-        
-        if not result or not result[0]:
-            return ""
-        
-        texts = []
-        for line in result[0]:
-            if line and len(line) >= 2:
-                text_info = line[1]
-                if isinstance(text_info, (list, tuple)) and len(text_info) >= 2:
-                    text = text_info[0]
-                    confidence = text_info[1]
-                    
-                    if confidence >= 0.3 and text.strip():
-                        texts.append(text.strip())
-        
-        extracted = "\n".join(texts)
-        
-        if verbose and extracted:
-            print(f"      ✓ {len(extracted)} chars extracted", flush=True)
-        
-        return extracted
-        
-    except Exception as e:
-        if verbose:
-            print(f"      ✗ PaddleOCR failed: {e}", flush=True)
-        return ""
+    return _extract_with("paddle", img_array, verbose=verbose)
 
 
 def extract_with_tesseract(img_array: np.ndarray, verbose: bool = False) -> str:
     """Extract text using Tesseract"""
-    if not TESSERACT_AVAILABLE:
-        return ""
-    
-    try:
-        if verbose:
-            print("    → Tesseract...", flush=True)
-        
-        pil_img = Image.fromarray(img_array)
-        
-        # Try PSM 6 (uniform block of text)
-        text = pytesseract.image_to_string(
-            pil_img,
-            lang='eng',
-            config='--oem 3 --psm 6'
-        )
-        
-        if verbose and text.strip():
-            print(f"      ✓ {len(text)} chars extracted", flush=True)
-        
-        return text.strip()
-        
-    except Exception as e:
-        if verbose:
-            print(f"      ✗ Tesseract failed: {e}", flush=True)
-        return ""
+    return _extract_with("tesseract", img_array, verbose=verbose)
 
 
 def extract_with_easyocr(img_array: np.ndarray, verbose: bool = False) -> str:
     """Extract text using EasyOCR"""
-    if not EASYOCR_AVAILABLE:
-        return ""
-    
-    try:
-        if verbose:
-            print("    → EasyOCR...", flush=True)
-        
-        result = easyocr_reader.readtext(img_array)
-        
-        texts = [item[1] for item in result if item[2] > 0.3]
-        extracted = "\n".join(texts)
-        
-        if verbose and extracted:
-            print(f"      ✓ {len(extracted)} chars extracted", flush=True)
-        
-        return extracted
-        
-    except Exception as e:
-        if verbose:
-            print(f"      ✗ EasyOCR failed: {e}", flush=True)
-        return ""
+    return _extract_with("easyocr", img_array, verbose=verbose)
+
+
+# ============================================
+# ENGINE CASCADE
+# ============================================
+
+# "cascade": fastest engine first, stop once the result scores well enough
+# "best": run every engine and keep the longest output (previous behaviour)
+OCR_ENGINE_MODE = os.getenv("OCR_ENGINE_MODE", "cascade").lower()
+OCR_CASCADE_THRESHOLD = float(os.getenv("OCR_CASCADE_THRESHOLD", "0.75"))
+
+# Cheapest first on CPU
+CASCADE_ORDER = ["tesseract", "paddle", "easyocr"]
+PDF_PAGE_ENGINES = ["tesseract", "paddle"]
+
+# Scanned pages OCR'd together so PaddleOCR can batch recognition across them
+OCR_PAGE_BATCH = int(os.getenv("OCR_PAGE_BATCH", "4"))
+
+# Words common in lab reports; supplemented by a system word list when present
+REPORT_VOCABULARY = {
+    "patient", "name", "age", "sex", "male", "female", "date", "report", "test",
+    "result", "results", "value", "unit", "units", "range", "reference", "normal",
+    "high", "low", "blood", "serum", "plasma", "urine", "sample", "specimen",
+    "hemoglobin", "haemoglobin", "glucose", "fasting", "cholesterol", "triglycerides",
+    "creatinine", "urea", "bilirubin", "protein", "albumin", "vitamin", "iron",
+    "platelet", "platelets", "count", "total", "direct", "indirect", "cells",
+    "lymphocytes", "neutrophils", "monocytes", "eosinophils", "basophils", "rbc",
+    "wbc", "hdl", "ldl", "vldl", "tsh", "sodium", "potassium", "chloride", "calcium",
+    "doctor", "hospital", "laboratory", "lab", "method", "interpretation", "remarks",
+    "collected", "received", "reported", "ref", "by", "dr", "mr", "mrs", "ms",
+    "the", "of", "and", "in", "to", "for", "is", "on", "with", "not", "as", "at",
+    "function", "liver", "kidney", "thyroid", "lipid", "profile", "complete",
+}
+OCR_WORDLIST_PATH = os.getenv("OCR_WORDLIST_PATH", "/usr/share/dict/words")
+_dictionary = None
+
+
+def _get_dictionary() -> set:
+    global _dictionary
+    if _dictionary is None:
+        words = set(REPORT_VOCABULARY)
+        try:
+            with open(OCR_WORDLIST_PATH, encoding="utf-8", errors="ignore") as f:
+                words.update(line.strip().lower() for line in f if line.strip())
+        except OSError:
+            pass
+        _dictionary = words
+    return _dictionary
+
+
+def dictionary_word_ratio(text: str) -> float:
+    """Share of alphabetic tokens (2+ letters) that are known words"""
+    tokens = re.findall(r"[A-Za-z]{2,}", text or "")
+    if not tokens:
+        return 0.0
+    dictionary = _get_dictionary()
+    known = sum(1 for t in tokens if t.lower() in dictionary)
+    return known / len(tokens)
+
+
+def score_ocr_result(text: str, confidence: float) -> float:
+    """Blend engine confidence with dictionary-word ratio (0.0 to 1.0)"""
+    if not text or len(text.strip()) < 20:
+        return 0.0
+    return round(0.6 * confidence + 0.4 * dictionary_word_ratio(text), 3)
+
+
+def ocr_images(images: list, mode: str = None, engines: list = None,
+               verbose: bool = False) -> list:
+    """OCR several preprocessed images; see rag_pipeline.extraction.ocr_images"""
+    from rag_pipeline import extraction
+    return extraction.ocr_images(images, mode=mode, engines=engines, verbose=verbose)
+
+
+def ocr_image(img_array: np.ndarray, mode: str = None, engines: list = None,
+              verbose: bool = False) -> dict:
+    """OCR one preprocessed image; see rag_pipeline.extraction.ocr_images for the result fields"""
+    return ocr_images([img_array], mode=mode, engines=engines, verbose=verbose)[0]
 
 
 def postprocess_text(text: str) -> str:
@@ -196,197 +470,76 @@ def postprocess_text(text: str) -> str:
     return text.strip()
 
 
-def extract_text_universal(file_path: str, use_preprocessing: bool = True, verbose: bool = False) -> str:
+def _page_stat(page_number: int, result: dict, prep: dict = None) -> dict:
+    return {
+        "page": page_number,
+        "preprocess": prep or None,
+        "engine": result["engine"],
+        "score": result["score"],
+        "engines_run": result["engines_run"],
+        "seconds": result["seconds"],
+        "saved_seconds": result["saved_seconds"]
+    }
+
+
+def extract_text_universal(file_path: str, use_preprocessing: bool = True, verbose: bool = False,
+                           ocr_mode: str = None, page_stats: list = None,
+                           preprocess_mode: str = None, engines: list = None) -> str:
     """
     Universal text extraction from images and PDFs
     
+    Reads the file and runs it through rag_pipeline.extraction.extract_text
+    with the "cascade" or "best" policy.
+    
     Args:
         file_path: Path to file
         use_preprocessing: Apply image preprocessing (default: True)
         verbose: Print progress (default: False)
+        ocr_mode: "cascade" or "best" (default: OCR_ENGINE_MODE)
+        page_stats: Optional list; one dict per OCR'd page is appended with
+            the winning engine, its score, time spent and time saved
+        preprocess_mode: "adaptive" or "full" (default: PREPROCESS_MODE)
+        engines: Restrict OCR to these engines
+            (default: CASCADE_ORDER for images, PDF_PAGE_ENGINES for PDFs)
     
     Returns:
         Extracted text string
     """
+    from rag_pipeline import extraction
+    
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext != '.pdf' and ext not in extraction.IMAGE_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {file_path}")
+    
     if verbose:
         print(f"\n{'='*80}", flush=True)
         print(f"🔍 OCR EXTRACTION: {os.path.basename(file_path)}", flush=True)
         print(f"{'='*80}", flush=True)
     
-    # ============================================
-    # IMAGE FILES
-    # ============================================
-    if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif', '.webp')):
-        if verbose:
-            print("📸 Image file detected", flush=True)
-        
-        try:
-            # Load image
-            img = Image.open(file_path)
-            img_array = np.array(img)
-            
-            if verbose:
-                print(f"   Image size: {img.size}", flush=True)
-            
-            # Preprocess
-            if use_preprocessing:
-                processed = preprocess_image(img_array, verbose=verbose)
-            else:
-                if len(img_array.shape) == 3:
-                    processed = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-                else:
-                    processed = img_array
-            
-            # Try multiple OCR engines
-            results = []
-            
-            # Try PaddleOCR
-            paddle_text = extract_with_paddle(processed, verbose=verbose)
-            if paddle_text:
-                results.append(("PaddleOCR", paddle_text))
-            
-            # Try Tesseract
-            tesseract_text = extract_with_tesseract(processed, verbose=verbose)
-            if tesseract_text:
-                results.append(("Tesseract", tesseract_text))
-            
-            # Try EasyOCR
-            easyocr_text = extract_with_easyocr(processed, verbose=verbose)
-            if easyocr_text:
-                results.append(("EasyOCR", easyocr_text))
-            
-            # Select best result (longest text)
-            if results:
-                best = max(results, key=lambda x: len(x[1]))
-                engine_name, text = best
-                
-                if verbose:
-                    print(f"\n  ✅ Best result: {engine_name} ({len(text)} chars)", flush=True)
-                
-                # Postprocess
-                cleaned = postprocess_text(text)
-                
-                if verbose:
-                    print(f"  ✅ Final text: {len(cleaned)} chars", flush=True)
-                    print(f"{'='*80}\n", flush=True)
-                
-                return cleaned
-            else:
-                if verbose:
-                    print("\n  ❌ No text extracted from any engine", flush=True)
-                    print(f"{'='*80}\n", flush=True)
-                return ""
-                
-        except Exception as e:
-            if verbose:
-                print(f"\n  ❌ Image processing failed: {e}", flush=True)
-                print(f"{'='*80}\n", flush=True)
-            return ""
-    
-    # ============================================
-    # PDF FILES
-    # ============================================
-    elif file_path.lower().endswith('.pdf'):
-        if verbose:
-            print("📄 PDF file detected", flush=True)
-        
-        # Try pdfplumber first (for selectable PDFs)
-        try:
-            if verbose:
-                print("  → Trying pdfplumber...", flush=True)
-            
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for i, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n\n"
-                
-                if text.strip() and len(text.strip()) > 100:
-                    if verbose:
-                        print(f"  ✅ pdfplumber: {len(text)} chars from {len(pdf.pages)} pages", flush=True)
-                        print(f"{'='*80}\n", flush=True)
-                    return text.strip()
-                else:
-                    if verbose:
-                        print(f"  ⚠️ pdfplumber: insufficient text ({len(text.strip())} chars)", flush=True)
-                        
-        except Exception as e:
-            if verbose:
-                print(f"  ⚠️ pdfplumber failed: {e}", flush=True)
-        
-        # Scanned PDF - convert to images and use OCR
-        if verbose:
-            print("  → Scanned PDF - using OCR...", flush=True)
-        
-        try:
-            from pdf2image import convert_from_path
-            
-            images = convert_from_path(file_path, dpi=300)
-            
-            if verbose:
-                print(f"     Converted to {len(images)} images", flush=True)
-            
-            all_text = []
-            
-            for i, img in enumerate(images, 1):
-                if verbose:
-                    print(f"\n  📄 Processing page {i}/{len(images)}...", flush=True)
-                
-                img_array = np.array(img)
-                
-                # Preprocess
-                if use_preprocessing:
-                    processed = preprocess_image(img_array, verbose=verbose)
-                else:
-                    if len(img_array.shape) == 3:
-                        processed = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-                    else:
-                        processed = img_array
-                
-                # Try OCR engines
-                page_text = ""
-                
-                # Try PaddleOCR
-                paddle_text = extract_with_paddle(processed, verbose=verbose)
-                if paddle_text and len(paddle_text) > len(page_text):
-                    page_text = paddle_text
-                
-                # Try Tesseract
-                tesseract_text = extract_with_tesseract(processed, verbose=verbose)
-                if tesseract_text and len(tesseract_text) > len(page_text):
-                    page_text = tesseract_text
-                
-                if page_text:
-                    all_text.append(page_text)
-            
-            combined = "\n\n".join(all_text)
-            
-            if combined.strip():
-                cleaned = postprocess_text(combined)
-                
-                if verbose:
-                    print(f"\n  ✅ OCR complete: {len(cleaned)} chars from {len(all_text)} pages", flush=True)
-                    print(f"{'='*80}\n", flush=True)
-                
-                return cleaned
-            else:
-                if verbose:
-                    print(f"\n  ❌ No text extracted from PDF", flush=True)
-                    print(f"{'='*80}\n", flush=True)
-                return ""
-                
-        except Exception as e:
-            if verbose:
-                print(f"\n  ❌ PDF OCR failed: {e}", flush=True)
-                print(f"{'='*80}\n", flush=True)
-            return ""
+    with open(file_path, "rb") as f:
+        file_bytes = f.read()
     
-    else:
-        raise ValueError(f"Unsupported file type: {file_path}")
+    text = extraction.extract_text(
+        file_bytes, ext,
+        policy=(ocr_mode or OCR_ENGINE_MODE),
+        engines=engines,
+        preprocess=use_preprocessing,
+        preprocess_mode=preprocess_mode,
+        page_stats=page_stats,
+        verbose=verbose
+    )
+    
+    if verbose:
+        if text:
+            print(f"  ✅ Final text: {len(text)} chars", flush=True)
+        else:
+            print("  ❌ No text extracted", flush=True)
+        print(f"{'='*80}\n", flush=True)
+    
+    return text
 
 
 # Test function
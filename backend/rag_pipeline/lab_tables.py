@@ -0,0 +1,203 @@
+# backend/rag_pipeline/lab_tables.py
+
+import io
+import re
+
+LAB_TABLES_VERSION = 1
+
+# Header keywords per column role, checked in this order
+# ("Reference Value" must map to reference, not value)
+HEADER_KEYWORDS = [
+    ("reference_range", ["reference", "ref.", "ref ", "range", "normal", "interval", "biological"]),
+    ("unit", ["unit"]),
+    ("value", ["result", "value", "observed", "reading"]),
+    ("test", ["test", "investigation", "parameter", "description", "analyte", "examination"]),
+]
+
+SKIP_TESTS = ['patient', 'age', 'gender', 'sex', 'lab', 'registered', 'reported',
+              'collected', 'received', 'sample', 'name', 'date', 'page', 'test description']
+
+NUMBER_RE = re.compile(r'^[<>≤≥]?\s*\d+(?:[.,]\d+)?$')
+VALUE_UNIT_RE = re.compile(r'^([<>≤≥]?\s*\d+(?:\.\d+)?)\s*([a-zA-Zµμ%/][\w/\^µμ%.\-]*)$')
+UNIT_RE = re.compile(r'^(?:%|[a-zA-Zµμ][\w/\^µμ%.\-]{0,14}|10\^\d+/[a-zA-Zµμ]+)$')
+RANGE_RE = re.compile(r'(\d+(?:\.\d+)?\s*[-–]\s*\d+(?:\.\d+)?|^[<>≤≥]\s*\d|^(?:up to|upto)\s*\d)', re.I)
+
+
+def _clean_cell(cell) -> str:
+    if cell is None:
+        return ""
+    return " ".join(str(cell).split())
+
+
+def detect_header(row: list) -> dict:
+    """
+    Map column roles from a header row
+
+    Returns:
+        {role: column_index} when at least a test/value pair is found, else {}
+    """
+    columns = {}
+    for idx, cell in enumerate(row):
+        text = _clean_cell(cell).lower()
+        if not text:
+            continue
+        for role, keywords in HEADER_KEYWORDS:
+            if role not in columns and any(k in text for k in keywords):
+                columns[role] = idx
+                break
+
+    if "value" in columns and ("test" in columns or columns["value"] > 0):
+        columns.setdefault("test", 0)
+        return columns
+    return {}
+
+
+def parse_lab_row(row: list, columns: dict = None) -> dict:
+    """
+    Turn one table row into a lab result
+
+    Args:
+        row: Table cells
+        columns: Role -> column index from detect_header (None: infer from content)
+
+    Returns:
+        {"test", "value", "unit", "reference_range"} or None if the row
+        is not a result line
+    """
+    cells = [_clean_cell(c) for c in row]
+
+    if columns:
+        if detect_header(row):
+            return None  # header repeated on a later page/row
+
+        def cell(role):
+            idx = columns.get(role)
+            return cells[idx] if idx is not None and idx < len(cells) else ""
+
+        test = cell("test")
+        value = cell("value")
+        unit = cell("unit")
+        reference = cell("reference_range")
+    else:
+        test = value = unit = reference = ""
+        value_idx = None
+        for idx, text in enumerate(cells):
+            if NUMBER_RE.match(text) or VALUE_UNIT_RE.match(text):
+                value_idx = idx
+                value = text
+                break
+        if value_idx is None:
+            return None
+
+        test = next((c for c in reversed(cells[:value_idx]) if re.search(r'[a-zA-Z]{2,}', c)), "")
+        for text in cells[value_idx + 1:]:
+            if not reference and RANGE_RE.search(text):
+                reference = text
+            elif not unit and UNIT_RE.match(text):
+                unit = text
+
+    # "14.5 g/dL" in a single cell
+    if value and not unit:
+        match = VALUE_UNIT_RE.match(value)
+        if match:
+            value, unit = match.group(1), match.group(2)
+
+    if not test or not value or len(test) < 2:
+        return None
+    if not re.search(r'[a-zA-Z]{2,}', test):
+        return None
+    if any(test.lower().startswith(s) for s in SKIP_TESTS):
+        return None
+
+    return {
+        "test": test,
+        "value": value,
+        "unit": unit or None,
+        "reference_range": reference or None
+    }
+
+
+def parse_lab_table(table: list) -> list:
+    """Parse a pdfplumber table (list of rows) into lab results"""
+    columns = {}
+    start = 0
+    for idx, row in enumerate(table[:3]):
+        columns = detect_header(row)
+        if columns:
+            start = idx + 1
+            break
+
+    results = []
+    for row in table[start:]:
+        parsed = parse_lab_row(row, columns or None)
+        if parsed:
+            results.append(parsed)
+    return results
+
+
+def extract_lab_results(file_bytes: bytes = None, file_path: str = None) -> list:
+    """
+    Structured lab rows from the tables in a PDF's text layer
+
+    Args:
+        file_bytes: PDF content (use this or file_path)
+        file_path: Path to a PDF on disk
+
+    Returns:
+        [{"test", "value", "unit", "reference_range", "page"}, ...]
+    """
+    import pdfplumber
+
+    source = io.BytesIO(file_bytes) if file_bytes is not None else file_path
+    results = []
+    seen = set()
+
+    with pdfplumber.open(source) as pdf:
+        for page_number, page in enumerate(pdf.pages, 1):
+            # Scanned pages have no characters, so there is nothing to detect
+            if not page.chars:
+                page.flush_cache()
+                continue
+
+            tables = page.extract_tables()
+            # Lab reports often align columns with whitespace instead of ruling lines
+            if not tables:
+                tables = page.extract_tables({
+                    "vertical_strategy": "text",
+                    "horizontal_strategy": "text"
+                })
+
+            for table in tables:
+                for row in parse_lab_table(table):
+                    key = (row["test"].lower(), row["value"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    row["page"] = page_number
+                    results.append(row)
+
+            page.flush_cache()
+
+    return results
+
+
+def build_structured_data(lab_results: list) -> dict:
+    """Payload stored in medical_reports_processed.structured_data_json"""
+    return {
+        "version": LAB_TABLES_VERSION,
+        "source": "pdf_tables",
+        "lab_results": lab_results
+    }
+
+
+def format_lab_results(lab_results: list) -> str:
+    """Compact one-line-per-test text for prompts and summaries"""
+    lines = []
+    for r in lab_results:
+        line = f"{r['test']}: {r['value']}"
+        if r.get('unit'):
+            line += f" {r['unit']}"
+        if r.get('reference_range'):
+            line += f" (ref {r['reference_range']})"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+# backend/rag_pipeline/ocr_budget.py
+
+import os
+import math
+import time
+
+# Per-document resource budgets for the OCR path
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "50"))
+# Pages above this are downscaled before OCR (10 MP is about A4 at 320 DPI)
+OCR_MAX_PAGE_MEGAPIXELS = float(os.getenv("OCR_MAX_PAGE_MEGAPIXELS", "10"))
+OCR_DOC_TIMEOUT = float(os.getenv("OCR_DOC_TIMEOUT", "120"))
+
+# Reason codes; the first two mean the text is partial
+REASON_PAGE_LIMIT = "page_limit"
+REASON_TIME_LIMIT = "time_limit"
+REASON_DOWNSCALED = "downscaled"
+TRUNCATING_REASONS = (REASON_PAGE_LIMIT, REASON_TIME_LIMIT)
+
+
+def new_budget(max_pages: int = None, max_megapixels: float = None,
+               timeout: float = None) -> dict:
+    """Budget state for one document; starts the clock"""
+    now = time.monotonic()
+    timeout = OCR_DOC_TIMEOUT if timeout is None else timeout
+    return {
+        "max_pages": max_pages or OCR_MAX_PAGES,
+        "max_pixels": int((max_megapixels or OCR_MAX_PAGE_MEGAPIXELS) * 1_000_000),
+        "started": now,
+        "deadline": now + timeout if timeout > 0 else None,
+        "reasons": [],
+        "pages_total": None,
+        "pages_processed": 0,
+        "downscaled_pages": [],
+    }
+
+
+def flag(budget: dict, reason: str):
+    if reason not in budget["reasons"]:
+        budget["reasons"].append(reason)
+
+
+def remaining_seconds(budget: dict) -> float:
+    """Seconds left before the deadline (None when there is no time limit)"""
+    if budget["deadline"] is None:
+        return None
+    return max(0.0, budget["deadline"] - time.monotonic())
+
+
+def budget_expired(budget: dict) -> bool:
+    """True once the deadline has passed; records the time_limit reason"""
+    if budget["deadline"] is not None and time.monotonic() >= budget["deadline"]:
+        flag(budget, REASON_TIME_LIMIT)
+        return True
+    return False
+
+
+def capped_dpi(width_pt: float, height_pt: float, dpi: int, max_pixels: int) -> int:
+    """Highest DPI up to `dpi` at which a page of this size stays within max_pixels"""
+    area = (width_pt / 72.0) * (height_pt / 72.0)
+    if area <= 0:
+        return dpi
+    return max(1, min(dpi, int(math.sqrt(max_pixels / area))))
+
+
+def fit_image(img, budget: dict, page_number: int = 1):
+    """
+    Downscale a PIL image that exceeds the pixel budget
+
+    Resizing needs the decoded bitmap; to decode a JPEG at reduced scale,
+    call draft_to_budget right after Image.open, before any pixel access.
+    """
+    width, height = img.size
+    if width * height <= budget["max_pixels"]:
+        return img
+
+    scale = math.sqrt(budget["max_pixels"] / (width * height))
+    target = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    img = img.resize(target) if img.size != target else img
+
+    budget["downscaled_pages"].append(page_number)
+    flag(budget, REASON_DOWNSCALED)
+    return img
+
+
+def draft_to_budget(img, budget: dict):
+    """
+    Ask a freshly opened (not yet loaded) JPEG to decode at reduced scale
+
+    draft() only works before the pixels are loaded; on other images this
+    does nothing and fit_image resizes after decoding.
+    """
+    width, height = img.size
+    if img.format != "JPEG" or width * height <= budget["max_pixels"]:
+        return img
+
+    scale = math.sqrt(budget["max_pixels"] / (width * height))
+    img.draft("L", (max(1, int(width * scale)), max(1, int(height * scale))))
+    return img
+
+
+def budget_report(budget: dict) -> dict:
+    """Outcome summary for logs and API responses"""
+    return {
+        "truncated": any(r in budget["reasons"] for r in TRUNCATING_REASONS),
+        "reasons": list(budget["reasons"]),
+        "pages_total": budget["pages_total"],
+        "pages_processed": budget["pages_processed"],
+        "downscaled_pages": list(budget["downscaled_pages"]),
+        "seconds": round(time.monotonic() - budget["started"], 3),
+    }
@@ -0,0 +1,142 @@
+# backend/rag_pipeline/ocr_cache.py
+
+import os
+import hashlib
+import threading
+
+# Content-addressed cache of extracted text, shared by all workers on a host
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_CACHE_DIR = os.getenv(
+    "OCR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".ocr_cache")
+)
+OCR_CACHE_MAX_BYTES = int(float(os.getenv("OCR_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_size_bytes = None  # lazily measured on first write
+
+
+def cache_key(file_bytes: bytes, file_extension: str, extractor_version: str) -> str:
+    """sha256 of the file content, scoped to file type and extractor version"""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    scope = f"{(file_extension or '').lower()}|{extractor_version}"
+    return hashlib.sha256(f"{digest}|{scope}".encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(OCR_CACHE_DIR, key[:2], f"{key}.txt")
+
+
+def _iter_entries():
+    if not os.path.isdir(OCR_CACHE_DIR):
+        return
+    for root, _, names in os.walk(OCR_CACHE_DIR):
+        for name in names:
+            if name.endswith(".txt"):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+
+def get_cached_text(key: str):
+    """Return cached text for key, or None on a miss"""
+    if not OCR_CACHE_ENABLED:
+        return None
+
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        os.utime(path, None)  # bump mtime so eviction is least-recently-used
+    except OSError:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+
+    with _lock:
+        _stats["hits"] += 1
+    return text
+
+
+def put_cached_text(key: str, text: str):
+    """Store text under key, evicting old entries when over the size budget"""
+    global _size_bytes
+
+    if not OCR_CACHE_ENABLED or not text:
+        return
+
+    path = _entry_path(key)
+    data = text.encode("utf-8")
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ OCR cache write failed: {e}", flush=True)
+        return
+
+    with _lock:
+        _stats["writes"] += 1
+        if _size_bytes is None:
+            _size_bytes = sum(size for _, size, _ in _iter_entries())
+        else:
+            _size_bytes += len(data)
+
+        if _size_bytes > OCR_CACHE_MAX_BYTES:
+            _evict_locked()
+
+
+def _evict_locked():
+    """Drop least-recently-used entries until the cache is under 90% of budget"""
+    global _size_bytes
+
+    entries = sorted(_iter_entries(), key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    target = int(OCR_CACHE_MAX_BYTES * 0.9)
+
+    for path, size, _ in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            _stats["evictions"] += 1
+        except OSError:
+            continue
+
+    _size_bytes = total
+
+
+def clear_cache() -> int:
+    """Remove every cached entry; returns the number of entries removed"""
+    global _size_bytes
+
+    removed = 0
+    with _lock:
+        for path, _, _ in list(_iter_entries()):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        _size_bytes = 0
+    return removed
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for this process plus on-disk usage"""
+    with _lock:
+        stats = dict(_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["size_bytes"] = _size_bytes
+    stats["enabled"] = OCR_CACHE_ENABLED
+    stats["max_bytes"] = OCR_CACHE_MAX_BYTES
+    return stats
@@ -0,0 +1,190 @@
+# backend/rag_pipeline/orientation.py
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Estimate page orientation and skew once, rotate once, then OCR
+OCR_DESKEW = os.getenv("OCR_DESKEW", "true").lower() in ("1", "true", "yes")
+
+# Longest side (px) of the copy the estimate runs on
+ORIENTATION_MAX_SIDE = 1000
+# Skew search range and resolution (degrees)
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_COARSE_STEP = 0.5
+DESKEW_FINE_STEP = 0.1
+# Skew below this is left alone (not worth a full-resolution warp)
+DESKEW_MIN_ANGLE = 0.2
+# Sideways only when the rotated profile is clearly sharper
+SIDEWAYS_RATIO = 1.5
+# Upside down only when descender-side ink clearly outweighs ascender-side ink
+FLIP_RATIO = 1.5
+MIN_TEXT_LINES = 3
+
+_ROTATE_CODES = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def _rotate(img: np.ndarray, angle: float, border: int = 0,
+            interpolation: int = cv2.INTER_NEAREST, expand: bool = False) -> np.ndarray:
+    """Rotate counter-clockwise by angle degrees around the centre"""
+    h, w = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    size = (w, h)
+
+    if expand:
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        new_w, new_h = int(h * sin + w * cos), int(h * cos + w * sin)
+        matrix[0, 2] += new_w / 2 - w / 2
+        matrix[1, 2] += new_h / 2 - h / 2
+        size = (new_w, new_h)
+
+    border_value = border if img.ndim == 2 else (border,) * img.shape[2]
+    return cv2.warpAffine(img, matrix, size, flags=interpolation,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+
+
+def _profile_score(ink: np.ndarray) -> float:
+    """Sharpness of the row projection profile (high when text lines run horizontally)"""
+    profile = ink.sum(axis=1, dtype=np.float64)
+    return float(np.square(np.diff(profile)).sum())
+
+
+def _best_skew(ink: np.ndarray) -> tuple:
+    """Coarse-to-fine projection-profile search; returns (angle, score)"""
+    best_angle, best_score = 0.0, _profile_score(ink)
+
+    coarse = np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + 1e-6, DESKEW_COARSE_STEP)
+    for angle in coarse:
+        if angle == 0:
+            continue
+        score = _profile_score(_rotate(ink, angle))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+
+    centre = best_angle
+    fine = np.arange(centre - DESKEW_COARSE_STEP, centre + DESKEW_COARSE_STEP + 1e-6, DESKEW_FINE_STEP)
+    for angle in fine:
+        score = _profile_score(_rotate(ink, angle))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+
+    return round(best_angle, 2), best_score
+
+
+def _is_upside_down(ink: np.ndarray) -> bool:
+    """
+    Compare ink above and below each text line's x-height core
+
+    Capitals, digits and ascenders put ink above the core far more often
+    than descenders put ink below it, so upright Latin text is top-heavy.
+    """
+    profile = ink.sum(axis=1, dtype=np.float64)
+    if not profile.any():
+        return False
+
+    in_line = profile > profile.max() * 0.02
+    above = below = 0.0
+    lines = 0
+
+    row = 0
+    rows = len(profile)
+    while row < rows:
+        if not in_line[row]:
+            row += 1
+            continue
+        start = row
+        while row < rows and in_line[row]:
+            row += 1
+        band = profile[start:row]
+        if len(band) < 4:
+            continue
+
+        core = np.flatnonzero(band >= band.max() * 0.5)
+        above += band[:core[0]].sum()
+        below += band[core[-1] + 1:].sum()
+        lines += 1
+
+    if lines < MIN_TEXT_LINES:
+        return False
+    return below > above * FLIP_RATIO
+
+
+def estimate_orientation(gray: np.ndarray) -> dict:
+    """
+    Estimate the rotation that makes a page upright and level
+
+    Runs on a copy downsampled to ORIENTATION_MAX_SIDE px, so the cost does
+    not grow with the input resolution.
+
+    Returns:
+        {"rotation": 0/90/180/270 (clockwise), "skew": degrees counter-clockwise,
+         "seconds": float}
+    """
+    started = time.perf_counter()
+    result = {"rotation": 0, "skew": 0.0}
+
+    h, w = gray.shape[:2]
+    scale = ORIENTATION_MAX_SIDE / max(h, w)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+    small = cv2.medianBlur(small, 3)
+    _, ink = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+    # Blank or solid pages carry no orientation signal
+    ink_fraction = float(ink.mean())
+    if 0.002 < ink_fraction < 0.5:
+        upright_angle, upright_score = _best_skew(ink)
+        sideways = cv2.rotate(ink, cv2.ROTATE_90_CLOCKWISE)
+        sideways_angle, sideways_score = _best_skew(sideways)
+
+        if sideways_score > upright_score * SIDEWAYS_RATIO:
+            rotation, angle, level = 90, sideways_angle, sideways
+        else:
+            rotation, angle, level = 0, upright_angle, ink
+
+        if _is_upside_down(_rotate(level, angle)):
+            rotation = (rotation + 180) % 360
+
+        result = {"rotation": rotation, "skew": angle}
+
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def correct_orientation(img: np.ndarray, report: dict = None) -> np.ndarray:
+    """
+    Rotate a page upright and deskew it in one pass
+
+    Args:
+        img: Grayscale or colour page
+        report: Optional dict filled with the estimate and total time
+
+    Returns:
+        The corrected image (the input itself when no correction is needed)
+    """
+    if img is None or img.size == 0:
+        return img
+
+    started = time.perf_counter()
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    estimate = estimate_orientation(gray)
+    del gray
+
+    corrected = img
+    if estimate["rotation"]:
+        corrected = cv2.rotate(corrected, _ROTATE_CODES[estimate["rotation"]])
+    if abs(estimate["skew"]) >= DESKEW_MIN_ANGLE:
+        corrected = _rotate(corrected, estimate["skew"], border=255,
+                            interpolation=cv2.INTER_LINEAR, expand=True)
+
+    if report is not None:
+        report.update(estimate)
+        report["seconds"] = round(time.perf_counter() - started, 4)
+        report["estimate_seconds"] = estimate["seconds"]
+
+    return corrected
@@ -0,0 +1,256 @@
+# backend/rag_pipeline/parallel_ocr.py
+
+import os
+import time
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from rag_pipeline.orientation import OCR_DESKEW, correct_orientation
+
+TESSERACT_CONFIG = '--oem 3 --psm 6'
+
+# Process-pool OCR settings
+OCR_PARALLEL = os.getenv("OCR_PARALLEL", "true").lower() in ("1", "true", "yes")
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _ocr_page_worker(page_number: int, gray, timeout: float = 0) -> tuple:
+    """
+    Run Tesseract on one grayscale page (executed inside a pool worker)
+
+    timeout (seconds, 0 = none) kills the tesseract process; the page then
+    comes back with text None instead of holding the worker.
+    """
+    import pytesseract
+
+    started = time.perf_counter()
+    if OCR_DESKEW:
+        gray = correct_orientation(gray)
+    try:
+        text = pytesseract.image_to_string(
+            gray,
+            lang='eng',
+            config=TESSERACT_CONFIG,
+            timeout=timeout
+        ).strip()
+    except RuntimeError as e:
+        if "timeout" not in str(e).lower():
+            raise
+        text = None
+    return page_number, text, time.perf_counter() - started
+
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """
+    Return the shared OCR process pool, creating it on first use
+
+    The pool is sized once from OCR_MAX_WORKERS and shared by every file
+    thread; callers limit their own share with ocr_pages(max_workers=...).
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, OCR_MAX_WORKERS)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            print(f"✅ OCR process pool started ({workers} workers)", flush=True)
+        return _executor
+
+
+def discard_ocr_executor(executor: ProcessPoolExecutor):
+    """
+    Drop a broken pool so the next get_ocr_executor starts a new one
+
+    Only `executor` is dropped: a replacement another thread already started
+    is left running.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_ocr_executor():
+    """Stop the shared OCR process pool (safe to call when it was never started)"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _remaining(deadline: float) -> float:
+    """Seconds left before a time.monotonic() deadline (None: no deadline)"""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def _page_timeout(deadline: float) -> float:
+    """Tesseract timeout for a page starting now (0 disables it)"""
+    remaining = _remaining(deadline)
+    if remaining is None:
+        return 0
+    return max(1.0, remaining)
+
+
+def _new_run() -> dict:
+    """
+    Progress of one ocr_pages call
+
+    "raw" holds finished (page_number, text, seconds) tuples, "in_flight"
+    maps pool futures to the (page_number, gray) they were given ("submitting"
+    holds a page while its submit call runs), and "timed_out" is set once the
+    deadline skipped or cut short a page.
+    """
+    return {"raw": [], "in_flight": {}, "timed_out": False}
+
+
+def _collect(run: dict, result: tuple):
+    page_number, text, seconds = result
+    if text is None:
+        # Tesseract was killed at the deadline
+        run["timed_out"] = True
+        text = ""
+    run["raw"].append((page_number, text, seconds))
+
+
+def _ocr_pages_sequential(pages, run: dict, deadline: float = None):
+    for page_number, gray in pages:
+        if _remaining(deadline) == 0:
+            run["timed_out"] = True
+            break
+        _collect(run, _ocr_page_worker(page_number, gray, _page_timeout(deadline)))
+
+
+def _collect_done(run: dict, done):
+    """Move finished futures to run["raw"]; pages lost with a broken pool stay in flight"""
+    broken = None
+    for future in done:
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            broken = e
+            continue
+        del run["in_flight"][future]
+        _collect(run, result)
+    if broken is not None:
+        raise broken
+
+
+def _ocr_pages_pooled(pages, run: dict, executor: ProcessPoolExecutor, workers: int,
+                      deadline: float = None):
+    """
+    Submit pages as they arrive, keeping at most 2 x workers pages in flight
+
+    On BrokenProcessPool, `run` still holds every finished page and the
+    pages submitted but not returned, so the caller can redo just those.
+    """
+    max_in_flight = workers * 2
+    in_flight = run["in_flight"]
+
+    for page_number, gray in pages:
+        if _remaining(deadline) == 0:
+            run["timed_out"] = True
+            break
+        # Kept aside until submitted, so a page whose submit fails is redone too
+        run["submitting"] = (page_number, gray)
+        future = executor.submit(_ocr_page_worker, page_number, gray, _page_timeout(deadline))
+        in_flight[future] = run.pop("submitting")
+        del gray
+
+        if len(in_flight) >= max_in_flight:
+            done, _ = wait(list(in_flight), timeout=_remaining(deadline), return_when=FIRST_COMPLETED)
+            _collect_done(run, done)
+
+    done, not_done = wait(list(in_flight), timeout=_remaining(deadline))
+    _collect_done(run, done)
+
+    # Past the deadline: drop queued pages; running ones end at their tesseract timeout
+    if not_done:
+        run["timed_out"] = True
+    for future in not_done:
+        future.cancel()
+        del in_flight[future]
+
+
+def ocr_pages(pages, parallel: bool = None, max_workers: int = None,
+              verbose: bool = True, deadline: float = None, report: dict = None) -> list:
+    """
+    OCR grayscale pages, optionally spread across a process pool
+
+    Pages may come from a generator; they are consumed lazily so only a
+    bounded number of rendered pages is alive at any time.
+
+    Args:
+        pages: Iterable of (page_number, grayscale ndarray) tuples
+        parallel: Use the process pool (default: OCR_PARALLEL)
+        max_workers: This call's share of the shared pool (default and
+            ceiling: OCR_MAX_WORKERS; never more than pages)
+        verbose: Print per-page timings
+        deadline: time.monotonic() value after which no new pages are
+            started and unfinished ones are dropped
+        report: Optional dict; "timed_out" is set when the deadline skipped,
+            cancelled or cut short a page
+
+    Returns:
+        [{"page": int, "text": str, "seconds": float}, ...] in page order
+    """
+    if parallel is None:
+        parallel = OCR_PARALLEL
+
+    workers = min(max_workers or OCR_MAX_WORKERS, OCR_MAX_WORKERS)
+    if isinstance(pages, (list, tuple)):
+        workers = min(workers, len(pages))
+    started = time.perf_counter()
+
+    run = _new_run()
+    if parallel and workers > 1:
+        pages = iter(pages)
+        executor = get_ocr_executor()
+        try:
+            _ocr_pages_pooled(pages, run, executor, workers, deadline)
+        except BrokenProcessPool as e:
+            # Keep finished pages; redo the ones lost with the pool, then the rest
+            lost = list(run["in_flight"].values())
+            if "submitting" in run:
+                lost.append(run.pop("submitting"))
+            lost.sort(key=lambda page: page[0])
+            run["in_flight"] = {}
+            print(f"⚠️ OCR process pool broken ({e}) - redoing {len(lost)} page(s) "
+                  f"and continuing sequentially", flush=True)
+            discard_ocr_executor(executor)
+            workers = 1
+            _ocr_pages_sequential(itertools.chain(lost, pages), run, deadline)
+    else:
+        workers = 1
+        _ocr_pages_sequential(pages, run, deadline)
+
+    timed_out = run["timed_out"]
+    if report is not None:
+        report["timed_out"] = timed_out
+
+    wall = time.perf_counter() - started
+    results = sorted(
+        ({"page": page_number, "text": text, "seconds": round(seconds, 3)}
+         for page_number, text, seconds in run["raw"]),
+        key=lambda r: r["page"]
+    )
+
+    if verbose:
+        for r in results:
+            print(f"   • Page {r['page']}: {len(r['text'])} chars in {r['seconds']:.2f}s", flush=True)
+        busy = sum(r["seconds"] for r in results)
+        print(f"   ⏱️  {len(results)} pages, {workers} worker(s): "
+              f"wall {wall:.2f}s, OCR time {busy:.2f}s"
+              f"{' (stopped at deadline)' if timed_out else ''}", flush=True)
+
+    return results
@@ -0,0 +1,149 @@
+# backend/rag_pipeline/pdf_pages.py
+
+import io
+import os
+
+from rag_pipeline.ocr_budget import capped_dpi
+
+# Pages rendered per pdftoppm call; peak memory is roughly window x one page
+PDF_RENDER_WINDOW = int(os.getenv("PDF_RENDER_WINDOW", "2"))
+PDF_RENDER_DPI = 300
+
+# A page whose text layer is shorter than this is treated as scanned
+PDF_PAGE_MIN_TEXT_CHARS = int(os.getenv("PDF_PAGE_MIN_TEXT_CHARS", "50"))
+
+
+def count_pdf_pages(file_bytes: bytes = None, file_path: str = None) -> int:
+    """Page count from pdfinfo, without rendering anything"""
+    from pdf2image import pdfinfo_from_bytes, pdfinfo_from_path
+
+    if file_bytes is not None:
+        info = pdfinfo_from_bytes(file_bytes)
+    else:
+        info = pdfinfo_from_path(file_path)
+
+    return int(info.get("Pages", 0))
+
+
+def read_text_layer(file_bytes: bytes = None, file_path: str = None,
+                    min_chars: int = None, max_pages: int = None,
+                    page_info: dict = None) -> tuple:
+    """
+    Read the pdfplumber text layer page by page
+
+    Args:
+        file_bytes: PDF content (use this or file_path)
+        file_path: Path to a PDF on disk
+        min_chars: Minimum text per page (default: PDF_PAGE_MIN_TEXT_CHARS)
+        max_pages: Only read the first max_pages pages (default: all)
+        page_info: Optional dict filled with "page_count" (whole document)
+            and "sizes" ({page_number: (width_pt, height_pt)} for pages read)
+
+    Returns:
+        (page_texts, scanned_pages): {page_number: text} for pages with a
+        usable text layer, and the 1-based page numbers that need OCR
+    """
+    import pdfplumber
+
+    if min_chars is None:
+        min_chars = PDF_PAGE_MIN_TEXT_CHARS
+
+    source = io.BytesIO(file_bytes) if file_bytes is not None else file_path
+    page_texts = {}
+    scanned_pages = []
+
+    with pdfplumber.open(source) as pdf:
+        pages = pdf.pages
+        if page_info is not None:
+            page_info["page_count"] = len(pages)
+            page_info.setdefault("sizes", {})
+
+        for page_number, page in enumerate(pages, 1):
+            if max_pages and page_number > max_pages:
+                break
+            if page_info is not None:
+                page_info["sizes"][page_number] = (float(page.width), float(page.height))
+
+            text = (page.extract_text() or "").strip()
+            if len(text) >= min_chars:
+                page_texts[page_number] = text
+            else:
+                scanned_pages.append(page_number)
+            page.flush_cache()
+
+    return page_texts, scanned_pages
+
+
+def iter_pdf_pages(file_bytes: bytes = None, file_path: str = None,
+                   dpi: int = PDF_RENDER_DPI, window: int = None,
+                   grayscale: bool = False, page_numbers: list = None,
+                   max_pixels: int = None, page_sizes: dict = None):
+    """
+    Render a PDF a few pages at a time
+
+    Only `window` pages are held in memory at once; each image is released
+    as soon as the caller moves on to the next one.
+
+    Args:
+        file_bytes: PDF content (use this or file_path)
+        file_path: Path to a PDF on disk
+        dpi: Render resolution (default: 300)
+        window: Pages rendered per call (default: PDF_RENDER_WINDOW)
+        grayscale: Render straight to single-channel images
+        page_numbers: Only render these 1-based pages (default: all)
+        max_pixels: Render pages at a lower DPI where `dpi` would exceed
+            this many pixels (page_sizes lets this happen before rendering;
+            pages of unknown size are resized after rendering)
+        page_sizes: {page_number: (width_pt, height_pt)} from read_text_layer
+
+    Yields:
+        (page_number, PIL.Image) tuples in page order
+    """
+    from pdf2image import convert_from_bytes, convert_from_path
+
+    if file_bytes is None and file_path is None:
+        raise ValueError("file_bytes or file_path is required")
+
+    window = max(1, window or PDF_RENDER_WINDOW)
+
+    if page_numbers is None:
+        total = count_pdf_pages(file_bytes=file_bytes, file_path=file_path)
+        page_numbers = range(1, total + 1)
+
+    def page_dpi(page_number):
+        size = (page_sizes or {}).get(page_number)
+        if max_pixels and size:
+            return capped_dpi(size[0], size[1], dpi, max_pixels)
+        return dpi
+
+    # Group consecutive pages rendered at the same DPI into runs of at most `window` pages
+    runs = []
+    for page_number in sorted(set(page_numbers)):
+        run_dpi = page_dpi(page_number)
+        if (runs and page_number == runs[-1][1][-1] + 1 and runs[-1][0] == run_dpi
+                and len(runs[-1][1]) < window):
+            runs[-1][1].append(page_number)
+        else:
+            runs.append((run_dpi, [page_number]))
+
+    for run_dpi, run in runs:
+        kwargs = {
+            "dpi": run_dpi,
+            "first_page": run[0],
+            "last_page": run[-1],
+            "grayscale": grayscale,
+        }
+        if file_bytes is not None:
+            images = convert_from_bytes(file_bytes, **kwargs)
+        else:
+            images = convert_from_path(file_path, **kwargs)
+
+        # Pop so each page is dropped as soon as the caller is done with it
+        page_number = run[0]
+        while images:
+            img = images.pop(0)
+            if max_pixels and img.width * img.height > max_pixels:
+                scale = (max_pixels / (img.width * img.height)) ** 0.5
+                img = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))))
+            yield page_number, img
+            page_number += 1
@@ -0,0 +1,78 @@
+# backend/rag_pipeline/step_log.py
+
+"""
+Step logging shared by the API and the extraction pipeline
+
+log_step prints one line and, when the current thread has an event sink
+(set by app_api.stream_progress), forwards the step to it so streamed
+clients see it too.
+"""
+
+import threading
+
+# Per-thread log tag and event sink (set while a pipeline thread works on one file)
+_log_context = threading.local()
+
+# log_step boundaries reported to event streams as named stages
+STAGE_EVENTS = {
+    # per file (process-files)
+    ("Files found", "success"): "listing_complete",
+    ("Fetched", "success"): "fetched",
+    ("Extracted", "success"): "ocr_done",
+    ("Extracted", "warning"): "ocr_done",
+    ("Header check", "warning"): "header_mismatch",
+    ("Metadata", "success"): "metadata_done",
+    ("Save queued", "success"): "save_queued",
+    ("Saved", "success"): "saved",
+    ("Save failed", "error"): "failed",
+    ("Failed", "error"): "failed",
+    # generate-summary
+    ("Reports found", "success"): "reports_loaded",
+    ("Cache", "success"): "cache_hit",
+    ("Chunking", "success"): "chunked",
+    ("Index", "success"): "indexed",
+    ("Summary", "success"): "summary_generated",
+    ("Cached", "success"): "summary_cached",
+    ("COMPLETE", "success"): "complete",
+}
+
+
+def log_step(step: str, status: str = "info", details: str = None):
+    """Consistent logging"""
+    symbols = {
+        "start": "🔄",
+        "success": "✅",
+        "error": "❌",
+        "warning": "⚠️",
+        "info": "ℹ️"
+    }
+    symbol = symbols.get(status, "•")
+    
+    message = f"{symbol} {step}"
+    if details:
+        message += f": {details}"
+    prefix = getattr(_log_context, "prefix", None)
+    if prefix:
+        message = f"[{prefix}] {message}"
+    print(message, flush=True)
+    
+    sink = getattr(_log_context, "sink", None)
+    if sink:
+        _emit_step(sink, step, status, details)
+
+
+def _emit_step(sink, step: str, status: str, details: str):
+    """Hand one log_step to the current thread's event sink"""
+    event = {"step": step, "status": status, "details": details}
+    file_name = getattr(_log_context, "file_name", None)
+    if file_name:
+        event["file_name"] = file_name
+    
+    stage = STAGE_EVENTS.get((step, status))
+    if stage:
+        event["stage"] = stage
+    
+    try:
+        sink("stage" if stage else "step", event)
+    except Exception:
+        pass
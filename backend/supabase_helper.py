@@ -4,8 +4,14 @@ import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import requests
+import requests.adapters
 import hashlib
 import io
+import json
+import re
+import time
+import threading
+from datetime import datetime, timezone
 
 load_dotenv()
 
@@ -25,22 +31,65 @@ BUCKET_NAME = "medical-vault"
 # FILE LISTING
 # ============================================
 
+# Storage listing page size and order (Storage caps a single list call at 100 by default)
+STORAGE_LIST_PAGE_SIZE = int(os.getenv("STORAGE_LIST_PAGE_SIZE", "100"))
+STORAGE_LIST_SORT = os.getenv("STORAGE_LIST_SORT", "name")
+STORAGE_LIST_ORDER = os.getenv("STORAGE_LIST_ORDER", "asc")
+
+
+def iter_user_file_pages(profile_id: str, folder_type: str = None, page_size: int = None,
+                         sort_by: str = None, order: str = None):
+    """
+    List files from Supabase Storage page by page
+    
+    Yields each page (a list of file entries, folders left out) as soon as
+    it arrives, so callers can start on the first files while later pages
+    are still being listed. Errors are raised, not swallowed: a partial
+    listing must not be mistaken for a complete one.
+    
+    Args:
+        profile_id: Profile whose files to list
+        folder_type: Sub-folder (e.g. "reports"); the profile root when None
+        page_size: Entries per request (default: STORAGE_LIST_PAGE_SIZE)
+        sort_by: "name", "created_at", "updated_at" or "last_accessed_at"
+        order: "asc" or "desc"
+    """
+    folder_path = f"{profile_id}/{folder_type}" if folder_type else f"{profile_id}"
+    page_size = max(1, page_size or STORAGE_LIST_PAGE_SIZE)
+    options = {
+        "limit": page_size,
+        "sortBy": {"column": sort_by or STORAGE_LIST_SORT, "order": order or STORAGE_LIST_ORDER},
+    }
+    
+    offset = 0
+    while True:
+        response = supabase.storage.from_(BUCKET_NAME).list(folder_path, {**options, "offset": offset})
+        entries = response or []
+        
+        # Filter out folders, keep only files
+        files = [f for f in entries if f.get('metadata')]
+        if files:
+            yield files
+        
+        if len(entries) < page_size:
+            return
+        offset += len(entries)
+
+
+def iter_user_files(profile_id: str, folder_type: str = None, **kwargs):
+    """Storage file entries one at a time (see iter_user_file_pages)"""
+    for page in iter_user_file_pages(profile_id, folder_type, **kwargs):
+        yield from page
+
+
 def list_user_files(profile_id: str, folder_type: str = None):
-    """List files from Supabase Storage for a profile."""
+    """List files from Supabase Storage for a profile (all pages)."""
     print(f"\n📂 Listing files for profile: {profile_id}")
     if folder_type:
         print(f"   Folder: {folder_type}")
     
     try:
-        if folder_type:
-            folder_path = f"{profile_id}/{folder_type}"
-        else:
-            folder_path = f"{profile_id}"
-        
-        response = supabase.storage.from_(BUCKET_NAME).list(folder_path)
-        
-        # Filter out folders, keep only files
-        files = [f for f in response if f.get('metadata')]
+        files = list(iter_user_files(profile_id, folder_type))
         
         print(f"✅ Found {len(files)} files")
         for f in files:
@@ -57,38 +106,195 @@ def list_user_files(profile_id: str, folder_type: str = None):
 # IN-MEMORY FILE ACCESS (NO LOCAL STORAGE)
 # ============================================
 
+# Shared keep-alive HTTP client for storage downloads
+STORAGE_HTTP_POOL_SIZE = int(os.getenv("STORAGE_HTTP_POOL_SIZE", "16"))
+# HTTP/2 via httpx needs the optional h2 package (pip install "httpx[http2]")
+STORAGE_HTTP2 = os.getenv("STORAGE_HTTP2", "false").lower() in ("1", "true", "yes")
+STORAGE_DOWNLOAD_TIMEOUT = float(os.getenv("STORAGE_DOWNLOAD_TIMEOUT", "30"))
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+SIGNED_URL_EXPIRY = 3600
+# Cached signed URLs are reused until this close to expiry
+SIGNED_URL_MIN_REMAINING = 300
+
+_http_lock = threading.Lock()
+_http_client = None
+_http_kind = None  # "requests" or "httpx"
+
+_signed_urls = {}  # file_path -> (url, expires_at monotonic)
+_download_stats = {
+    "downloads": 0,
+    "bytes": 0,
+    "seconds": 0.0,
+    "signed_url_requests": 0,
+    "signed_urls_created": 0,
+    "signed_url_cache_hits": 0,
+}
+
+
+def _get_http_client():
+    """Create the pooled client on first use (httpx with HTTP/2 when enabled and available)"""
+    global _http_client, _http_kind
+    
+    with _http_lock:
+        if _http_client is not None:
+            return _http_client, _http_kind
+        
+        if STORAGE_HTTP2:
+            try:
+                # httpx raises ImportError here when h2 is missing
+                import httpx
+                _http_client = httpx.Client(
+                    http2=True,
+                    timeout=STORAGE_DOWNLOAD_TIMEOUT,
+                    limits=httpx.Limits(max_connections=STORAGE_HTTP_POOL_SIZE,
+                                        max_keepalive_connections=STORAGE_HTTP_POOL_SIZE)
+                )
+                _http_kind = "httpx"
+                print(f"✅ Storage HTTP client: httpx, HTTP/2, pool {STORAGE_HTTP_POOL_SIZE}")
+                return _http_client, _http_kind
+            except ImportError:
+                print("⚠️  STORAGE_HTTP2 set but h2 is not installed - using requests (HTTP/1.1)")
+        
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=STORAGE_HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_client, _http_kind = session, "requests"
+        return _http_client, _http_kind
+
+
+def _read_into_buffer(chunks, content_length: int) -> bytearray:
+    """Copy a streamed body into one buffer, preallocated when the size is known"""
+    if not content_length:
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+        return buffer
+    
+    buffer = bytearray(content_length)
+    view = memoryview(buffer)
+    offset = 0
+    for chunk in chunks:
+        end = offset + len(chunk)
+        if end > content_length:
+            # Longer than announced: fall back to growing
+            return bytes(view[:offset]) + chunk + b"".join(chunks)
+        view[offset:end] = chunk
+        offset = end
+    
+    if offset != content_length:
+        raise Exception(f"Incomplete download: {offset} of {content_length} bytes")
+    return buffer
+
+
+def _download(url: str) -> bytearray:
+    client, kind = _get_http_client()
+    
+    if kind == "httpx":
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            length = int(response.headers.get("content-length") or 0)
+            return _read_into_buffer(response.iter_bytes(DOWNLOAD_CHUNK_BYTES), length)
+    
+    with client.get(url, stream=True, timeout=STORAGE_DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        # Compressed bodies do not match Content-Length; let the buffer grow
+        encoded = response.headers.get("content-encoding") not in (None, "identity")
+        length = 0 if encoded else int(response.headers.get("content-length") or 0)
+        return _read_into_buffer(response.iter_content(DOWNLOAD_CHUNK_BYTES), length)
+
+
+def _signed_url_of(item: dict) -> str:
+    return item.get('signedURL') or item.get('signedUrl') or item.get('signed_url')
+
+
+def create_signed_urls(file_paths: list, expires_in: int = SIGNED_URL_EXPIRY) -> dict:
+    """
+    Signed download URLs for many files in one Storage call
+    
+    The URLs are cached, so get_file_bytes for these paths skips its own
+    signing round trip.
+    
+    Returns:
+        {file_path: signed URL} (paths Storage could not sign are left out)
+    """
+    if not file_paths:
+        return {}
+    
+    response = supabase.storage.from_(BUCKET_NAME).create_signed_urls(list(file_paths), expires_in)
+    expires_at = time.monotonic() + expires_in
+    
+    urls = {}
+    for item in response or []:
+        url = _signed_url_of(item)
+        if url and not item.get('error'):
+            urls[item.get('path')] = url
+    
+    with _http_lock:
+        _download_stats["signed_url_requests"] += 1
+        _download_stats["signed_urls_created"] += len(urls)
+        for path, url in urls.items():
+            _signed_urls[path] = (url, expires_at)
+    
+    print(f"🔗 Signed {len(urls)}/{len(file_paths)} URLs in one request")
+    return urls
+
+
+def _cached_signed_url(file_path: str) -> str:
+    with _http_lock:
+        cached = _signed_urls.get(file_path)
+        if cached and cached[1] - time.monotonic() > SIGNED_URL_MIN_REMAINING:
+            _download_stats["signed_url_cache_hits"] += 1
+            return cached[0]
+        _signed_urls.pop(file_path, None)
+    return None
+
+
 def get_file_bytes(file_path: str) -> bytes:
     """
     Get file content as bytes directly from Supabase Storage
     NEVER downloads to disk
     
+    Uses a signed URL from create_signed_urls when one is cached, and the
+    shared keep-alive client, streaming into a buffer sized from
+    Content-Length.
+    
     Args:
         file_path: Full path in storage (e.g., "user_id/reports/file.pdf")
     
     Returns:
-        File content as bytes (in memory)
+        File content (bytes-like, in memory)
     """
     print(f"📥 Fetching file bytes: {file_path}")
     
     try:
-        # Get signed URL
-        response = supabase.storage.from_(BUCKET_NAME).create_signed_url(
-            file_path,
-            3600  # 1 hour expiry
-        )
+        signed_url = _cached_signed_url(file_path)
         
-        if 'signedURL' not in response:
-            raise Exception(f"Failed to get signed URL: {response}")
-        
-        signed_url = response['signedURL']
+        if signed_url is None:
+            response = supabase.storage.from_(BUCKET_NAME).create_signed_url(
+                file_path,
+                SIGNED_URL_EXPIRY
+            )
+            signed_url = _signed_url_of(response or {})
+            if not signed_url:
+                raise Exception(f"Failed to get signed URL: {response}")
+            with _http_lock:
+                _download_stats["signed_url_requests"] += 1
+                _download_stats["signed_urls_created"] += 1
         
         # Fetch file content directly into memory
-        file_response = requests.get(signed_url, timeout=30)
-        file_response.raise_for_status()
+        started = time.perf_counter()
+        file_bytes = _download(signed_url)
+        seconds = time.perf_counter() - started
         
-        file_bytes = file_response.content
+        with _http_lock:
+            _download_stats["downloads"] += 1
+            _download_stats["bytes"] += len(file_bytes)
+            _download_stats["seconds"] += seconds
         
-        print(f"✅ Fetched: {len(file_bytes)} bytes (in memory)")
+        rate = len(file_bytes) / seconds / 1024 / 1024 if seconds > 0 else 0
+        print(f"✅ Fetched: {len(file_bytes)} bytes in {seconds:.2f}s ({rate:.1f} MB/s, in memory)")
         return file_bytes
         
     except Exception as e:
@@ -96,6 +302,36 @@ def get_file_bytes(file_path: str) -> bytes:
         raise
 
 
+def download_stats() -> dict:
+    """Download throughput, signed-URL and connection-reuse counters"""
+    client, kind = _http_client, _http_kind
+    
+    with _http_lock:
+        stats = dict(_download_stats)
+    stats["seconds"] = round(stats["seconds"], 3)
+    stats["bytes_per_sec"] = round(stats["bytes"] / stats["seconds"]) if stats["seconds"] else None
+    stats["client"] = kind
+    stats["connections_opened"] = None
+    stats["connections_reused"] = None
+    
+    # urllib3 counts connections and requests per host pool
+    if kind == "requests":
+        opened = requests_made = 0
+        # One adapter is mounted for both schemes; count each once
+        adapters = {id(a): a for a in client.adapters.values()}
+        for adapter in adapters.values():
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                requests_made += pool.num_requests
+        stats["connections_opened"] = opened
+        stats["connections_reused"] = max(0, requests_made - opened)
+    
+    return stats
+
+
 def get_file_as_bytesio(file_path: str) -> io.BytesIO:
     """
     Get file as BytesIO object for in-memory processing
@@ -127,6 +363,191 @@ def get_file_as_bytesio(file_path: str) -> io.BytesIO:
 # DATABASE OPERATIONS - FIXED VERSION
 # ============================================
 
+# Storage object fields recorded per report to detect replaced files
+SOURCE_COLUMNS = ('source_size', 'source_etag', 'source_updated_at')
+# Cleared when the columns are missing (migration not applied yet)
+_source_columns_supported = True
+
+
+def storage_fingerprint(file_info: dict) -> dict:
+    """
+    Size, etag and last update of a storage object, from its listing entry
+    
+    Returns:
+        {"source_size", "source_etag", "source_updated_at"} (values may be None)
+    """
+    metadata = file_info.get('metadata') or {}
+    etag = metadata.get('eTag') or metadata.get('etag')
+    return {
+        'source_size': metadata.get('size', metadata.get('contentLength')),
+        'source_etag': etag.strip('"') if etag else None,
+        'source_updated_at': file_info.get('updated_at') or metadata.get('lastModified'),
+    }
+
+
+def _parse_timestamp(value) -> datetime:
+    """ISO timestamp from Postgres or Storage ('Z' suffix, 0-9 fraction digits)"""
+    text = str(value).strip().replace(' ', 'T').replace('Z', '+00:00')
+    match = re.match(r'^(.*T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(.*)$', text)
+    if match:
+        fraction = (match.group(2) or '')[:6].ljust(6, '0')
+        text = f"{match.group(1)}.{fraction}{match.group(3)}"
+    parsed = datetime.fromisoformat(text)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _same_timestamp(a, b) -> bool:
+    try:
+        return _parse_timestamp(a) == _parse_timestamp(b)
+    except ValueError:
+        return str(a) == str(b)
+
+
+def source_changed(record: dict, fingerprint: dict) -> bool:
+    """
+    Whether the storage object differs from the one a record was built from
+    
+    The etag decides when both sides have one; otherwise size and update
+    time. Records written before fingerprints existed count as unchanged.
+    """
+    if not any(record.get(c) is not None for c in SOURCE_COLUMNS):
+        return False
+    
+    if record.get('source_etag') and fingerprint.get('source_etag'):
+        return record['source_etag'] != fingerprint['source_etag']
+    
+    if (record.get('source_size') is not None and fingerprint.get('source_size') is not None
+            and int(record['source_size']) != int(fingerprint['source_size'])):
+        return True
+    
+    if record.get('source_updated_at') and fingerprint.get('source_updated_at'):
+        return not _same_timestamp(record['source_updated_at'], fingerprint['source_updated_at'])
+    
+    return False
+
+
+# Rows per upsert request in bulk_upsert_reports
+REPORT_UPSERT_BATCH_SIZE = int(os.getenv("REPORT_UPSERT_BATCH_SIZE", "50"))
+
+# Conflict targets for medical_reports_processed: profile-scoped first,
+# legacy user-scoped schemas second. The one that works is remembered.
+REPORT_CONFLICT_TARGETS = ('profile_id,file_path', 'user_id,file_path')
+
+# processing_status of a report saved from the header pass alone (someone
+# else's report); final unless its name match changes or full OCR is asked for
+HEADER_ONLY_STATUS = 'header_only'
+_report_conflict_target = None
+
+
+def build_report_record(profile_id: str, file_path: str, file_name: str,
+                        folder_type: str, extracted_text: str,
+                        patient_name: str = None, report_date: str = None,
+                        age: str = None, gender: str = None,
+                        report_type: str = None, doctor_name: str = None,
+                        hospital_name: str = None,
+                        name_match_status: str = 'pending',
+                        name_match_confidence: float = None,
+                        structured_data: dict = None,
+                        source: dict = None,
+                        processing_status: str = 'completed') -> dict:
+    """
+    Row for medical_reports_processed (see save_extracted_data)
+    
+    source is the storage_fingerprint of the file the text came from.
+    processing_status is HEADER_ONLY_STATUS when only the header was read.
+    """
+    profile_id_str = str(profile_id)
+
+    data = {
+        'user_id': profile_id_str,  # legacy compatibility
+        'profile_id': profile_id_str,
+        'file_path': file_path,
+        'file_name': file_name,
+        'folder_type': folder_type,
+        'extracted_text': extracted_text,
+        'patient_name': patient_name,
+        'report_date': report_date,
+        'age': age,
+        'gender': gender,
+        'report_type': report_type,
+        'doctor_name': doctor_name,
+        'hospital_name': hospital_name,
+        'name_match_status': name_match_status,
+        'name_match_confidence': name_match_confidence,
+        'processing_status': processing_status
+    }
+    
+    # Always written, so a reprocessed report without a lab table clears the
+    # old rows and every row in a bulk upsert has the same keys
+    data['structured_data_json'] = None
+    data['structured_data_hash'] = None
+    data['structured_extracted_at'] = None
+    if structured_data is not None:
+        structured_json = json.dumps(structured_data, sort_keys=True, ensure_ascii=False)
+        data['structured_data_json'] = structured_data
+        data['structured_data_hash'] = hashlib.sha256(structured_json.encode('utf-8')).hexdigest()
+        data['structured_extracted_at'] = datetime.now(timezone.utc).isoformat()
+    
+    data.update({c: (source or {}).get(c) for c in SOURCE_COLUMNS})
+    
+    return data
+
+
+def _is_conflict_target_error(error: Exception) -> bool:
+    """True when Postgres rejected the ON CONFLICT columns (no such unique constraint)"""
+    message = str(error)
+    return '42P10' in message or 'ON CONFLICT' in message
+
+
+def _is_missing_source_column_error(error: Exception) -> bool:
+    message = str(error)
+    return any(c in message for c in SOURCE_COLUMNS) and ('PGRST204' in message or 'column' in message)
+
+
+def _without_source_columns(rows):
+    if isinstance(rows, dict):
+        return {k: v for k, v in rows.items() if k not in SOURCE_COLUMNS}
+    return [_without_source_columns(r) for r in rows]
+
+
+def _upsert_reports(rows) -> list:
+    """Upsert one row or a list of rows; returns the written rows"""
+    global _source_columns_supported
+    
+    if not _source_columns_supported:
+        return _upsert_reports_to_target(_without_source_columns(rows))
+    
+    try:
+        return _upsert_reports_to_target(rows)
+    except Exception as e:
+        if not _is_missing_source_column_error(e):
+            raise
+        print("⚠️  source_* columns missing (apply the migration); saving without change tracking")
+        _source_columns_supported = False
+        return _upsert_reports_to_target(_without_source_columns(rows))
+
+
+def _upsert_reports_to_target(rows) -> list:
+    global _report_conflict_target
+    
+    targets = ([_report_conflict_target] if _report_conflict_target
+               else list(REPORT_CONFLICT_TARGETS))
+    
+    for i, target in enumerate(targets):
+        try:
+            result = supabase.table('medical_reports_processed').upsert(
+                rows,
+                on_conflict=target
+            ).execute()
+            _report_conflict_target = target
+            return result.data or []
+        except Exception as e:
+            # Only a wrong conflict target is worth retrying with the legacy one
+            if i + 1 < len(targets) and _is_conflict_target_error(e):
+                continue
+            raise
+
+
 def save_extracted_data(profile_id: str, file_path: str, file_name: str, 
                        folder_type: str, extracted_text: str, 
                        patient_name: str = None, report_date: str = None,
@@ -134,10 +555,17 @@ def save_extracted_data(profile_id: str, file_path: str, file_name: str,
                        report_type: str = None, doctor_name: str = None,
                        hospital_name: str = None,
                        name_match_status: str = 'pending',
-                       name_match_confidence: float = None):
+                       name_match_confidence: float = None,
+                       structured_data: dict = None,
+                       source: dict = None,
+                       processing_status: str = 'completed'):
     """
     Save extracted text and metadata to database
-    FIXED: Removed undefined structured_data_json reference
+    
+    structured_data (e.g. parsed lab tables) is stored in
+    structured_data_json together with its hash and extraction time.
+    processing_status is HEADER_ONLY_STATUS for a header-pass record.
+    For many files at once use bulk_upsert_reports.
     
     NOTE: profile_id is now the owner ID used for storage/report isolation.
     Legacy compatibility: user_id (TEXT) is still populated with profile_id.
@@ -145,41 +573,18 @@ def save_extracted_data(profile_id: str, file_path: str, file_name: str,
     print(f"\n💾 Saving to database: {file_name}")
     
     try:
-        profile_id_str = str(profile_id)
-
-        # Prepare data - simple dict without any undefined variables
-        data = {
-            'user_id': profile_id_str,  # legacy compatibility
-            'profile_id': profile_id_str,
-            'file_path': file_path,
-            'file_name': file_name,
-            'folder_type': folder_type,
-            'extracted_text': extracted_text,
-            'patient_name': patient_name,
-            'report_date': report_date,
-            'age': age,
-            'gender': gender,
-            'report_type': report_type,
-            'doctor_name': doctor_name,
-            'hospital_name': hospital_name,
-            'name_match_status': name_match_status,
-            'name_match_confidence': name_match_confidence,
-            'processing_status': 'completed'
-        }
+        data = build_report_record(
+            profile_id, file_path, file_name, folder_type, extracted_text,
+            patient_name=patient_name, report_date=report_date, age=age, gender=gender,
+            report_type=report_type, doctor_name=doctor_name, hospital_name=hospital_name,
+            name_match_status=name_match_status, name_match_confidence=name_match_confidence,
+            structured_data=structured_data, source=source,
+            processing_status=processing_status
+        )
         
-        # Use profile-scoped conflict target first; fallback for legacy schemas.
-        try:
-            result = supabase.table('medical_reports_processed').upsert(
-                data,
-                on_conflict='profile_id,file_path'
-            ).execute()
-        except Exception:
-            result = supabase.table('medical_reports_processed').upsert(
-                data,
-                on_conflict='user_id,file_path'
-            ).execute()
+        rows = _upsert_reports(data)
         
-        record_id = result.data[0]['id'] if result.data else None
+        record_id = rows[0]['id'] if rows else None
         print(f"✅ Saved (ID: {record_id})")
         print(f"   Patient: {patient_name or 'Unknown'} ({age or 'N/A'}, {gender or 'N/A'})")
         print(f"   Date: {report_date or 'Unknown'}")
@@ -188,6 +593,8 @@ def save_extracted_data(profile_id: str, file_path: str, file_name: str,
         print(f"   Hospital: {hospital_name or 'Unknown'}")
         print(f"   Name Match: {name_match_status} ({name_match_confidence or 'N/A'})")
         print(f"   Text length: {len(extracted_text)} characters")
+        if structured_data is not None:
+            print(f"   Lab results: {len(structured_data.get('lab_results') or [])} rows")
         
         return record_id
         
@@ -198,10 +605,70 @@ def save_extracted_data(profile_id: str, file_path: str, file_name: str,
         raise
 
 
-def get_processed_reports(profile_id: str, folder_type: str = None):
+def _upsert_report_batch(rows: list) -> list:
+    """
+    Upsert rows, isolating failures
+    
+    A failed batch is split in half and retried, down to single rows, so one
+    bad row costs about log2(batch) extra requests instead of failing the rest.
+    """
+    try:
+        written = {r.get('file_path'): r.get('id') for r in _upsert_reports(rows)}
+        return [{"file_path": r['file_path'], "id": written.get(r['file_path']), "error": None}
+                for r in rows]
+    except Exception as e:
+        if len(rows) == 1:
+            return [{"file_path": rows[0]['file_path'], "id": None, "error": str(e)}]
+        middle = len(rows) // 2
+        return _upsert_report_batch(rows[:middle]) + _upsert_report_batch(rows[middle:])
+
+
+def bulk_upsert_reports(records: list, batch_size: int = None) -> list:
+    """
+    Upsert many medical_reports_processed rows in batches
+    
+    Args:
+        records: Rows from build_report_record (one profile or many)
+        batch_size: Rows per request (default: REPORT_UPSERT_BATCH_SIZE)
+    
+    Returns:
+        One {"file_path", "id", "error"} per distinct (profile_id, file_path),
+        in input order; error is None for rows that were written
+    """
+    batch_size = max(1, batch_size or REPORT_UPSERT_BATCH_SIZE)
+    
+    # Postgres rejects a batch that touches the same conflict key twice; keep the last
+    unique = {}
+    for record in records:
+        unique[(record['profile_id'], record['file_path'])] = record
+    rows = list(unique.values())
+    if not rows:
+        return []
+    
+    print(f"\n💾 Bulk saving {len(rows)} reports ({batch_size} per request)")
+    
+    outcomes = []
+    for start in range(0, len(rows), batch_size):
+        outcomes.extend(_upsert_report_batch(rows[start:start + batch_size]))
+    
+    failed = [o for o in outcomes if o["error"]]
+    print(f"✅ Saved {len(outcomes) - len(failed)}/{len(outcomes)} reports")
+    for o in failed:
+        print(f"   ❌ {o['file_path']}: {o['error']}")
+    
+    return outcomes
+
+
+def get_processed_reports(profile_id: str, folder_type: str = None, columns: str = '*',
+                          statuses: tuple = ('completed',)):
     """
     Get all processed reports for a profile from database.
     Strictly scoped to profile_id.
+    
+    columns narrows the select (e.g. skip extracted_text when only paths
+    are needed); it falls back to '*' if the query fails. statuses are the
+    processing_status values to include (RECONCILE_STATUSES adds header-only
+    records).
     """
     print(f"\n📊 Fetching processed reports for profile: {profile_id}")
     
@@ -210,16 +677,23 @@ def get_processed_reports(profile_id: str, folder_type: str = None):
         query = (
             supabase
             .table('medical_reports_processed')
-            .select('*')
+            .select(columns)
             .eq('profile_id', profile_id_str)
-            .eq('processing_status', 'completed')
+            .in_('processing_status', list(statuses))
         )
 
         if folder_type:
             print(f"   Filtering by folder: {folder_type}")
             query = query.eq('folder_type', folder_type)
         
-        result = query.execute()
+        try:
+            result = query.execute()
+        except Exception as e:
+            if columns == '*':
+                raise
+            # e.g. a listed column that an older schema does not have yet
+            print(f"⚠️  Narrow select failed ({e}); retrying with all columns")
+            return get_processed_reports(profile_id, folder_type, statuses=statuses)
         rows = result.data or []
 
         print(f"✅ Retrieved {len(rows)} reports")
@@ -233,6 +707,111 @@ def get_processed_reports(profile_id: str, folder_type: str = None):
         return []
 
 
+# What reconciliation needs from each record (no extracted text)
+RECONCILE_COLUMNS = ('id,file_path,file_name,folder_type,report_date,processing_status,'
+                     'patient_name,' + ','.join(SOURCE_COLUMNS))
+# Every record that has a storage file behind it, finished or not
+RECONCILE_STATUSES = ('completed', HEADER_ONLY_STATUS)
+
+# Record IDs per `in_` filter in delete_reports_by_ids (keeps the URL short)
+ORPHAN_DELETE_BATCH_SIZE = int(os.getenv("ORPHAN_DELETE_BATCH_SIZE", "100"))
+
+
+def diff_reports_against_storage(existing_records: list, storage_paths: set,
+                                 fingerprints: dict = None) -> dict:
+    """
+    Compare processed records with the files currently in storage
+    
+    Args:
+        existing_records: Rows from get_processed_reports
+        storage_paths: Paths currently in storage
+        fingerprints: Optional {path: storage_fingerprint} to detect replaced files
+    
+    Returns:
+        {"orphaned": records whose file is gone,
+         "new_paths": storage paths without a record,
+         "changed_paths": paths whose object changed since it was processed,
+         "kept": count of records that still have their file}
+    """
+    fingerprints = fingerprints or {}
+    existing_paths = set(r['file_path'] for r in existing_records)
+    orphaned = [r for r in existing_records if r['file_path'] not in storage_paths]
+    changed = sorted(
+        r['file_path'] for r in existing_records
+        if r['file_path'] in fingerprints and source_changed(r, fingerprints[r['file_path']])
+    )
+    return {
+        "orphaned": orphaned,
+        "new_paths": sorted(storage_paths - existing_paths),
+        "changed_paths": changed,
+        "kept": len(existing_records) - len(orphaned),
+    }
+
+
+def delete_reports_by_ids(record_ids: list, batch_size: int = None) -> dict:
+    """
+    Delete medical_reports_processed rows with one request per batch of IDs
+    
+    Returns:
+        {"deleted": count, "errors": [{"ids", "error"}]} (a failed batch is
+        reported and the remaining batches still run)
+    """
+    batch_size = max(1, batch_size or ORPHAN_DELETE_BATCH_SIZE)
+    deleted = 0
+    errors = []
+    
+    for start in range(0, len(record_ids), batch_size):
+        ids = record_ids[start:start + batch_size]
+        try:
+            result = supabase.table('medical_reports_processed').delete().in_('id', ids).execute()
+            deleted += len(result.data) if result.data else 0
+        except Exception as e:
+            print(f"❌ Error deleting {len(ids)} records: {e}")
+            errors.append({"ids": ids, "error": str(e)})
+    
+    return {"deleted": deleted, "errors": errors}
+
+
+def reconcile_orphaned_reports(profile_id: str, folder_type: str, storage_files: list = None,
+                               existing_records: list = None, dry_run: bool = False,
+                               batch_size: int = None) -> dict:
+    """
+    Delete processed records whose storage file no longer exists
+    
+    Args:
+        profile_id: Profile to reconcile
+        folder_type: Storage folder
+        storage_files: Listing from list_user_files (listed when None)
+        existing_records: Rows from get_processed_reports (fetched when None)
+        dry_run: Only compute the diff
+        batch_size: IDs per delete request (default: ORPHAN_DELETE_BATCH_SIZE)
+    
+    Returns:
+        The diff (see diff_reports_against_storage, with replaced files in
+        "changed_paths") plus "deleted", "errors" and "dry_run"
+    """
+    if storage_files is None:
+        # Not list_user_files: an empty result on error would orphan every record
+        storage_files = list(iter_user_files(profile_id, folder_type))
+    if existing_records is None:
+        existing_records = get_processed_reports(profile_id, folder_type, columns=RECONCILE_COLUMNS,
+                                                 statuses=RECONCILE_STATUSES)
+    
+    fingerprints = {
+        f"{profile_id}/{folder_type}/{f.get('name')}": storage_fingerprint(f) for f in storage_files
+    }
+    diff = diff_reports_against_storage(existing_records, set(fingerprints), fingerprints)
+    diff.update({"deleted": 0, "errors": [], "dry_run": dry_run})
+    
+    orphaned_ids = [r['id'] for r in diff["orphaned"]]
+    if orphaned_ids and not dry_run:
+        print(f"\n🗑️  Removing {len(orphaned_ids)} orphaned records for profile: {profile_id}")
+        diff.update(delete_reports_by_ids(orphaned_ids, batch_size))
+        print(f"✅ Deleted {diff['deleted']} orphaned records")
+    
+    return diff
+
+
 def compute_signature_from_reports(reports: list) -> str:
     """Compute a stable signature for a list of processed reports"""
     try:
@@ -527,6 +1106,39 @@ def clear_user_data(profile_id: str):
         raise
 
 
+# ============================================
+# PROFILES
+# ============================================
+
+PROFILE_PAGE_SIZE = 1000
+
+
+def iter_profile_ids(page_size: int = None):
+    """
+    Every profile ID, page by page in ID order (for backfills)
+
+    Errors are raised: a backfill must not stop early without knowing it.
+    """
+    page_size = max(1, page_size or PROFILE_PAGE_SIZE)
+    offset = 0
+    while True:
+        result = (
+            supabase
+            .table('profiles')
+            .select('id')
+            .order('id')
+            .range(offset, offset + page_size - 1)
+            .execute()
+        )
+        rows = result.data or []
+        for row in rows:
+            yield str(row['id'])
+
+        if len(rows) < page_size:
+            return
+        offset += len(rows)
+
+
 # ============================================
 # HEALTH CHECK
 # ============================================
@@ -0,0 +1,207 @@
+# backend/test_backfill.py
+
+"""
+Tests for the profile backfill: attempt merging, reporting, rate limiting
+and resume
+"""
+
+import sys
+import types
+import argparse
+from concurrent.futures import Future
+
+import backfill
+
+
+def _usage(**counts):
+    return {field: counts.get(field, 0) for field in backfill.USAGE_FIELDS}
+
+
+def _summary(status="done", processed=0, skipped=0, failed=0, seconds=0.0, **llm):
+    return {"profile_id": "p", "status": status, "processed": processed, "skipped": skipped,
+            "failed": failed, "seconds": seconds, "llm": _usage(**llm), "failures": []}
+
+
+def _use_fake_pipeline(monkeypatch, run_process_files):
+    """Stands in for app_api and the metadata extractor inside process_profile"""
+    usage = _usage()
+    monkeypatch.setitem(sys.modules, "app_api",
+                        types.SimpleNamespace(run_process_files=run_process_files))
+    monkeypatch.setitem(sys.modules, "rag_pipeline.extract_metadata",
+                        types.SimpleNamespace(llm_usage=lambda: dict(usage)))
+    return usage
+
+
+def _body(processed=0, failed=0, listing_complete=True, results=()):
+    return {"processed_count": processed, "skipped_count": 0, "failed_count": failed,
+            "total_files": processed + failed, "listing_complete": listing_complete,
+            "results": list(results)}
+
+
+class _InlineExecutor:
+    """ProcessPoolExecutor stand-in that runs each profile right away"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def _args(state_path, **overrides):
+    args = {"resume": False, "state": str(state_path), "folder_type": "reports", "new_only": False,
+            "profiles": "p1,p2,p3", "profiles_file": None, "processes": 2,
+            "files_per_minute": 0, "quiet": True}
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_first_attempt_is_kept_as_is():
+    summary = backfill.merge_attempt(None, _summary(processed=4))
+
+    assert summary["attempts"] == 1
+    assert summary["processed"] == 4
+
+
+def test_retry_adds_earlier_work():
+    previous = _summary(status="failed", processed=3, failed=1, seconds=10.0, calls=3, total_tokens=300)
+    previous["attempts"] = 1
+    # The retry sees the three redone files as skipped
+    retry = _summary(processed=1, skipped=5, seconds=2.5, calls=1, total_tokens=120)
+
+    summary = backfill.merge_attempt(previous, retry)
+
+    assert summary["attempts"] == 2
+    assert summary["processed"] == 4
+    assert summary["skipped"] == 2
+    assert summary["seconds"] == 12.5
+    assert summary["llm"]["calls"] == 4
+    assert summary["llm"]["total_tokens"] == 420
+
+
+def test_throughput_report_totals():
+    state = {"elapsed_seconds": 120.0, "profiles": {
+        "p1": _summary(processed=6, skipped=2, total_tokens=600),
+        "p2": _summary(status="failed", processed=2, failed=1, total_tokens=200),
+    }}
+
+    report = backfill.throughput_report(state)
+
+    assert report["profiles_done"] == 1
+    assert report["profiles_failed"] == 1
+    assert report["files_processed"] == 8
+    assert report["files_skipped"] == 2
+    assert report["files_failed"] == 1
+    assert report["files_per_minute"] == 4.0
+    assert report["tokens_per_file"] == 100.0
+
+
+def test_wait_for_slot_spaces_files_by_the_interval(monkeypatch):
+    clock = {"now": 100.0}
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr(backfill, "_rate", {"interval": 0.5, "next": 0.0})
+    monkeypatch.setattr(backfill.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(backfill.time, "sleep", sleep)
+
+    for _ in range(3):
+        backfill._wait_for_slot()
+
+    # The first file starts at once, the others wait their turn
+    assert sleeps == [0.5, 0.5]
+
+
+def test_wait_for_slot_without_a_limit(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(backfill, "_rate", {"interval": 0.0, "next": 0.0})
+    monkeypatch.setattr(backfill.time, "sleep", sleeps.append)
+
+    for _ in range(3):
+        backfill._wait_for_slot()
+
+    assert sleeps == []
+
+
+def test_incomplete_listing_fails_the_profile(monkeypatch):
+    _use_fake_pipeline(monkeypatch, lambda *args, **kwargs: (_body(processed=2, listing_complete=False), 200))
+
+    summary = backfill.process_profile("p1", "reports")
+
+    assert summary["status"] == "failed"
+    assert summary["processed"] == 2
+
+
+def test_failed_files_fail_the_profile(monkeypatch):
+    results = [{"file_name": "a.pdf", "status": "failed", "error": "boom"}]
+    _use_fake_pipeline(monkeypatch, lambda *args, **kwargs: (_body(processed=1, failed=1, results=results), 200))
+
+    summary = backfill.process_profile("p1", "reports")
+
+    assert summary["status"] == "failed"
+    assert summary["error"] == "1 file(s) failed"
+    assert summary["failures"] == [{"file_name": "a.pdf", "error": "boom"}]
+
+
+def test_redone_files_are_kept_for_resume(monkeypatch):
+    seen = {}
+
+    def run_process_files(profile_id, folder_type, **kwargs):
+        seen.update(kwargs)
+        results = [{"file_name": "a.pdf", "status": "skipped"},
+                   {"file_name": "b.pdf", "status": "success"},
+                   {"file_name": "c.pdf", "status": "failed", "error": "boom"}]
+        return _body(processed=1, failed=1, results=results), 200
+
+    _use_fake_pipeline(monkeypatch, run_process_files)
+
+    summary = backfill.process_profile("p1", "reports", "2026-01-01T00:00:00+00:00", ["a.pdf"])
+
+    # Passed on, since saved checkpoints may have been pruned since
+    assert seen["redone_files"] == ["a.pdf"]
+    assert summary["redone_files"] == ["a.pdf", "b.pdf"]
+
+
+def test_missing_folder_is_done(monkeypatch):
+    _use_fake_pipeline(monkeypatch, lambda *args, **kwargs: ({"success": False, "error": "No files"}, 404))
+
+    assert backfill.process_profile("p1", "reports")["status"] == "done"
+
+
+def test_resume_retries_only_unfinished_profiles(monkeypatch, tmp_path):
+    state_path = tmp_path / "backfill_state.json"
+    state = backfill.new_state("reports", reprocess=True)
+    state["profiles"] = {
+        "p1": {**_summary(processed=5), "attempts": 1},
+        "p2": {**_summary(status="failed", processed=2, failed=1), "attempts": 1,
+               "redone_files": ["a.pdf", "b.pdf"]},
+    }
+    backfill.save_state(str(state_path), state)
+
+    calls = []
+
+    def process_profile(profile_id, folder_type, reprocess_since, redone_files):
+        calls.append((profile_id, reprocess_since, redone_files))
+        return {**_summary(processed=1), "profile_id": profile_id, "redone_files": ["c.pdf"]}
+
+    monkeypatch.setattr(backfill, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(backfill, "process_profile", process_profile)
+
+    backfill.run_backfill(_args(state_path, resume=True))
+
+    # p1 finished in the first run; p2 failed and p3 was never reached
+    since = state["reprocess_since"]
+    assert sorted(calls) == [("p2", since, ["a.pdf", "b.pdf"]), ("p3", since, None)]
+    saved = backfill.load_state(str(state_path))
+    assert {p: s["status"] for p, s in saved["profiles"].items()} == {"p1": "done", "p2": "done", "p3": "done"}
+    assert saved["profiles"]["p2"]["attempts"] == 2
+    assert saved["profiles"]["p2"]["processed"] == 3
+    assert saved["profiles"]["p2"]["redone_files"] == ["a.pdf", "b.pdf", "c.pdf"]
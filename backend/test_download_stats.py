@@ -0,0 +1,64 @@
+# backend/test_download_stats.py
+
+"""
+Tests for the storage download counters
+"""
+
+import os
+
+# supabase_helper creates its client on import
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test.service.key")
+
+import supabase_helper as sb
+
+
+class _Pool:
+    def __init__(self, num_connections, num_requests):
+        self.num_connections = num_connections
+        self.num_requests = num_requests
+
+
+class _Adapter:
+    def __init__(self, pools):
+        self.poolmanager = type("PoolManager", (), {"pools": pools})()
+
+
+def test_adapter_mounted_for_both_schemes_is_counted_once(download_counters, monkeypatch):
+    adapter = _Adapter({"storage.example": _Pool(num_connections=2, num_requests=10)})
+    client = type("Session", (), {"adapters": {"https://": adapter, "http://": adapter}})()
+    monkeypatch.setattr(sb, "_http_client", client)
+    monkeypatch.setattr(sb, "_http_kind", "requests")
+
+    stats = sb.download_stats()
+
+    assert stats["connections_opened"] == 2
+    assert stats["connections_reused"] == 8
+
+
+def test_separate_adapters_are_summed(download_counters, monkeypatch):
+    client = type("Session", (), {"adapters": {
+        "https://": _Adapter({"a": _Pool(1, 4), "b": _Pool(1, 1)}),
+        "http://": _Adapter({"c": _Pool(1, 3)}),
+    }})()
+    monkeypatch.setattr(sb, "_http_client", client)
+    monkeypatch.setattr(sb, "_http_kind", "requests")
+    download_counters.update(downloads=3, bytes=3000, seconds=1.5)
+
+    stats = sb.download_stats()
+
+    assert stats["connections_opened"] == 3
+    assert stats["connections_reused"] == 5
+    assert stats["bytes_per_sec"] == 2000
+    assert stats["client"] == "requests"
+
+
+def test_httpx_client_has_no_pool_counters(download_counters, monkeypatch):
+    monkeypatch.setattr(sb, "_http_client", object())
+    monkeypatch.setattr(sb, "_http_kind", "httpx")
+
+    stats = sb.download_stats()
+
+    assert stats["connections_opened"] is None
+    assert stats["connections_reused"] is None
+    assert stats["bytes_per_sec"] is None
@@ -0,0 +1,45 @@
+# backend/test_extractor_ocr.py
+
+"""
+Tests for batched PaddleOCR recognition (PaddleOCR 3.x predict API)
+"""
+
+import numpy as np
+
+from rag_pipeline import extraction
+from rag_pipeline import extractor_OCR as ocr
+
+
+def _fake_paddle(calls):
+    """Stands in for a PaddleOCR 3.x instance; records every predict() batch"""
+    def predict(images):
+        calls.append(len(images))
+        return [
+            {"rec_texts": [f"Hemoglobin {i} g/dL", "x"], "rec_scores": [0.9, 0.1]}
+            for i in range(len(images))
+        ]
+
+    return type("FakePaddleOCR", (), {"predict": staticmethod(predict)})()
+
+
+def test_pages_are_recognised_in_one_batch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr, "PADDLE_AVAILABLE", True)
+    monkeypatch.setattr(ocr, "paddle_ocr", _fake_paddle(calls))
+
+    images = [np.zeros((20, 20), dtype=np.uint8) for _ in range(3)]
+    results = extraction.ocr_images(images, mode="best", engines=["paddle"])
+
+    # One predict() call for all three pages, not one per page
+    assert calls == [3]
+    assert [r["text"] for r in results] == [f"Hemoglobin {i} g/dL" for i in range(3)]
+    assert all(r["engine"] == "paddle" for r in results)
+
+
+def test_low_confidence_lines_are_dropped():
+    text, confidence = ocr._paddle_lines(
+        {"rec_texts": ["Glucose 95", "~~", "Fasting"], "rec_scores": [0.8, 0.2, 0.6]}
+    )
+
+    assert text == "Glucose 95\nFasting"
+    assert round(confidence, 2) == 0.7
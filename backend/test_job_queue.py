@@ -0,0 +1,86 @@
+# backend/test_job_queue.py
+
+"""
+Tests for the SQLite job queue
+"""
+
+import job_queue
+
+
+def test_enqueue_deduplicates_active_jobs(job_db):
+    job, created = job_queue.enqueue_job("process_files", "p1", "reports")
+    again, created_again = job_queue.enqueue_job("process_files", "p1", "reports")
+    other, created_other = job_queue.enqueue_job("process_files", "p1", "prescriptions")
+
+    assert created and not created_again
+    assert again["id"] == job["id"]
+    assert created_other and other["id"] != job["id"]
+
+    # Once finished, the same folder can be queued again
+    claimed = job_queue.claim_next_job("w1")
+    assert claimed["id"] == job["id"] and claimed["status"] == "running"
+    assert job_queue.enqueue_job("process_files", "p1", "reports")[1] is False
+    job_queue.complete_job(job["id"], {"processed_count": 2})
+    assert job_queue.enqueue_job("process_files", "p1", "reports")[1] is True
+
+
+def test_claim_order_and_completion(job_db):
+    first, _ = job_queue.enqueue_job("process_files", "p1", "reports")
+    second, _ = job_queue.enqueue_job("process_files", "p2", "reports")
+
+    assert job_queue.claim_next_job("w1")["id"] == first["id"]
+    assert job_queue.claim_next_job("w2")["id"] == second["id"]
+    assert job_queue.claim_next_job("w3") is None
+
+    job_queue.complete_job(first["id"], {"processed_count": 3})
+    job_queue.fail_job(second["id"], "Profile not found")
+
+    done = job_queue.get_job(first["id"])
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"processed_count": 3}
+    assert job_queue.get_job(second["id"])["error"] == "Profile not found"
+
+
+def test_stale_running_jobs_are_requeued(job_db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 2)
+
+    job, _ = job_queue.enqueue_job("process_files", "p1", "reports")
+    job_queue.claim_next_job("w1")
+    job_queue._connect().execute(
+        "UPDATE jobs SET heartbeat_at = '2000-01-01T00:00:00+00:00' WHERE id = ?", (job["id"],)
+    )
+
+    assert job_queue.requeue_stale_jobs(60) == 1
+    assert job_queue.get_job(job["id"])["status"] == "queued"
+
+    job_queue.claim_next_job("w2")
+    job_queue._connect().execute(
+        "UPDATE jobs SET heartbeat_at = '2000-01-01T00:00:00+00:00' WHERE id = ?", (job["id"],)
+    )
+    job_queue.requeue_stale_jobs(60)
+    assert job_queue.get_job(job["id"])["status"] == "failed"
+
+
+def test_file_status_tracking(job_db):
+    job, _ = job_queue.enqueue_job("process_files", "p1", "reports")
+
+    job_queue.set_file_status(job["id"], "b.pdf", "pending", position=1)
+    job_queue.set_file_status(job["id"], "a.pdf", "pending", position=0)
+    job_queue.set_file_status(job["id"], "a.pdf", "success", {"record_id": 7}, position=0)
+
+    files = job_queue.get_job_files(job["id"])
+    assert [f["file_name"] for f in files] == ["a.pdf", "b.pdf"]
+    assert files[0]["status"] == "success" and files[0]["detail"] == {"record_id": 7}
+    assert job_queue.file_status_counts(job["id"]) == {"pending": 1, "success": 1}
+
+
+def test_live_workers_counts_recent_heartbeats(job_db):
+    assert job_queue.live_workers(60) == 0
+
+    job_queue.worker_alive("w1")
+    job_queue.worker_alive("w2")
+    job_queue._connect().execute(
+        "UPDATE workers SET seen_at = '2000-01-01T00:00:00+00:00' WHERE worker = 'w2'"
+    )
+
+    assert job_queue.live_workers(60) == 1
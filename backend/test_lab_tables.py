@@ -0,0 +1,42 @@
+# backend/test_lab_tables.py
+
+"""
+Tests for structured lab-table parsing
+"""
+
+from rag_pipeline.lab_tables import parse_lab_table, parse_lab_row, format_lab_results
+
+
+def test_table_with_header():
+    table = [
+        ["Test Name", "Result", "Units", "Biological Ref. Interval"],
+        ["Hemoglobin", "14.5", "g/dL", "13.0 - 17.0"],
+        ["Total Cholesterol", "212", "mg/dL", "< 200"],
+        ["Test Name", "Result", "Units", "Biological Ref. Interval"],
+        ["Urine Glucose", "Negative", "", "Negative"],
+    ]
+
+    rows = parse_lab_table(table)
+
+    assert rows == [
+        {"test": "Hemoglobin", "value": "14.5", "unit": "g/dL", "reference_range": "13.0 - 17.0"},
+        {"test": "Total Cholesterol", "value": "212", "unit": "mg/dL", "reference_range": "< 200"},
+        {"test": "Urine Glucose", "value": "Negative", "unit": None, "reference_range": "Negative"},
+    ]
+
+
+def test_headerless_rows_are_inferred():
+    assert parse_lab_row(["Vitamin D", "18.2 ng/mL", "30-100"]) == {
+        "test": "Vitamin D", "value": "18.2", "unit": "ng/mL", "reference_range": "30-100"
+    }
+    assert parse_lab_row(["Patient Age", "45", "Years"]) is None
+    assert parse_lab_row(["Remarks", "Sample hemolysed"]) is None
+
+
+def test_format_lab_results():
+    text = format_lab_results([
+        {"test": "TSH", "value": "2.1", "unit": "uIU/mL", "reference_range": "0.4-4.0"},
+        {"test": "HbA1c", "value": "5.6", "unit": "%", "reference_range": None},
+    ])
+
+    assert text == "TSH: 2.1 uIU/mL (ref 0.4-4.0)\nHbA1c: 5.6 %"
@@ -0,0 +1,48 @@
+# backend/test_ocr_budget.py
+
+"""
+Tests for the per-document OCR budgets
+"""
+
+import time
+
+from rag_pipeline import ocr_budget
+
+
+def test_capped_dpi_keeps_small_pages_at_full_resolution():
+    # A4 at 300 DPI is ~8.7 MP
+    assert ocr_budget.capped_dpi(595, 842, 300, 10_000_000) == 300
+
+
+def test_capped_dpi_lowers_resolution_for_large_pages():
+    # A0 poster: 2384 x 3370 pt
+    dpi = ocr_budget.capped_dpi(2384, 3370, 300, 10_000_000)
+    pixels = (2384 / 72 * dpi) * (3370 / 72 * dpi)
+
+    assert dpi < 300
+    assert pixels <= 10_000_000
+
+
+def test_expired_budget_is_truncated_with_reason():
+    budget = ocr_budget.new_budget(timeout=0.01)
+    assert not ocr_budget.budget_expired(budget)
+
+    time.sleep(0.02)
+
+    assert ocr_budget.budget_expired(budget)
+    assert ocr_budget.remaining_seconds(budget) == 0.0
+    report = ocr_budget.budget_report(budget)
+    assert report["truncated"] is True
+    assert report["reasons"] == [ocr_budget.REASON_TIME_LIMIT]
+
+
+def test_downscale_alone_is_not_truncation():
+    budget = ocr_budget.new_budget(timeout=0)
+    ocr_budget.flag(budget, ocr_budget.REASON_DOWNSCALED)
+    ocr_budget.flag(budget, ocr_budget.REASON_DOWNSCALED)
+
+    assert budget["deadline"] is None
+    assert ocr_budget.remaining_seconds(budget) is None
+    report = ocr_budget.budget_report(budget)
+    assert report["truncated"] is False
+    assert report["reasons"] == [ocr_budget.REASON_DOWNSCALED]
@@ -0,0 +1,45 @@
+# backend/test_ocr_cache.py
+
+"""
+Tests for the content-addressed OCR cache
+"""
+
+import os
+
+from rag_pipeline import ocr_cache
+
+
+def test_key_depends_on_bytes_and_version():
+    key = ocr_cache.cache_key(b"%PDF-1.4 same", ".pdf", "1")
+
+    assert key == ocr_cache.cache_key(b"%PDF-1.4 same", ".PDF", "1")
+    assert key != ocr_cache.cache_key(b"%PDF-1.4 other", ".pdf", "1")
+    assert key != ocr_cache.cache_key(b"%PDF-1.4 same", ".pdf", "2")
+
+
+def test_hit_and_miss_counters(ocr_cache_dir):
+    key = ocr_cache.cache_key(b"report", ".png", "1")
+
+    assert ocr_cache.get_cached_text(key) is None
+    ocr_cache.put_cached_text(key, "Hemoglobin 14.5 g/dL")
+    assert ocr_cache.get_cached_text(key) == "Hemoglobin 14.5 g/dL"
+
+    stats = ocr_cache.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["writes"] == 1
+
+
+def test_evicts_least_recently_used(ocr_cache_dir, monkeypatch):
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_MAX_BYTES", 250)
+    keys = [ocr_cache.cache_key(str(i).encode(), ".pdf", "1") for i in range(3)]
+
+    for i, key in enumerate(keys):
+        ocr_cache.put_cached_text(key, "x" * 100)
+        path = ocr_cache._entry_path(key)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    ocr_cache.put_cached_text(ocr_cache.cache_key(b"new", ".pdf", "1"), "y" * 100)
+
+    assert ocr_cache.get_cached_text(keys[0]) is None
+    assert ocr_cache.cache_stats()["evictions"] >= 1
@@ -0,0 +1,111 @@
+# backend/test_parallel_ocr.py
+
+"""
+Tests for pooled page OCR: pool crashes and deadlines
+"""
+
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from rag_pipeline import parallel_ocr
+
+
+def _fake_worker(page_number, gray, timeout=0):
+    return page_number, f"text {gray}", 0.01
+
+
+class _BreakingExecutor:
+    """Runs the first `succeed` pages, then fails like a pool whose worker died"""
+
+    def __init__(self, succeed):
+        self.succeed = succeed
+        self.submitted = []
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+    def submit(self, fn, page_number, gray, timeout):
+        self.submitted.append(page_number)
+        future = Future()
+        if len(self.submitted) <= self.succeed:
+            future.set_result(fn(page_number, gray, timeout))
+        else:
+            future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def test_broken_pool_keeps_finished_pages_and_redoes_lost_ones(monkeypatch):
+    executor = _BreakingExecutor(succeed=3)
+    monkeypatch.setattr(parallel_ocr, "_ocr_page_worker", _fake_worker)
+    monkeypatch.setattr(parallel_ocr, "OCR_MAX_WORKERS", 2)
+    monkeypatch.setattr(parallel_ocr, "_executor", executor)
+
+    pages = ((n, f"p{n}") for n in range(1, 11))
+    results = parallel_ocr.ocr_pages(pages, parallel=True, max_workers=2, verbose=False)
+
+    assert [r["page"] for r in results] == list(range(1, 11))
+    assert [r["text"] for r in results] == [f"text p{n}" for n in range(1, 11)]
+    # Pages 1-3 came back from the pool before it broke
+    assert executor.submitted[:3] == [1, 2, 3]
+    assert parallel_ocr._executor is None
+
+
+def test_broken_pool_leaves_a_newer_pool_running(monkeypatch):
+    broken, replacement = _BreakingExecutor(succeed=0), _BreakingExecutor(succeed=0)
+    # Another thread already replaced the broken pool
+    monkeypatch.setattr(parallel_ocr, "_executor", replacement)
+
+    parallel_ocr.discard_ocr_executor(broken)
+
+    assert parallel_ocr._executor is replacement
+
+
+def test_callers_share_one_pool(monkeypatch):
+    created = []
+
+    class _Pool(_BreakingExecutor):
+        def __init__(self, max_workers):
+            super().__init__(succeed=100)
+            created.append(max_workers)
+
+    monkeypatch.setattr(parallel_ocr, "ProcessPoolExecutor", _Pool)
+    monkeypatch.setattr(parallel_ocr, "_executor", None)
+    monkeypatch.setattr(parallel_ocr, "_ocr_page_worker", _fake_worker)
+    monkeypatch.setattr(parallel_ocr, "OCR_MAX_WORKERS", 4)
+
+    for max_workers in (2, 4, 3):
+        pages = [(n, f"p{n}") for n in range(1, 6)]
+        parallel_ocr.ocr_pages(pages, parallel=True, max_workers=max_workers, verbose=False)
+
+    # Sized once; a call asking for fewer workers does not replace it
+    assert created == [4]
+
+
+def test_finishing_every_page_is_not_a_timeout(monkeypatch):
+    def slow_worker(page_number, gray, timeout=0):
+        time.sleep(0.04)
+        return _fake_worker(page_number, gray, timeout)
+
+    monkeypatch.setattr(parallel_ocr, "_ocr_page_worker", slow_worker)
+
+    # The deadline passes while the last page is still being read
+    report = {}
+    deadline = time.monotonic() + 0.06
+    results = parallel_ocr.ocr_pages([(1, "a"), (2, "b")], parallel=False, verbose=False,
+                                     deadline=deadline, report=report)
+
+    assert time.monotonic() > deadline
+    assert len(results) == 2
+    assert report["timed_out"] is False
+
+
+def test_skipped_pages_are_a_timeout(monkeypatch):
+    monkeypatch.setattr(parallel_ocr, "_ocr_page_worker", _fake_worker)
+
+    report = {}
+    results = parallel_ocr.ocr_pages([(1, "a"), (2, "b")], parallel=False, verbose=False,
+                                     deadline=time.monotonic() - 1, report=report)
+
+    assert results == []
+    assert report["timed_out"] is True
@@ -0,0 +1,108 @@
+# backend/test_pipeline_state.py
+
+"""
+Tests for per-file processing checkpoints
+"""
+
+import sqlite3
+
+import pipeline_state
+
+
+FINGERPRINT = {"source_size": 1024, "source_etag": "abc", "source_updated_at": "2026-01-01T00:00:00Z"}
+
+
+def test_resume_from_last_stage(pipeline_db):
+    path = "p1/reports/cbc.pdf"
+
+    assert pipeline_state.load_checkpoint(path, FINGERPRINT) is None
+
+    pipeline_state.save_checkpoint(path, FINGERPRINT, pipeline_state.FETCHED, seconds=0.5)
+    checkpoint = pipeline_state.load_checkpoint(path, FINGERPRINT)
+    assert checkpoint["stage"] == pipeline_state.FETCHED
+
+    pipeline_state.save_checkpoint(path, FINGERPRINT, pipeline_state.TEXT_EXTRACTED,
+                                   data={"phase": "full", "text": "Hemoglobin 14.5"}, seconds=2.0)
+    pipeline_state.record_failure(path, "OpenAI timeout")
+
+    checkpoint = pipeline_state.load_checkpoint(path, FINGERPRINT)
+    assert checkpoint["stage"] == pipeline_state.TEXT_EXTRACTED
+    assert checkpoint["data"]["text"] == "Hemoglobin 14.5"
+    assert checkpoint["attempts"] == 1 and checkpoint["last_error"] == "OpenAI timeout"
+    assert checkpoint["durations"] == {"fetched": 0.5, "text_extracted": 2.0}
+    assert pipeline_state.reached(checkpoint["stage"], pipeline_state.FETCHED)
+    assert not pipeline_state.reached(checkpoint["stage"], pipeline_state.METADATA_EXTRACTED)
+
+
+def test_replaced_file_starts_over(pipeline_db):
+    path = "p1/reports/cbc.pdf"
+
+    pipeline_state.save_checkpoint(path, FINGERPRINT, pipeline_state.TEXT_EXTRACTED,
+                                   data={"text": "old"})
+
+    assert pipeline_state.load_checkpoint(path, {**FINGERPRINT, "source_etag": "def"}) is None
+
+
+def test_saved_drops_intermediates_and_keeps_timings(pipeline_db):
+    path = "p1/reports/cbc.pdf"
+
+    pipeline_state.save_checkpoint(path, FINGERPRINT, pipeline_state.METADATA_EXTRACTED,
+                                   data={"text": "x"}, seconds=1.5)
+    pipeline_state.mark_saved(path, seconds=0.25)
+
+    checkpoint = pipeline_state.load_checkpoint(path, FINGERPRINT)
+    assert checkpoint["stage"] == pipeline_state.SAVED
+    assert checkpoint["data"] == {}
+
+    stats = pipeline_state.stage_stats()
+    assert list(stats) == ["metadata_extracted", "saved"]
+    assert stats["saved"]["count"] == 1 and stats["saved"]["avg_seconds"] == 0.25
+
+
+def test_backfill_ignores_older_checkpoints(pipeline_db):
+    pipeline_state.save_checkpoint("p1/reports/a.pdf", FINGERPRINT, pipeline_state.TEXT_EXTRACTED,
+                                   data={"text": "old extractor"})
+    pipeline_state.mark_saved("p1/reports/a.pdf")
+    since = pipeline_state._now()
+
+    assert pipeline_state.load_checkpoint("p1/reports/a.pdf", FINGERPRINT, since=since) is None
+    assert pipeline_state.saved_paths("p1/reports/", since) == set()
+
+    for path in ("p1/reports/b.pdf", "p2/reports/c.pdf"):
+        pipeline_state.save_checkpoint(path, FINGERPRINT, pipeline_state.METADATA_EXTRACTED)
+        pipeline_state.mark_saved(path)
+
+    assert pipeline_state.load_checkpoint("p1/reports/b.pdf", FINGERPRINT, since=since)
+    assert pipeline_state.saved_paths("p1/reports/", since) == {"p1/reports/b.pdf"}
+
+
+def test_clear_profile_drops_only_that_profile(pipeline_db):
+    for path in ("p1/reports/a.pdf", "p1/labs/b.pdf", "p10/reports/c.pdf"):
+        pipeline_state.save_checkpoint(path, FINGERPRINT, pipeline_state.TEXT_EXTRACTED,
+                                       data={"text": "Hemoglobin 14.5"})
+
+    assert pipeline_state.clear_profile("p1") == 2
+    assert pipeline_state.load_checkpoint("p1/reports/a.pdf", FINGERPRINT) is None
+    assert pipeline_state.load_checkpoint("p10/reports/c.pdf", FINGERPRINT)
+
+
+def test_downloads_from_older_versions_are_dropped(pipeline_db):
+    conn = sqlite3.connect(pipeline_db)
+    conn.execute("CREATE TABLE file_checkpoints (file_path TEXT PRIMARY KEY, source_key TEXT NOT NULL, "
+                 "stage TEXT NOT NULL, data TEXT, file_bytes BLOB, durations TEXT NOT NULL DEFAULT '{}', "
+                 "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, updated_at TEXT NOT NULL)")
+    conn.execute("INSERT INTO file_checkpoints (file_path, source_key, stage, file_bytes, updated_at) "
+                 "VALUES (?, ?, ?, ?, ?)", ("p1/reports/a.pdf", pipeline_state.source_key(FINGERPRINT),
+                                            pipeline_state.FETCHED, b"%PDF-1.4", pipeline_state._now()))
+    conn.commit()
+    conn.close()
+
+    checkpoint = pipeline_state.load_checkpoint("p1/reports/a.pdf", FINGERPRINT)
+
+    assert checkpoint["stage"] == pipeline_state.FETCHED
+    assert "file_bytes" not in checkpoint
+    raw = sqlite3.connect(pipeline_db)
+    columns = {row[1] for row in raw.execute("PRAGMA table_info(file_checkpoints)")}
+    if "file_bytes" in columns:
+        assert raw.execute("SELECT file_bytes FROM file_checkpoints").fetchone()[0] is None
+    raw.close()
@@ -0,0 +1,8 @@
+-- Persist the storage object's size, etag and last update per processed report.
+-- process-files compares them with the bucket listing and only re-fetches
+-- and re-extracts files that are new or were replaced under the same name.
+
+alter table if exists public.medical_reports_processed
+  add column if not exists source_size bigint,
+  add column if not exists source_etag text,
+  add column if not exists source_updated_at timestamptz;